@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Written next to the Chroma files by every indexing run
+INDEX_VERSION_FILE = "index_version"
+# Key under which an index derived from the collection records the version it was built for
+INDEX_VERSION_KEY = "index_version"
+
+
+def read_index_version(db_path: str) -> str:
+    version_path = os.path.join(db_path, INDEX_VERSION_FILE)
+    try:
+        with open(version_path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
+
+
+def bump_index_version(db_path: str) -> str:
+    """Marks the collection at `db_path` as re-indexed so cached answers are dropped."""
+    version = str(time.time_ns())
+    os.makedirs(db_path, exist_ok=True)
+    with open(os.path.join(db_path, INDEX_VERSION_FILE), "w", encoding="utf-8") as f:
+        f.write(version)
+    return version
+
+
+class SemanticAnswerCache:
+    """
+    Caches generated answers by question embedding.
+
+    A new question reuses a cached answer when its query embedding is within
+    `threshold` cosine similarity of a cached question AND retrieval returned the
+    same sections, so a paraphrase never gets an answer built from different law.
+    Entries expire after `ttl_seconds`; past `max_entries` the least recently used
+    entry is evicted. The whole cache is cleared when the index version changes.
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 24 * 3600, max_entries: int = 1000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # row -> (section_ids, answer, metadatas, created_at)
+        self._free_rows = list(range(max_entries - 1, -1, -1))
+        self._matrix = None
+        self._index_version = None
+
+    def check_version(self, index_version: str) -> None:
+        """Drops every entry if the collection was re-indexed since they were stored."""
+        with self._lock:
+            if self._index_version is not None and index_version != self._index_version:
+                self._clear_locked()
+            self._index_version = index_version
+
+    def lookup(self, query_embedding: Sequence[float], section_ids: Sequence[str]) -> Optional[Tuple[str, List[dict]]]:
+        query = self._normalize(query_embedding)
+        key = tuple(section_ids)
+
+        with self._lock:
+            if self._entries and self._matrix is not None:
+                self._expire_locked()
+                rows = np.fromiter(self._entries.keys(), dtype=np.int64)
+                scores = self._matrix[rows] @ query
+                # Best candidates first, only those over the threshold
+                for i in np.argsort(-scores):
+                    if scores[i] < self.threshold:
+                        break
+                    row = int(rows[i])
+                    cached_ids, answer, metadatas, _ = self._entries[row]
+                    if cached_ids == key:
+                        self._entries.move_to_end(row)
+                        self.hits += 1
+                        return answer, metadatas
+
+            self.misses += 1
+            return None
+
+    def store(self, query_embedding: Sequence[float], section_ids: Sequence[str], answer: str, metadatas: List[dict]) -> None:
+        query = self._normalize(query_embedding)
+
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, query.shape[0]), dtype=np.float32)
+
+            self._expire_locked()
+            if self._free_rows:
+                row = self._free_rows.pop()
+            else:
+                row, _ = self._entries.popitem(last=False)
+
+            self._matrix[row] = query
+            self._entries[row] = (tuple(section_ids), answer, metadatas, time.monotonic())
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._clear_locked()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire_locked(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [row for row, entry in self._entries.items() if entry[3] < cutoff]
+        for row in expired:
+            del self._entries[row]
+            self._free_rows.append(row)
+
+    def _clear_locked(self):
+        self._entries.clear()
+        self._free_rows = list(range(self.max_entries - 1, -1, -1))
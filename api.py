@@ -0,0 +1,85 @@
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+# One RagPipeline per process: a single Chroma client, embedding client and model shared by all requests
+import rag_pipeline
+import telemetry
+
+# Caps concurrent embedding/Chroma/Gemini work so bursts queue here instead of hitting rate limits
+MAX_UPSTREAM_CALLS = int(os.environ.get("MAX_UPSTREAM_CALLS", 8))
+# Largest /search page; each result is a chunk of statute text in the response
+MAX_SEARCH_RESULTS = 50
+
+
+class AskRequest(BaseModel):
+    question: str
+
+
+class SearchRequest(BaseModel):
+    question: str
+    n_results: int = Field(3, ge=1, le=MAX_SEARCH_RESULTS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.upstream = asyncio.Semaphore(MAX_UPSTREAM_CALLS)
+    # Open Chroma and build the model before the first request arrives
+    await run_in_threadpool(rag_pipeline.get_pipeline().warm_up)
+    yield
+
+
+app = FastAPI(title="NJ Legal Q&A API", lifespan=lifespan)
+
+try:
+    # Request spans become the parents of the pipeline's stage spans (a no-op without an SDK configured)
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    FastAPIInstrumentor.instrument_app(app, excluded_urls="metrics")
+except ImportError:
+    pass
+
+
+@app.post("/ask")
+async def ask(request: AskRequest):
+    # get_answer blocks on network calls, so it runs in the threadpool, not on the event loop
+    async with app.state.upstream:
+        answer, metadatas = await run_in_threadpool(rag_pipeline.get_answer, request.question)
+    return {"answer": answer, "sources": metadatas}
+
+
+@app.post("/ask/stream")
+async def ask_stream(request: AskRequest):
+    async def events():
+        async with app.state.upstream:
+            # Each next() on the blocking generator is run in the threadpool
+            async for kind, payload in iterate_in_threadpool(rag_pipeline.stream_answer(request.question)):
+                yield json.dumps({"type": kind, "data": payload}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@app.post("/search")
+async def search(request: SearchRequest):
+    async with app.state.upstream:
+        chunks, metadatas = await run_in_threadpool(
+            rag_pipeline.get_statute_context, request.question, request.n_results
+        )
+    return {"results": [{"text": chunk, "metadata": meta} for chunk, meta in zip(chunks, metadatas)]}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    # Per-stage p50/p95/p99 and token counts in the Prometheus text format
+    return telemetry.METRICS.render_prometheus()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=os.environ.get("HOST", "127.0.0.1"), port=int(os.environ.get("PORT", 8000)))
@@ -1,5 +1,5 @@
 import streamlit as st
-from rag_pipeline import get_answer
+from rag_pipeline import stream_answer
 
 st.set_page_config(page_title="NJ Legal Q&A", layout="wide")
 st.title("📘 New Jersey Legal Q&A Chatbot")
@@ -8,13 +8,28 @@ st.markdown("Ask a question based on New Jersey law. I’ll retrieve the most re
 user_question = st.text_input("🔍 Ask your legal question:")
 
 if user_question:
+    events = stream_answer(user_question)
     with st.spinner("Looking through New Jersey law..."):
-        answer, metadatas = get_answer(user_question)
-        st.markdown("### 📄 Answer")
-        st.write(answer)
+        # Sources arrive as soon as retrieval finishes, before any answer text
+        _, metadatas = next(events)
 
-        st.markdown("---")
-        st.markdown("### 📚 Source Sections")
-        for meta in metadatas:
-            st.markdown(f"- **{meta['section']}**: {meta['heading']}")
-            st.markdown(f"[View Full Statute]({meta.get('source_url', '#')})")
\ No newline at end of file
+    st.markdown("### 📄 Answer")
+    answer_box = st.empty()
+    timing_box = st.empty()
+
+    st.markdown("---")
+    st.markdown("### 📚 Source Sections")
+    for meta in metadatas:
+        st.markdown(f"- **{meta['section']}**: {meta['heading']}")
+        st.markdown(f"[View Full Statute]({meta.get('source_url', '#')})")
+
+    answer = ""
+    for kind, payload in events:
+        if kind == "token":
+            answer += payload
+            answer_box.markdown(answer + "▌")
+        elif kind == "done":
+            answer_box.markdown(answer)
+            if payload["time_to_first_token"] is not None:
+                timing_box.caption(f"First token in {payload['time_to_first_token']:.2f}s · "
+                                   f"full answer in {payload['total_time']:.2f}s")
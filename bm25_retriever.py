@@ -0,0 +1,192 @@
+import argparse
+import json
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from answer_cache import INDEX_VERSION_KEY, read_index_version
+from index_files import replacing_directory
+from utils.organize_statutes import iter_processed_sections
+
+DEFAULT_INPUT = "data/processed/processed_nj_statutes.json"
+DEFAULT_INDEX_DIR = "./bm25_index"
+CHROMA_PATH = "./chroma_db"
+
+# Section numbers ("2a:52-1", "54a:9-25.1") and session-law parts ("l.1997", "c.278")
+# are kept as single tokens so exact citations match exactly
+TOKEN_PATTERN = re.compile(r"\d+[a-z]*:[0-9a-z]+-[0-9a-z]+(?:\.[0-9a-z]+)*|[a-z]\.\d+|[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have if in is it its of on or shall such that the this to
+was were which with any all may not no other than under upon be been being into
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuses several ranked lists of keys: each key scores sum(1 / (k + rank)).
+    Rank positions are 1-based. Returns (key, score) best first.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+class BM25Index:
+    """
+    Okapi BM25 over statute sections, stored as an inverted index on disk:
+
+        meta.json         k1, b, avgdl, the vocabulary (term id = position) and the
+                          Chroma index version it was built alongside
+        offsets.npy       postings range of each term (int64, V + 1)
+        postings_doc.npy  doc ids, grouped by term (uint32)
+        postings_tf.npy   term frequencies, parallel to postings_doc (uint16)
+        doc_lens.npy      tokens per doc (uint32)
+        docs.json         id / title / section / heading per doc
+        texts.bin         UTF-8 section texts back to back, sliced via text_offsets.npy
+
+    The arrays are opened with mmap, so several workers share one page-cached copy.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(path, "docs.json"), "r", encoding="utf-8") as f:
+            self.docs = json.load(f)
+
+        self.k1 = meta["k1"]
+        self.b = meta["b"]
+        self.avgdl = meta["avgdl"]
+        self.vocab = {term: i for i, term in enumerate(meta["vocab"])}
+        self.index_version = meta.get(INDEX_VERSION_KEY, "")
+
+        load = lambda name: np.load(os.path.join(path, name), mmap_mode="r")
+        self.offsets = load("offsets.npy")
+        self.postings_doc = load("postings_doc.npy")
+        self.postings_tf = load("postings_tf.npy")
+        self.text_offsets = load("text_offsets.npy")
+        self._texts = np.memmap(os.path.join(path, "texts.bin"), dtype=np.uint8, mode="r") \
+            if self.text_offsets[-1] else np.zeros(0, dtype=np.uint8)
+
+        doc_lens = np.load(os.path.join(path, "doc_lens.npy")).astype(np.float32)
+        # Length normalization is per doc, so compute it once rather than per query
+        self._norms = self.k1 * (1 - self.b + self.b * doc_lens / max(self.avgdl, 1e-9))
+        self.num_docs = len(self.docs)
+
+    # -------------------------------
+    # Build
+    # -------------------------------
+    @staticmethod
+    def build(sections: Iterable[dict], path: str, k1: float = 1.5, b: float = 0.75,
+              index_version: str = "") -> "BM25Index":
+        """
+        Builds the index from dicts with "title", "section", "heading" and "text".
+        index_version is the collection's (answer_cache.read_index_version), so the
+        index stops being used once the collection is re-indexed.
+
+        The files are written to a new directory that then replaces `path`, so processes
+        serving the old index keep their mapped copy intact.
+        """
+        with replacing_directory(path) as build_dir:
+            BM25Index._write(sections, build_dir, k1, b, index_version)
+        return BM25Index(path)
+
+    @staticmethod
+    def _write(sections, path, k1, b, index_version):
+        docs = []
+        doc_lens = []
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        text_offsets = [0]
+
+        with open(os.path.join(path, "texts.bin"), "wb") as texts_file:
+            for doc_id, section in enumerate(sections):
+                text = section["text"] or ""
+                # The heading carries most of the section's topic words
+                counts = Counter(tokenize(f"{section['section']} {section['heading']} {text}"))
+                for term, tf in counts.items():
+                    postings.setdefault(term, []).append((doc_id, min(tf, 65535)))
+                doc_lens.append(sum(counts.values()))
+                docs.append({
+                    "id": f"section_{section['section']}",
+                    "title": section["title"],
+                    "section": section["section"],
+                    "heading": section["heading"],
+                })
+                encoded = text.encode("utf-8")
+                texts_file.write(encoded)
+                text_offsets.append(text_offsets[-1] + len(encoded))
+
+        vocab = sorted(postings)
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        for i, term in enumerate(vocab):
+            offsets[i + 1] = offsets[i] + len(postings[term])
+        postings_doc = np.fromiter((d for term in vocab for d, _ in postings[term]), dtype=np.uint32, count=offsets[-1])
+        postings_tf = np.fromiter((tf for term in vocab for _, tf in postings[term]), dtype=np.uint16, count=offsets[-1])
+
+        np.save(os.path.join(path, "offsets.npy"), offsets)
+        np.save(os.path.join(path, "postings_doc.npy"), postings_doc)
+        np.save(os.path.join(path, "postings_tf.npy"), postings_tf)
+        np.save(os.path.join(path, "doc_lens.npy"), np.asarray(doc_lens, dtype=np.uint32))
+        np.save(os.path.join(path, "text_offsets.npy"), np.asarray(text_offsets, dtype=np.int64))
+        with open(os.path.join(path, "docs.json"), "w", encoding="utf-8") as f:
+            json.dump(docs, f)
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            avgdl = sum(doc_lens) / len(doc_lens) if doc_lens else 0.0
+            json.dump({"k1": k1, "b": b, "avgdl": avgdl, "vocab": vocab, INDEX_VERSION_KEY: index_version}, f)
+
+    # -------------------------------
+    # Query
+    # -------------------------------
+    def search(self, query: str, n_results: int = 10) -> List[Tuple[int, float]]:
+        """Returns (doc index, score) pairs, best first."""
+        term_ids = {self.vocab[term] for term in tokenize(query) if term in self.vocab}
+        if not term_ids:
+            return []
+
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.postings_doc[start:end]
+            tf = self.postings_tf[start:end].astype(np.float32)
+            df = end - start
+            idf = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+            # Each doc appears once per term's postings, so fancy-index += is safe
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + self._norms[docs])
+
+        n_results = min(n_results, int(np.count_nonzero(scores)))
+        if n_results == 0:
+            return []
+        top = np.argpartition(-scores, n_results - 1)[:n_results]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def text(self, doc_index: int) -> str:
+        start, end = self.text_offsets[doc_index], self.text_offsets[doc_index + 1]
+        return bytes(self._texts[start:end]).decode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the BM25 index from processed statutes.")
+    parser.add_argument("--input_file", default=DEFAULT_INPUT, help="Processed statutes (.json or .jsonl)")
+    parser.add_argument("--output_dir", default=DEFAULT_INDEX_DIR, help="Directory to write the index to")
+    parser.add_argument("--chroma_path", default=CHROMA_PATH, help="Chroma directory the index goes with")
+    args = parser.parse_args()
+
+    index = BM25Index.build(iter_processed_sections(args.input_file), args.output_dir,
+                            index_version=read_index_version(args.chroma_path))
+    print(f"Indexed {index.num_docs} sections ({len(index.vocab)} terms) into {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
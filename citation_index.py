@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import re
+from typing import Dict, List, Tuple
+
+from answer_cache import INDEX_VERSION_KEY, read_index_version
+from utils.organize_statutes import SECTION_NUMBER
+
+DEFAULT_INDEX_PATH = "./citation_index.json"
+
+# Section numbers typed in a question, with or without an "N.J.S.A." / "R.S." prefix.
+# Case-insensitive because users type "2c:35-5" as often as "2C:35-5".
+CITATION_PATTERN = re.compile(rf"(?<![\w:\-])({SECTION_NUMBER})", re.IGNORECASE)
+
+
+def find_citations(text: str) -> List[str]:
+    """Section numbers mentioned in `text`, in order of appearance, without duplicates."""
+    return list(dict.fromkeys(CITATION_PATTERN.findall(text)))
+
+
+class CitationIndex:
+    """
+    Exact-match index from section number to that section's indexed chunks.
+
+    Built at index time from the same chunks that go into Chroma, so a question
+    that names a section can be answered from its chunks with a dict lookup
+    instead of an embedding call and a nearest-neighbour search.
+    index_version is the collection's (answer_cache.read_index_version) when it
+    was built, so an index that predates a re-index is not served.
+    """
+
+    def __init__(self, sections: Dict[str, List[Tuple[str, str, dict]]] = None, index_version: str = "",
+                 path: str = None):
+        self.sections = sections or {}
+        self.index_version = index_version
+        self.path = path
+
+    def add(self, chunk_id: str, document: str, metadata: dict) -> None:
+        chunks = self.sections.setdefault(metadata["section"], [])
+        chunks.append((chunk_id, document, metadata))
+        chunks.sort(key=lambda chunk: chunk[2].get("chunk_id", 0))
+
+    def remove_section(self, section: str) -> None:
+        self.sections.pop(section, None)
+
+    def lookup(self, section: str) -> List[Tuple[str, str, dict]]:
+        chunks = self.sections.get(section)
+        if chunks is None:
+            chunks = self.sections.get(section.upper(), [])
+        return chunks
+
+    def match(self, question: str) -> List[str]:
+        """Cited sections in `question` that exist in the index, normalized to their indexed form."""
+        matched = []
+        for citation in find_citations(question):
+            for candidate in (citation, citation.upper()):
+                if candidate in self.sections:
+                    matched.append(candidate)
+                    break
+        return list(dict.fromkeys(matched))
+
+    def __len__(self):
+        return len(self.sections)
+
+    # -------------------------------
+    # Persistence
+    # -------------------------------
+    @staticmethod
+    def from_collection(collection, page_size: int = 5000, index_version: str = "") -> "CitationIndex":
+        """Builds the index from every chunk stored in a Chroma collection."""
+        index = CitationIndex(index_version=index_version)
+        offset = 0
+        while True:
+            page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            for chunk_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+                index.add(chunk_id, document, metadata)
+            if len(page["ids"]) < page_size:
+                return index
+            offset += page_size
+
+    def save(self, path: str = DEFAULT_INDEX_PATH) -> None:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({INDEX_VERSION_KEY: self.index_version, "sections": self.sections}, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path: str = DEFAULT_INDEX_PATH) -> "CitationIndex":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        # Indexes saved before the version was recorded are the bare section mapping
+        if set(data) != {INDEX_VERSION_KEY, "sections"}:
+            data = {INDEX_VERSION_KEY: "", "sections": data}
+        sections = {section: [tuple(chunk) for chunk in chunks] for section, chunks in data["sections"].items()}
+        return CitationIndex(sections, data[INDEX_VERSION_KEY], path)
+
+
+def main():
+    import chromadb
+
+    parser = argparse.ArgumentParser(description="Build the section-number index from an indexed Chroma collection.")
+    parser.add_argument("--chroma_path", default="./chroma_db", help="Chroma persistent directory")
+    parser.add_argument("--collection", default="nj_statutes_test_chunks", help="Collection name")
+    parser.add_argument("--output_file", default=DEFAULT_INDEX_PATH, help="Where to write the index")
+    args = parser.parse_args()
+
+    collection = chromadb.PersistentClient(path=args.chroma_path).get_collection(args.collection)
+    index = CitationIndex.from_collection(collection, index_version=read_index_version(args.chroma_path))
+    index.save(args.output_file)
+    print(f"Indexed {len(index)} sections into {args.output_file}")
+
+
+if __name__ == "__main__":
+    main()
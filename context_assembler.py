@@ -0,0 +1,105 @@
+from typing import Callable, Dict, List, Tuple
+
+from telemetry import estimate_tokens
+
+# About what three of the notebook's 2000-character chunks cost, so typical prompts are unchanged
+# and only the long ones (cited sections, whole-section BM25 hits) get trimmed
+DEFAULT_CONTEXT_TOKENS = 1600
+# Overlaps shorter than this between consecutive chunks are treated as coincidence, not splitter overlap
+MIN_OVERLAP_CHARS = 20
+PIECE_SEPARATOR = "\n\n"
+
+
+def overlap_length(previous: str, following: str) -> int:
+    """Length of the longest suffix of `previous` that `following` starts with (0 below MIN_OVERLAP_CHARS)."""
+    for length in range(min(len(previous), len(following)), MIN_OVERLAP_CHARS - 1, -1):
+        if previous.endswith(following[:length]):
+            return length
+    return 0
+
+
+def _is_next_chunk(previous: dict, following: dict) -> bool:
+    return (previous["section"] == following["section"]
+            and isinstance(previous.get("chunk_id"), int) and following.get("chunk_id") == previous["chunk_id"] + 1)
+
+
+def _join_chunks(previous_text: str, previous: dict, following_text: str, following: dict) -> str:
+    """previous_text followed by following_text minus whatever the two chunks share."""
+    if "end_offset" in previous and "start_offset" in following:
+        # Structure-aware chunks record where they sit in the section text
+        shared = max(previous["end_offset"] - following["start_offset"], 0)
+    else:
+        shared = overlap_length(previous_text, following_text)
+    return previous_text + (following_text[shared:] if shared else "\n" + following_text)
+
+
+class ContextAssembler:
+    """
+    Turns retrieved chunks into the prompt's context block.
+
+    Chunks are taken in retrieval order until max_tokens is reached; a chunk that
+    doesn't fit is skipped in favour of smaller, lower-ranked ones. The ones kept
+    are grouped by section (sections in order of their best-ranked chunk) and laid
+    out in chunk_id order, consecutive chunks merged into one piece with the
+    splitter's overlap removed. Repeated chunks are dropped.
+
+    Returns the context together with the metadatas of the chunks it holds and
+    stats comparing it with joining every retrieved chunk.
+    """
+
+    def __init__(self, max_tokens: int = DEFAULT_CONTEXT_TOKENS, count_tokens: Callable[[str], int] = estimate_tokens):
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens
+
+    def render(self, selected: List[Tuple[str, dict]]) -> str:
+        """The context for `selected` (chunk, metadata) pairs, given in retrieval order."""
+        sections = {}
+        for chunk, metadata in selected:
+            sections.setdefault(metadata["section"], []).append((chunk, metadata))
+
+        pieces = []
+        for chunks in sections.values():
+            chunks.sort(key=lambda chunk: chunk[1].get("chunk_id", 0))
+            text, previous = chunks[0]
+            for chunk, metadata in chunks[1:]:
+                if _is_next_chunk(previous, metadata):
+                    text = _join_chunks(text, previous, chunk, metadata)
+                else:
+                    pieces.append(text)
+                    text = chunk
+                previous = metadata
+            pieces.append(text)
+        return PIECE_SEPARATOR.join(pieces)
+
+    def assemble(self, chunks: List[str], metadatas: List[dict]) -> Tuple[str, List[dict], Dict]:
+        """(context, metadatas of the chunks used, stats)."""
+        retrieved_tokens = self.count_tokens(PIECE_SEPARATOR.join(chunks))
+
+        seen = set()
+        selected = []
+        context = ""
+        context_tokens = 0
+        for chunk, metadata in zip(chunks, metadatas):
+            key = (metadata.get("section"), metadata.get("chunk_id"), chunk)
+            if key in seen or not chunk.strip():
+                continue
+            seen.add(key)
+            candidate = self.render(selected + [(chunk, metadata)])
+            tokens = self.count_tokens(candidate)
+            if tokens > self.max_tokens:
+                if selected:
+                    continue
+                # Even the best chunk is over budget: keep its beginning rather than send no context
+                candidate = candidate[:len(candidate) * self.max_tokens // tokens]
+                tokens = self.count_tokens(candidate)
+            selected.append((chunk, metadata))
+            context, context_tokens = candidate, tokens
+
+        stats = {
+            "retrieved_chunks": len(chunks),
+            "context_chunks": len(selected),
+            "retrieved_tokens": retrieved_tokens,
+            "context_tokens": context_tokens,
+            "tokens_saved": retrieved_tokens - context_tokens,
+        }
+        return context, [metadata for _, metadata in selected], stats
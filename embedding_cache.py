@@ -0,0 +1,295 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: nothing enforces a single writer, see EmbeddingCache
+    fcntl = None
+
+INDEX_FILE = "index.json"
+VECTORS_FILE = "vectors.f32"
+# Digest of the key each row holds, so a row reused after the index was last saved is never misread
+KEYS_FILE = "keys.bin"
+KEY_DIGEST_BYTES = 16
+LOCK_FILE = "writer.lock"
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so re-chunked or re-typed text maps to the same key."""
+    return " ".join(text.split())
+
+
+def cache_key(model: str, task_type: str, text: str) -> str:
+    payload = f"{model}\x00{task_type}\x00{normalize_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def key_digest(key: str) -> np.ndarray:
+    return np.frombuffer(hashlib.blake2b(key.encode("utf-8"), digest_size=KEY_DIGEST_BYTES).digest(), dtype=np.uint8)
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed embedding cache.
+
+    Vectors live in a memory-mapped float32 matrix (`vectors.f32`) and a small JSON
+    index (`index.json`) maps each key to its row. The index is kept in recency order,
+    so once `max_entries` rows are used the least recently used row is overwritten.
+    A small in-process LRU sits in front of the mmap for hot keys (repeated questions).
+
+    The index is only saved every `flush_every` puts, so after a crash it can point at
+    rows that were since reused for other keys. Each row also records a digest of its
+    key (`keys.bin`), checked on load and on every read from the mmap, so such rows
+    are dropped rather than returned for the wrong text.
+
+    One process writes a cache directory at a time: the first to open it holds an
+    exclusive lock on `writer.lock` until close(). Others (e.g. the API while
+    index_statutes.py runs) read what the writer has saved and keep their own new
+    embeddings in memory only.
+    """
+
+    def __init__(self, path: str = "./embedding_cache", dim: int = 768, max_entries: int = 200_000,
+                 lru_size: int = 4096, flush_every: int = 1024):
+        self.path = path
+        self.dim = dim
+        self.max_entries = max_entries
+        self.lru_size = lru_size
+        self.flush_every = flush_every
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._lru = OrderedDict()
+        self._rows = OrderedDict()  # key -> row, least recently used first
+        self._free_rows = []
+        self._next_row = 0
+        self._capacity = 0
+        self._vectors = None
+        self._keys = None
+        self._dirty = 0
+
+        os.makedirs(path, exist_ok=True)
+        self._lock_fd = None
+        self.writable = self._acquire_writer_lock()
+        if not self.writable:
+            print(f"⚠️ Another process is writing the embedding cache at {path}; this one only reads it")
+        self._load()
+        # The index is only rewritten every `flush_every` puts, so persist the tail on exit
+        atexit.register(self.flush)
+
+    # -------------------------------
+    # Lookup / insert
+    # -------------------------------
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+                if key in self._rows:  # not when only this reading process has it
+                    self._rows.move_to_end(key)
+                self.hits += 1
+                return vector
+
+            row = self._rows.get(key)
+            if row is None:
+                self.misses += 1
+                return None
+
+            # Checked on both sides of the copy: another process may be rewriting the row
+            digest = key_digest(key)
+            vector = np.array(self._vectors[row]) if self._row_holds(row, digest) else None
+            if vector is None or not self._row_holds(row, digest):
+                # Reused for another key since the index was saved; forget the stale entry
+                del self._rows[key]
+                self.misses += 1
+                return None
+
+            self._rows.move_to_end(key)
+            self._remember(key, vector)
+            self.hits += 1
+            return vector
+
+    def put(self, key: str, vector: Sequence[float]) -> None:
+        vector = np.asarray(vector, dtype=np.float32)
+        if vector.shape != (self.dim,):
+            raise ValueError(f"Expected a {self.dim}-d embedding, got shape {vector.shape}")
+
+        with self._lock:
+            self._remember(key, vector)
+            if not self.writable:
+                return
+            row = self._rows.get(key)
+            if row is None:
+                row = self._allocate_row()
+            self._rows[key] = row
+            self._rows.move_to_end(key)
+            # The row holds no key while its vector is replaced, so a reader never pairs the new
+            # vector with the old key
+            self._keys[row] = 0
+            self._vectors[row] = vector
+            self._keys[row] = key_digest(key)
+
+            self._dirty += 1
+            if self._dirty >= self.flush_every:
+                self._flush_locked()
+
+    def get_or_embed(self, model: str, task_type: str, texts: Sequence[str], embed_fn) -> List[List[float]]:
+        """Returns embeddings for `texts`, calling `embed_fn` only for the texts that miss."""
+        keys = [cache_key(model, task_type, text) for text in texts]
+        results = [self.get(key) for key in keys]
+
+        missing = [i for i, vector in enumerate(results) if vector is None]
+        if missing:
+            # Embed each distinct missing key once, even if it repeats within the batch
+            unique = OrderedDict((keys[i], texts[i]) for i in missing)
+            fresh = embed_fn(list(unique.values()))
+            fresh_by_key = dict(zip(unique.keys(), fresh))
+            for key, vector in fresh_by_key.items():
+                self.put(key, vector)
+            for i in missing:
+                results[i] = np.asarray(fresh_by_key[keys[i]], dtype=np.float32)
+
+        return [vector.tolist() for vector in results]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._rows),
+        }
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._dirty:
+                self._flush_locked()
+
+    def close(self) -> None:
+        self.flush()
+        atexit.unregister(self.flush)
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # releases the writer lock
+            self._lock_fd = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    # -------------------------------
+    # Storage internals
+    # -------------------------------
+    def _remember(self, key, vector):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def _acquire_writer_lock(self) -> bool:
+        if fcntl is None:
+            return True
+        self._lock_fd = os.open(os.path.join(self.path, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+            return False
+
+    def _row_holds(self, row: int, digest: np.ndarray) -> bool:
+        return np.array_equal(self._keys[row], digest)
+
+    def _allocate_row(self) -> int:
+        if len(self._rows) >= self.max_entries:
+            # Evict the least recently used entry and reuse its row
+            evicted_key, row = self._rows.popitem(last=False)
+            self._lru.pop(evicted_key, None)
+            return row
+
+        if self._free_rows:
+            return self._free_rows.pop()
+
+        if self._next_row >= self._capacity:
+            self._grow(max(self._next_row + 1, min(self.max_entries, self._capacity * 2)))
+        row = self._next_row
+        self._next_row += 1
+        return row
+
+    def _grow(self, capacity: int) -> None:
+        self._vectors = self._map(VECTORS_FILE, self._vectors, np.float32, self.dim, capacity)
+        self._keys = self._map(KEYS_FILE, self._keys, np.uint8, KEY_DIGEST_BYTES, capacity)
+        self._capacity = capacity
+
+    def _map(self, name, matrix, dtype, width, capacity):
+        """(Re)maps a per-row file at `capacity` rows, extending it first unless this process only reads."""
+        file_path = os.path.join(self.path, name)
+        if matrix is not None:
+            matrix.flush()
+        row_bytes = width * np.dtype(dtype).itemsize
+        if self.writable:
+            with open(file_path, "ab") as f:
+                if f.tell() < capacity * row_bytes:
+                    f.truncate(capacity * row_bytes)
+        elif not os.path.exists(file_path) or os.path.getsize(file_path) < capacity * row_bytes:
+            # A cache from before keys.bin existed: nothing can be verified, so nothing is read
+            return np.zeros((capacity, width), dtype=dtype)
+        return np.memmap(file_path, dtype=dtype, mode="r+" if self.writable else "r", shape=(capacity, width))
+
+    def _load(self) -> None:
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if not os.path.exists(index_path):
+            if self.writable:
+                self._grow(min(self.max_entries, 1024))
+            return
+
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index["dim"] != self.dim:
+            raise ValueError(f"Cache at {self.path} holds {index['dim']}-d vectors, expected {self.dim}")
+
+        self._grow(max(index["capacity"], 1))
+        for key, row in index["rows"]:
+            self._rows[key] = row
+
+        # Rows reused since the index was saved (a crash before the next flush) hold other keys
+        if self._rows:
+            rows = np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))
+            digests = np.stack([key_digest(key) for key in self._rows])
+            stale = ~(self._keys[rows] == digests).all(axis=1)
+            if stale.any():
+                print(f"⚠️ Dropping {int(stale.sum())} embedding cache entries whose rows no longer hold them")
+                for key in [key for key, is_stale in zip(list(self._rows), stale) if is_stale]:
+                    del self._rows[key]
+                self._dirty += 1
+
+        # If max_entries shrank, drop the least recently used rows and reuse them
+        while len(self._rows) > self.max_entries:
+            self._rows.popitem(last=False)
+        self._next_row = max(self._rows.values(), default=-1) + 1
+        used = set(self._rows.values())
+        self._free_rows = [row for row in range(self._next_row) if row not in used]
+
+    def _flush_locked(self) -> None:
+        if not self.writable:
+            return
+        self._vectors.flush()
+        self._keys.flush()
+        index = {
+            "dim": self.dim,
+            "capacity": self._capacity,
+            # Stored as a list so recency order survives the round trip
+            "rows": list(self._rows.items()),
+        }
+        index_path = os.path.join(self.path, INDEX_FILE)
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path)
+        self._dirty = 0
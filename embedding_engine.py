@@ -0,0 +1,281 @@
+import hashlib
+import math
+import random
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+from telemetry import estimate_tokens
+
+# Gemini's batchEmbedContents accepts at most 100 contents per request
+GEMINI_MAX_BATCH_SIZE = 100
+
+# Local CPU embedding (ProgressChecks.md's retriever model)
+DEFAULT_LOCAL_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# all-MiniLM-L6-v2 truncates inputs at 256 word pieces
+LOCAL_MAX_SEQ_TOKENS = 256
+# Padded tokens per forward pass: a batch of short questions can be large, a batch of full chunks is small
+LOCAL_BATCH_TOKENS = 8192
+# The whole input goes to the local backend at once so it can sort all of it by length
+LOCAL_MAX_BATCH_SIZE = 100_000
+# Below this many texts a multi-process pool costs more in pickling than it saves
+MIN_POOL_TEXTS = 1000
+
+# Key in a collection's metadata (and a flat index's meta.json) naming the backend that embedded it
+EMBEDDING_BACKEND_KEY = "embedding_backend"
+# Collections indexed before the backend was recorded were all embedded with Gemini
+LEGACY_EMBEDDING_BACKEND = "gemini:models/embedding-001"
+
+
+class EmbeddingBackendMismatch(ValueError):
+    """Query embeddings would come from a different model than the one the index was built with."""
+
+
+def recorded_embedding_backend(collection) -> Optional[str]:
+    """The backend a Chroma collection was embedded with, or None for stand-ins without metadata."""
+    if not hasattr(collection, "metadata"):
+        return None
+    return (collection.metadata or {}).get(EMBEDDING_BACKEND_KEY, LEGACY_EMBEDDING_BACKEND)
+
+
+def check_embedding_backend(recorded: Optional[str], embedding_function, where: str = "collection") -> None:
+    """Raises EmbeddingBackendMismatch unless `recorded` (None: not known) is embedding_function's backend."""
+    if recorded is not None and recorded != embedding_function.backend_id:
+        raise EmbeddingBackendMismatch(
+            f"The {where} was embedded with {recorded!r} but queries would use {embedding_function.backend_id!r}; "
+            f"set EMBEDDING_BACKEND to match it or re-index with the new backend")
+
+
+class EmbeddingBackend:
+    """Interface for anything that can embed a batch of texts in one request."""
+
+    name = "unknown"
+    model = "unknown"
+    max_batch_size = GEMINI_MAX_BATCH_SIZE
+
+    def embed_batch(self, texts: Sequence[str], task_type: str) -> List[List[float]]:
+        raise NotImplementedError
+
+    def is_retryable(self, error: Exception) -> bool:
+        """Whether the error is a rate limit / transient failure worth backing off on."""
+        return False
+
+
+class GeminiBackend(EmbeddingBackend):
+    """Embeds a batch of texts with a single multi-content genai.embed_content call."""
+
+    name = "gemini"
+
+    def __init__(self, model: str = "models/embedding-001"):
+        self.model = model
+
+    def embed_batch(self, texts: Sequence[str], task_type: str) -> List[List[float]]:
+        # Imported here so the engine can run offline against the fake backend
+        from google import generativeai as genai
+
+        response = genai.embed_content(
+            model=self.model,
+            content=list(texts),
+            task_type=task_type
+        )
+        return response["embedding"]
+
+    def is_retryable(self, error: Exception) -> bool:
+        # 429 ResourceExhausted plus the usual transient server errors
+        code = getattr(error, "code", None)
+        if code in (429, 500, 503, 504):
+            return True
+        return type(error).__name__ in ("ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded")
+
+
+class FakeEmbeddingBackend(EmbeddingBackend):
+    """
+    Deterministic local embedder for offline benchmarks and tests.
+
+    Each token is hashed into a bucket of a fixed-size vector (feature hashing), so
+    texts sharing words get similar vectors and the same text always gets the same
+    vector. `latency` simulates the round trip of one batch request.
+    """
+
+    name = "fake"
+    model = "fake/hashing-embedder"
+
+    def __init__(self, dim: int = 768, latency: float = 0.0, max_batch_size: int = GEMINI_MAX_BATCH_SIZE):
+        self.dim = dim
+        self.latency = latency
+        self.max_batch_size = max_batch_size
+        self.calls = 0
+
+    def embed_batch(self, texts: Sequence[str], task_type: str) -> List[List[float]]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self.embed_one(text) for text in texts]
+
+    def embed_one(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for token in re.findall(r"[0-9a-z:.\-]+", text.lower()):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """
+    Embeds on the local CPU with sentence-transformers, so no request leaves the process.
+
+    Texts are sorted by length and cut into batches of at most batch_tokens padded
+    tokens, so short questions share one forward pass and long chunks don't pad the
+    short ones. `threads` caps torch's intra-op threads (None: torch's default).
+    With processes > 1, inputs of MIN_POOL_TEXTS or more (bulk indexing) are spread
+    over that many worker processes instead; call close() to stop them.
+    """
+
+    name = "sentence-transformers"
+    max_batch_size = LOCAL_MAX_BATCH_SIZE
+
+    def __init__(self, model: str = DEFAULT_LOCAL_MODEL, threads: int = None, processes: int = 0,
+                 batch_tokens: int = LOCAL_BATCH_TOKENS, max_seq_tokens: int = LOCAL_MAX_SEQ_TOKENS):
+        self.model = model
+        self.threads = threads
+        self.processes = processes
+        self.batch_tokens = batch_tokens
+        self.max_seq_tokens = max_seq_tokens
+        self._encoder = None
+        self._pool = None
+        # One forward pass at a time: concurrent ones would just fight over the same threads
+        self._lock = threading.Lock()
+
+    @property
+    def encoder(self):
+        with self._lock:
+            if self._encoder is None:
+                # Imported here so the Gemini path never loads torch
+                import torch
+                from sentence_transformers import SentenceTransformer
+
+                if self.threads:
+                    torch.set_num_threads(self.threads)
+                self._encoder = SentenceTransformer(self.model, device="cpu")
+                self.max_seq_tokens = self._encoder.max_seq_length or self.max_seq_tokens
+            return self._encoder
+
+    def batches(self, texts: Sequence[str]) -> List[List[int]]:
+        """Indexes of `texts` in length order, grouped so each batch pads to at most batch_tokens."""
+        lengths = [min(estimate_tokens(text) + 2, self.max_seq_tokens) for text in texts]
+        batches = []
+        batch = []
+        for i in sorted(range(len(texts)), key=lengths.__getitem__):
+            # Sorted ascending, so the text being added is the longest in the batch
+            if batch and (len(batch) + 1) * lengths[i] > self.batch_tokens:
+                batches.append(batch)
+                batch = []
+            batch.append(i)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def embed_batch(self, texts: Sequence[str], task_type: str) -> List[List[float]]:
+        # Symmetric model: queries and documents are embedded the same way, so task_type is unused
+        texts = list(texts)
+        if self.processes > 1 and len(texts) >= MIN_POOL_TEXTS:
+            return self._embed_with_pool(texts)
+
+        encoder = self.encoder
+        embeddings = [None] * len(texts)
+        for batch in self.batches(texts):
+            with self._lock:
+                vectors = encoder.encode([texts[i] for i in batch], batch_size=len(batch),
+                                         normalize_embeddings=True, convert_to_numpy=True)
+            for i, vector in zip(batch, vectors):
+                embeddings[i] = vector.tolist()
+        return embeddings
+
+    def _embed_with_pool(self, texts: List[str]) -> List[List[float]]:
+        encoder = self.encoder
+        with self._lock:
+            if self._pool is None:
+                # Workers are spawned and read OMP_NUM_THREADS at import, so they split the
+                # cores instead of each starting a thread per core
+                threads = max((self.threads or os.cpu_count() or 1) // self.processes, 1)
+                previous = os.environ.get("OMP_NUM_THREADS")
+                os.environ["OMP_NUM_THREADS"] = str(threads)
+                try:
+                    self._pool = encoder.start_multi_process_pool(["cpu"] * self.processes)
+                finally:
+                    if previous is None:
+                        os.environ.pop("OMP_NUM_THREADS")
+                    else:
+                        os.environ["OMP_NUM_THREADS"] = previous
+            pool = self._pool
+
+        # Each worker sorts its share by length inside encode()
+        order = [i for batch in self.batches(texts) for i in batch]
+        vectors = encoder.encode_multi_process([texts[i] for i in order], pool, normalize_embeddings=True,
+                                               batch_size=max(self.batch_tokens // self.max_seq_tokens, 1))
+        embeddings = [None] * len(texts)
+        for i, vector in zip(order, vectors):
+            embeddings[i] = vector.tolist()
+        return embeddings
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                from sentence_transformers import SentenceTransformer
+                SentenceTransformer.stop_multi_process_pool(self._pool)
+                self._pool = None
+
+
+class BatchEmbeddingEngine:
+    """
+    Groups texts into multi-content requests and runs a bounded number of them
+    concurrently, retrying rate-limited batches with exponential backoff.
+    Output order always matches input order.
+    """
+
+    def __init__(self, backend: EmbeddingBackend = None, batch_size: int = None, max_workers: int = 4,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 30.0):
+        self.backend = backend or GeminiBackend()
+        self.batch_size = min(batch_size or self.backend.max_batch_size, self.backend.max_batch_size)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def embed(self, texts: Sequence[str], task_type: str = "retrieval_document") -> List[List[float]]:
+        texts = list(texts)
+        if not texts:
+            return []
+
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) == 1 or self.max_workers <= 1:
+            results = [self._embed_with_retry(batch, task_type) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as pool:
+                # map() yields in submission order, so batches come back in input order
+                results = list(pool.map(lambda batch: self._embed_with_retry(batch, task_type), batches))
+
+        return [embedding for batch in results for embedding in batch]
+
+    def _embed_with_retry(self, batch: List[str], task_type: str) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                embeddings = self.backend.embed_batch(batch, task_type)
+            except Exception as e:
+                if attempt >= self.max_retries or not self.backend.is_retryable(e):
+                    raise
+                # Full jitter so concurrent workers don't retry in lockstep
+                delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+                time.sleep(random.uniform(0, delay))
+                attempt += 1
+                continue
+
+            if len(embeddings) != len(batch):
+                raise ValueError(f"Backend returned {len(embeddings)} embeddings for {len(batch)} texts")
+            return embeddings
@@ -0,0 +1,321 @@
+import argparse
+import json
+import os
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from answer_cache import INDEX_VERSION_KEY, read_index_version
+from embedding_engine import EMBEDDING_BACKEND_KEY, recorded_embedding_backend
+from index_files import replacing_directory
+from retrievers import Retriever
+
+DEFAULT_INDEX_DIR = "./flat_index"
+PAGE_SIZE = 5000
+# "float32" searches the full vectors; "int8" / "binary" search compressed codes and re-score the best candidates
+QUANTIZATIONS = ("float32", "int8", "binary")
+# Candidates re-scored against the float vectors, as a multiple of n_results
+RESCORE_FACTORS = {"int8": 4, "binary": 16}
+# Rows decoded and scored per step in compressed mode: small enough to stay in cache,
+# and the full float matrix is never materialized
+BLOCK_ROWS = 1024
+
+# Set bits per byte, for numpy versions without np.bitwise_count
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row scalar quantization: vectors ~= codes * scales[:, None]."""
+    scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """One sign bit per dimension, packed 8 to a byte."""
+    return np.packbits(vectors > 0, axis=1)
+
+
+def popcount(values: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return _POPCOUNT[values]
+
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Column indexes and values of the k highest scores in each row, best first."""
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+class FlatIndex(Retriever):
+    """
+    Exact cosine search over every chunk vector, stored as:
+
+        vectors.npy       unit-normalized float32 embeddings (N x dim), opened with mmap
+        meta.json         dim, count, the distinct titles, the embedding backend and the
+                          Chroma index version it was exported from
+        ids.json          chunk ids, sections and headings as parallel columns
+        title_codes.npy   index into meta.json's titles per chunk (uint16)
+        chunk_ids.npy     chunk number within its section (int32)
+        texts.bin         UTF-8 chunk texts back to back, sliced via text_offsets.npy
+        int8_codes.npy    per-row int8 quantization of the vectors, with int8_scales.npy
+        binary_codes.npy  sign bits of the vectors, packed (N x dim/8)
+
+    Every process that opens the index shares one page-cached copy of the vectors,
+    and a query is a single matrix product plus argpartition, so a batch of
+    questions costs little more than one.
+
+    With quantization="int8" (4x smaller) or "binary" (32x smaller, compared by
+    Hamming distance) only the codes are scanned. The best n_results * rescore_factor
+    candidates are then re-scored against their float vectors, so returned scores
+    are exact and only those rows of vectors.npy are ever paged in.
+    """
+
+    def __init__(self, path: str, quantization: str = "float32", rescore_factor: int = None):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization {quantization!r}, expected one of {QUANTIZATIONS}")
+        self.path = path
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor or RESCORE_FACTORS.get(quantization, 1)
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(path, "ids.json"), "r", encoding="utf-8") as f:
+            columns = json.load(f)
+
+        self.dim = meta["dim"]
+        self.titles = meta["titles"]
+        self.embedding_backend = meta.get(EMBEDDING_BACKEND_KEY)
+        self.index_version = meta.get(INDEX_VERSION_KEY, "")
+        self.ids = columns["ids"]
+        self.sections = columns["sections"]
+        self.headings = columns["headings"]
+
+        load = lambda name: np.load(os.path.join(path, name), mmap_mode="r")
+        self.vectors = load("vectors.npy")
+        self.title_codes = load("title_codes.npy")
+        self.chunk_ids = load("chunk_ids.npy")
+        self.text_offsets = load("text_offsets.npy")
+        self._texts = np.memmap(os.path.join(path, "texts.bin"), dtype=np.uint8, mode="r") \
+            if self.text_offsets[-1] else np.zeros(0, dtype=np.uint8)
+
+        if quantization != "float32":
+            code_file = os.path.join(path, f"{quantization}_codes.npy")
+            if not os.path.exists(code_file):
+                raise FileNotFoundError(f"{code_file} is missing; run flat_index.py --quantize_only --output_dir {path}")
+            self.codes = load(f"{quantization}_codes.npy")
+            # Candidates are re-scored with pread rather than through the mmap: faulting in scattered
+            # rows maps whole neighbouring page-cache folios, which would pull most of vectors.npy into RSS
+            self._vectors_file = open(os.path.join(path, "vectors.npy"), "rb")
+            self.scales = load("int8_scales.npy") if quantization == "int8" else None
+
+    # -------------------------------
+    # Build
+    # -------------------------------
+    @staticmethod
+    def build(records: Iterable[Tuple[str, str, dict, Sequence[float]]], path: str,
+              embedding_backend: str = None, index_version: str = "") -> "FlatIndex":
+        """
+        Builds the index from (id, document, metadata, embedding) records, streaming vectors
+        to disk. embedding_backend names what embedded them, so mismatched queries are refused,
+        and index_version is the collection's (answer_cache.read_index_version), so an export
+        that predates a re-index is not searched.
+
+        The files are written to a new directory that then replaces `path`, so processes
+        serving the old index keep their mapped copy intact.
+        """
+        with replacing_directory(path) as build_dir:
+            FlatIndex._write(records, build_dir, embedding_backend, index_version)
+        return FlatIndex(path)
+
+    @staticmethod
+    def _write(records, path, embedding_backend, index_version):
+        ids, sections, headings, title_codes, chunk_ids = [], [], [], [], []
+        titles = {}
+        text_offsets = [0]
+        dim = None
+
+        raw_path = os.path.join(path, "vectors.f32.tmp")
+        with open(raw_path, "wb") as raw, open(os.path.join(path, "texts.bin"), "wb") as texts_file:
+            for chunk_id, document, metadata, embedding in records:
+                vector = np.asarray(embedding, dtype=np.float32)
+                if dim is None:
+                    dim = len(vector)
+                elif len(vector) != dim:
+                    raise ValueError(f"Embedding for {chunk_id} has {len(vector)} dimensions, expected {dim}")
+                raw.write(normalize_rows(vector[None, :]).tobytes())
+
+                ids.append(chunk_id)
+                sections.append(metadata["section"])
+                headings.append(metadata["heading"])
+                title_codes.append(titles.setdefault(metadata["title"], len(titles)))
+                chunk_ids.append(metadata.get("chunk_id", 0))
+                encoded = (document or "").encode("utf-8")
+                texts_file.write(encoded)
+                text_offsets.append(text_offsets[-1] + len(encoded))
+
+        # Now that the row count is known, copy the raw rows into a proper .npy
+        dim = dim or 0
+        vectors = np.lib.format.open_memmap(os.path.join(path, "vectors.npy"), mode="w+",
+                                            dtype=np.float32, shape=(len(ids), dim))
+        if len(ids) and dim:
+            vectors[:] = np.memmap(raw_path, dtype=np.float32, mode="r", shape=(len(ids), dim))
+        vectors.flush()
+        del vectors
+        os.remove(raw_path)
+        FlatIndex.write_quantized(path)
+
+        np.save(os.path.join(path, "title_codes.npy"), np.asarray(title_codes, dtype=np.uint16))
+        np.save(os.path.join(path, "chunk_ids.npy"), np.asarray(chunk_ids, dtype=np.int32))
+        np.save(os.path.join(path, "text_offsets.npy"), np.asarray(text_offsets, dtype=np.int64))
+        with open(os.path.join(path, "ids.json"), "w", encoding="utf-8") as f:
+            json.dump({"ids": ids, "sections": sections, "headings": headings}, f)
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"dim": dim, "count": len(ids), "titles": list(titles), EMBEDDING_BACKEND_KEY: embedding_backend,
+                       INDEX_VERSION_KEY: index_version}, f)
+
+    @staticmethod
+    def write_quantized(path: str, block_rows: int = BLOCK_ROWS):
+        """
+        Writes the int8 and binary codes for an index's vectors.npy, a block of rows at a
+        time. Each file is written under a temporary name and renamed into place, as the
+        index may be mapped by serving processes.
+        """
+        vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        count, dim = vectors.shape
+        names = ("int8_codes.npy", "binary_codes.npy", "int8_scales.npy")
+        tmp = {name: os.path.join(path, name + ".tmp") for name in names}
+        int8_codes = np.lib.format.open_memmap(tmp["int8_codes.npy"], mode="w+", dtype=np.int8, shape=(count, dim))
+        binary_codes = np.lib.format.open_memmap(tmp["binary_codes.npy"], mode="w+",
+                                                 dtype=np.uint8, shape=(count, (dim + 7) // 8))
+        scales = np.zeros(count, dtype=np.float32)
+        for start in range(0, count, block_rows):
+            block = np.asarray(vectors[start:start + block_rows])
+            int8_codes[start:start + len(block)], scales[start:start + len(block)] = quantize_int8(block)
+            binary_codes[start:start + len(block)] = quantize_binary(block)
+        int8_codes.flush()
+        binary_codes.flush()
+        del int8_codes, binary_codes
+        with open(tmp["int8_scales.npy"], "wb") as f:
+            np.save(f, scales)
+        for name in names:
+            os.replace(tmp[name], os.path.join(path, name))
+
+    @staticmethod
+    def from_collection(collection, path: str, page_size: int = PAGE_SIZE, index_version: str = "") -> "FlatIndex":
+        """Exports every chunk and its stored embedding from a Chroma collection."""
+        def records():
+            offset = 0
+            while True:
+                page = collection.get(include=["documents", "metadatas", "embeddings"], limit=page_size, offset=offset)
+                yield from zip(page["ids"], page["documents"], page["metadatas"], page["embeddings"])
+                if len(page["ids"]) < page_size:
+                    return
+                offset += page_size
+        return FlatIndex.build(records(), path, recorded_embedding_backend(collection), index_version)
+
+    # -------------------------------
+    # Query
+    # -------------------------------
+    def count(self):
+        return len(self.ids)
+
+    def text(self, row: int) -> str:
+        start, end = self.text_offsets[row], self.text_offsets[row + 1]
+        return bytes(self._texts[start:end]).decode("utf-8")
+
+    def metadata(self, row: int) -> dict:
+        return {"title": self.titles[self.title_codes[row]], "section": self.sections[row],
+                "heading": self.headings[row], "chunk_id": int(self.chunk_ids[row])}
+
+    def search(self, query_embeddings: Sequence[Sequence[float]], n_results: int = 3) -> List[List[Tuple[int, float]]]:
+        """(row, cosine similarity) pairs per query, best first."""
+        queries = normalize_rows(np.asarray(query_embeddings, dtype=np.float32).reshape(-1, self.dim))
+        n_results = min(n_results, self.count())
+        if n_results == 0:
+            return [[] for _ in range(len(queries))]
+
+        if self.quantization == "float32":
+            top, top_scores = top_k(queries @ self.vectors.T, n_results)
+            return [[(int(row), float(score)) for row, score in zip(rows, row_scores)]
+                    for rows, row_scores in zip(top, top_scores)]
+
+        n_candidates = min(n_results * self.rescore_factor, self.count())
+        candidates, _ = top_k(self._approximate_scores(queries), n_candidates)
+        results = []
+        for query, rows in zip(queries, candidates):
+            # Sorted rows read vectors.npy front to back
+            rows = np.sort(rows)
+            exact = self._read_rows(rows) @ query
+            best, best_scores = top_k(exact[None, :], n_results)
+            results.append([(int(rows[i]), float(score)) for i, score in zip(best[0], best_scores[0])])
+        return results
+
+    def _read_rows(self, rows: np.ndarray) -> np.ndarray:
+        if not hasattr(os, "pread"):
+            return np.asarray(self.vectors[rows])
+        row_bytes = self.dim * 4
+        fd = self._vectors_file.fileno()
+        data = b"".join(os.pread(fd, row_bytes, self.vectors.offset + int(row) * row_bytes) for row in rows)
+        return np.frombuffer(data, dtype=np.float32).reshape(len(rows), self.dim)
+
+    def _approximate_scores(self, queries: np.ndarray) -> np.ndarray:
+        """Scores of every row in the compressed space (higher is nearer), one block of codes at a time."""
+        scores = np.empty((len(queries), self.count()), dtype=np.float32)
+        if self.quantization == "binary":
+            query_bits = quantize_binary(queries)
+            # Hamming blocks expand to queries x rows x bytes, so keep them smaller
+            block_rows = max(BLOCK_ROWS // len(queries), 64)
+        else:
+            block_rows = BLOCK_ROWS
+
+        for start in range(0, self.count(), block_rows):
+            codes = np.asarray(self.codes[start:start + block_rows])
+            end = start + len(codes)
+            if self.quantization == "int8":
+                scores[:, start:end] = (queries @ codes.T.astype(np.float32)) * self.scales[start:end]
+            else:
+                distances = popcount(np.bitwise_xor(query_bits[:, None, :], codes[None, :, :])).sum(axis=2, dtype=np.int32)
+                scores[:, start:end] = -distances
+        return scores
+
+    def query(self, query_embeddings, n_results=3):
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for hits in self.search(query_embeddings, n_results):
+            results["ids"].append([self.ids[row] for row, _ in hits])
+            results["documents"].append([self.text(row) for row, _ in hits])
+            results["metadatas"].append([self.metadata(row) for row, _ in hits])
+            # Cosine distance, as Chroma reports for a cosine collection
+            results["distances"].append([1.0 - score for _, score in hits])
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a Chroma collection into a memory-mapped flat index.")
+    parser.add_argument("--chroma_path", default="./chroma_db", help="Chroma persistent directory")
+    parser.add_argument("--collection", default="nj_statutes_test_chunks", help="Collection name")
+    parser.add_argument("--output_dir", default=DEFAULT_INDEX_DIR, help="Directory to write the index to")
+    parser.add_argument("--quantize_only", action="store_true",
+                        help="Only (re)write the int8/binary codes of an existing index in --output_dir")
+    args = parser.parse_args()
+
+    if args.quantize_only:
+        FlatIndex.write_quantized(args.output_dir)
+        print(f"Wrote int8 and binary codes into {args.output_dir}")
+        return
+
+    import chromadb
+    collection = chromadb.PersistentClient(path=args.chroma_path).get_collection(args.collection)
+    index = FlatIndex.from_collection(collection, args.output_dir, index_version=read_index_version(args.chroma_path))
+    print(f"Exported {index.count()} chunks ({index.dim} dimensions) into {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
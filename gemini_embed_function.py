@@ -1,14 +1,27 @@
 from typing import List, Sequence
-from google import generativeai as genai
+from embedding_engine import BatchEmbeddingEngine, GeminiBackend
+
+
 class GeminiEmbeddingFunction:
+    def __init__(self, engine: BatchEmbeddingEngine = None, model: str = "models/embedding-001", cache=None):
+        # Batches texts into multi-content requests instead of one round trip per text
+        self.engine = engine or BatchEmbeddingEngine(GeminiBackend(model))
+        self.model = self.engine.backend.model
+        # Recorded on the collections this function indexes, and checked before it queries one
+        self.backend_id = f"{self.engine.backend.name}:{self.model}"
+        # Optional EmbeddingCache so identical text is never embedded twice
+        self.cache = cache
+
     def __call__(self, input: Sequence[str]) -> List[List[float]]:
         # Defaulting to retrieval_document task type for indexing
-        return [self.embed_text(text, task_type="retrieval_document") for text in input]
+        return self.embed_texts(input, task_type="retrieval_document")
+
+    def embed_texts(self, texts: Sequence[str], task_type="retrieval_document") -> List[List[float]]:
+        texts = list(texts)
+        if self.cache is None:
+            return self.engine.embed(texts, task_type=task_type)
+        return self.cache.get_or_embed(self.model, task_type, texts,
+                                       lambda missing: self.engine.embed(missing, task_type=task_type))
 
     def embed_text(self, text: str, task_type="retrieval_document") -> list[float]:
-        response = genai.embed_content(
-            model="models/embedding-001",
-            content=text,
-            task_type=task_type
-        )
-        return response["embedding"]
\ No newline at end of file
+        return self.embed_texts([text], task_type=task_type)[0]
@@ -0,0 +1,36 @@
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def replacing_directory(path: str):
+    """
+    Yields an empty sibling directory of `path` to build an index into, and once the
+    block finishes swaps it in for `path`. Files other processes have mmapped are never
+    truncated or rewritten under them: they keep reading the old, unlinked copy until
+    they reopen the index, and a process opening it mid-build still sees the old one
+    whole. If the block raises, `path` is left as it was.
+    """
+    path = os.path.abspath(path)
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    building = tempfile.mkdtemp(prefix=os.path.basename(path) + ".building-", dir=parent)
+    try:
+        yield building
+    except BaseException:
+        shutil.rmtree(building, ignore_errors=True)
+        raise
+
+    # mkdtemp makes the directory private to this user; serving workers may run as another
+    os.chmod(building, 0o755)
+    previous = None
+    if os.path.exists(path):
+        previous = f"{path}.old-{time.time_ns()}"
+        os.rename(path, previous)
+    os.rename(building, path)
+    if previous:
+        shutil.rmtree(previous, ignore_errors=True)
+
@@ -0,0 +1,21 @@
+from embedding_engine import BatchEmbeddingEngine, DEFAULT_LOCAL_MODEL, SentenceTransformerBackend
+from gemini_embed_function import GeminiEmbeddingFunction
+
+
+class LocalEmbeddingFunction(GeminiEmbeddingFunction):
+    """
+    GeminiEmbeddingFunction's interface over a local sentence-transformers model:
+    embedding a question is a CPU forward pass instead of a network round trip.
+    """
+
+    def __init__(self, model: str = DEFAULT_LOCAL_MODEL, threads: int = None, processes: int = 0,
+                 cache=None, engine: BatchEmbeddingEngine = None):
+        # The backend batches by length itself, so the engine hands it everything in one call
+        super().__init__(engine=engine or BatchEmbeddingEngine(
+            SentenceTransformerBackend(model, threads=threads, processes=processes), max_workers=1), cache=cache)
+
+    def close(self):
+        """Stops the multi-process pool, if bulk embedding started one."""
+        close = getattr(self.engine.backend, "close", None)
+        if close is not None:
+            close()
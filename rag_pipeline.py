@@ -1,30 +1,37 @@
-from chromadb import Client
-from google import generativeai as genai
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from gemini_embed_function import GeminiEmbeddingFunction
-
-# Configure the Gemini API with your API key
-# You should set this as an environment variable: export GOOGLE_API_KEY='your-api-key-here'
-GOOGLE_API_KEY = os.environ.get('GOOGLE_API_KEY')
-genai.configure(api_key=GOOGLE_API_KEY)
-
-import chromadb
-from chromadb.utils import embedding_functions
+from local_embed_function import LocalEmbeddingFunction
+from embedding_engine import DEFAULT_LOCAL_MODEL, check_embedding_backend
+from embedding_cache import EmbeddingCache
+from answer_cache import SemanticAnswerCache, read_index_version
+from streaming import TimedTokenStream, iter_response_text
+from bm25_retriever import BM25Index, DEFAULT_INDEX_DIR, reciprocal_rank_fusion
+from citation_index import CitationIndex, DEFAULT_INDEX_PATH as DEFAULT_CITATION_INDEX_PATH
+from flat_index import FlatIndex, DEFAULT_INDEX_DIR as DEFAULT_FLAT_INDEX_DIR
+from retrievers import ChromaRetriever
+from context_assembler import ContextAssembler, DEFAULT_CONTEXT_TOKENS
+from reranker import CrossEncoderReranker, RERANK_CANDIDATES
+import telemetry
 
 # Use the exact same initialization as in your notebook
-chroma_client = chromadb.PersistentClient(path="./chroma_db")
+CHROMA_PATH = "./chroma_db"
+COLLECTION_NAME = "nj_statutes_test_chunks"
+MODEL_NAME = "gemini-1.5-flash"
 
-# If using custom embedding function (e.g., Gemini), include it
-collection = chroma_client.get_collection(
-    name="nj_statutes_test_chunks",
-    embedding_function=GeminiEmbeddingFunction()
-)
+# Candidates pulled from each retriever before reciprocal rank fusion
+HYBRID_CANDIDATES = 20
+# BM25-only hits come back as whole sections; clip them to about one chunk
+MAX_SECTION_CHARS = 2000
+# Most chunks used when a question cites sections directly
+MAX_CITED_CHUNKS = 6
+# Concurrent generation requests in get_answers / answer_batch
+GENERATION_WORKERS = 4
+# "gemini" embeds over the network; "local" runs sentence-transformers on the CPU
+EMBEDDING_BACKENDS = ("gemini", "local")
 
-def get_statute_context(question, n_results=3):
-    results = collection.query(query_texts=[question], n_results=n_results)
-    context_chunks = results['documents'][0]
-    metadatas = results['metadatas'][0]
-    return context_chunks, metadatas
 
 def build_prompt(context, question):
     return f"""
@@ -41,19 +48,510 @@ Instructions:
 - If the answer is not found, say so.
 """
 
+
+class RagPipeline:
+    """
+    The RAG request path: embed the question, retrieve statute chunks from Chroma,
+    and answer with Gemini.
+
+    Nothing is opened at construction time. The Chroma client, collection,
+    embedding function and generative model are each built on first use (or by
+    warm_up()), exactly once even under concurrent requests, and then reused.
+    Any of them can be passed in instead, e.g. fakes in tests.
+    """
+
+    def __init__(self, chroma_path=CHROMA_PATH, collection_name=COLLECTION_NAME, model_name=MODEL_NAME,
+                 chroma_client=None, collection=None, embedding_function=None, model=None, answer_cache=None,
+                 bm25_index=None, bm25_index_path=None, citation_index=None, citation_index_path=None,
+                 retriever=None, flat_index_path=None, context_assembler=None, embedding_backend=None,
+                 reranker=None, rerank_candidates=None):
+        self.chroma_path = chroma_path
+        self.collection_name = collection_name
+        self.model_name = model_name
+        self.embedding_backend = embedding_backend or os.environ.get("EMBEDDING_BACKEND", "gemini")
+        if self.embedding_backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend {self.embedding_backend!r}, expected one of {EMBEDDING_BACKENDS}")
+
+        self._lock = threading.RLock()
+        self._genai_configured = False
+        # attr -> _index_state() a handle built by _get_or_reload was built against
+        self._index_states = {}
+        self._chroma_client = chroma_client
+        self._collection = collection
+        self._embedding_function = embedding_function
+        self._model = model
+        # Vector search goes to a FlatIndex when one has been exported (see flat_index.py) since the
+        # last indexing run, else Chroma
+        self.flat_index_path = flat_index_path or os.environ.get("FLAT_INDEX_DIR", DEFAULT_FLAT_INDEX_DIR)
+        self._retriever = retriever
+        # Hybrid retrieval is on whenever a BM25 index has been built (see bm25_retriever.py) since the
+        # last indexing run
+        self.bm25_index_path = bm25_index_path or os.environ.get("BM25_INDEX_DIR", DEFAULT_INDEX_DIR)
+        self._bm25_index = bm25_index
+        # Questions that name a section ("N.J.S.A. 2C:35-5") are answered straight from this index
+        self.citation_index_path = citation_index_path or os.environ.get("CITATION_INDEX_PATH", DEFAULT_CITATION_INDEX_PATH)
+        self._citation_index = citation_index
+
+        # Optional cross-encoder pass over a wider candidate pool (set RERANK_MODEL to turn it on)
+        if reranker is None and os.environ.get("RERANK_MODEL"):
+            threads = os.environ.get("RERANK_THREADS")
+            reranker = CrossEncoderReranker(os.environ["RERANK_MODEL"], threads=int(threads) if threads else None)
+        self.reranker = reranker
+        self.rerank_candidates = rerank_candidates or int(os.environ.get("RERANK_CANDIDATES", RERANK_CANDIDATES))
+
+        # Bounds the prompt: merges and dedupes the retrieved chunks, then fills a token budget
+        self.context_assembler = context_assembler or ContextAssembler(
+            max_tokens=int(os.environ.get("CONTEXT_TOKEN_BUDGET", DEFAULT_CONTEXT_TOKENS)))
+
+        # Reuses answers for paraphrased questions that retrieve the same sections
+        self.answer_cache = answer_cache or SemanticAnswerCache(
+            threshold=float(os.environ.get("ANSWER_CACHE_THRESHOLD", 0.95)),
+            ttl_seconds=float(os.environ.get("ANSWER_CACHE_TTL", 24 * 3600)),
+            max_entries=int(os.environ.get("ANSWER_CACHE_SIZE", 1000))
+        )
+
+    # -------------------------------
+    # Lazily built, shared handles
+    # -------------------------------
+    def _get_or_build(self, attr, build):
+        value = getattr(self, attr)
+        if value is None:
+            with self._lock:
+                # Another thread may have built it while we waited for the lock
+                value = getattr(self, attr)
+                if value is None:
+                    value = build()
+                    setattr(self, attr, value)
+        return value
+
+    def _index_state(self, marker):
+        """The collection's index version and which write of the file at `marker` is on disk (None: missing)."""
+        try:
+            stat = os.stat(marker)
+            # Rebuilds swap in a new file, so its inode tells them apart even where mtimes are coarse
+            written = stat.st_ino, stat.st_mtime_ns
+        except FileNotFoundError:
+            written = None
+        return read_index_version(self.chroma_path), written
+
+    def _get_or_reload(self, attr, build, marker):
+        """
+        _get_or_build for handles derived from the collection (flat index, BM25 index):
+        built again whenever the collection is re-indexed or the index is rewritten (its
+        `marker` file changes), so long-running workers follow both without a restart.
+        Handles passed in to the constructor are kept as they are.
+        """
+        value = getattr(self, attr)
+        if value is not None and attr not in self._index_states:
+            return value
+        state = self._index_state(marker)
+        if value is not None and self._index_states[attr] == state:
+            return value
+        with self._lock:
+            if getattr(self, attr) is None or self._index_states.get(attr) != state:
+                setattr(self, attr, build())
+                self._index_states[attr] = state
+            return getattr(self, attr)
+
+    def _configure_genai(self):
+        with self._lock:
+            if not self._genai_configured:
+                from google import generativeai as genai
+
+                # You should set this as an environment variable: export GOOGLE_API_KEY='your-api-key-here'
+                genai.configure(api_key=os.environ.get('GOOGLE_API_KEY'))
+                self._genai_configured = True
+
+    @property
+    def chroma_client(self):
+        def build():
+            import chromadb
+            return chromadb.PersistentClient(path=self.chroma_path)
+        return self._get_or_build("_chroma_client", build)
+
+    @property
+    def embedding_function(self):
+        def build():
+            if self.embedding_backend == "local":
+                # No cache: it exists to save round trips, and a forward pass on a question takes milliseconds
+                threads = os.environ.get("EMBEDDING_THREADS")
+                return LocalEmbeddingFunction(model=os.environ.get("LOCAL_EMBEDDING_MODEL", DEFAULT_LOCAL_MODEL),
+                                              threads=int(threads) if threads else None)
+            self._configure_genai()
+            # Shared on-disk cache so repeated questions skip the embedding round trip
+            cache = EmbeddingCache(os.environ.get("EMBEDDING_CACHE_DIR", "./embedding_cache"))
+            return GeminiEmbeddingFunction(cache=cache)
+        return self._get_or_build("_embedding_function", build)
+
+    @property
+    def collection(self):
+        def build():
+            return self.chroma_client.get_collection(
+                name=self.collection_name,
+                embedding_function=self.embedding_function
+            )
+        return self._get_or_build("_collection", build)
+
+    def _is_current(self, index, name):
+        """Whether an index derived from the collection was built for its current version."""
+        version = read_index_version(self.chroma_path)
+        if index.index_version == version:
+            return True
+        print(f"⚠️ The {name} in {index.path} predates the last indexing run of {self.chroma_path}; "
+              f"ignoring it until it is rebuilt")
+        return False
+
+    @property
+    def retriever(self):
+        def build():
+            retriever = None
+            if os.path.exists(os.path.join(self.flat_index_path, "meta.json")):
+                flat_index = FlatIndex(self.flat_index_path,
+                                       quantization=os.environ.get("FLAT_INDEX_QUANTIZATION", "float32"))
+                if self._is_current(flat_index, "flat index"):
+                    retriever = flat_index
+            if retriever is None:
+                retriever = ChromaRetriever(self.collection)
+            # Vectors from another model would still come back, just as meaningless neighbours
+            check_embedding_backend(retriever.embedding_backend, self.embedding_function,
+                                    "flat index" if isinstance(retriever, FlatIndex) else "collection")
+            return retriever
+
+        # Chroma sees a re-index as it happens; the flat index is dropped once it is out of date
+        # and picked up again once it is re-exported
+        return self._get_or_reload("_retriever", build, os.path.join(self.flat_index_path, "meta.json"))
+
+    @property
+    def model(self):
+        def build():
+            self._configure_genai()
+            from google import generativeai as genai
+            return genai.GenerativeModel(self.model_name)
+        return self._get_or_build("_model", build)
+
+    @property
+    def bm25_index(self):
+        def build():
+            if not os.path.exists(os.path.join(self.bm25_index_path, "meta.json")):
+                return False
+            bm25_index = BM25Index(self.bm25_index_path)
+            # Stale keyword hits would bring back removed or changed sections' old text
+            return bm25_index if self._is_current(bm25_index, "BM25 index") else False
+        # False marks "no usable index on disk" until the collection or the index changes
+        return self._get_or_reload("_bm25_index", build, os.path.join(self.bm25_index_path, "meta.json")) or None
+
+    @property
+    def citation_index(self):
+        def build():
+            if not os.path.exists(self.citation_index_path):
+                return False
+            citation_index = CitationIndex.load(self.citation_index_path)
+            # A cited section would be answered from its removed or changed text
+            return citation_index if self._is_current(citation_index, "citation index") else False
+        # Rebuilt by every indexing run (publish_index), so followed like the other derived indexes
+        return self._get_or_reload("_citation_index", build, self.citation_index_path) or None
+
+    def warm_up(self):
+        """Builds every handle up front, e.g. at worker startup, so the first request doesn't pay for it."""
+        self.model
+        # count() makes Chroma load the collection's index from disk (a FlatIndex is already mapped)
+        self.retriever.count()
+        self.bm25_index
+        self.citation_index
+        if self.reranker is not None:
+            self.reranker.scorer
+        return self
+
+    # -------------------------------
+    # Request path
+    # -------------------------------
+    def embed_question(self, question):
+        with telemetry.span("embed"):
+            return self.embedding_function([question])[0]
+
+    def get_statute_context(self, question, n_results=3, query_embedding=None):
+        # Same embedding Chroma would compute for query_texts, but served from the cache when possible
+        if query_embedding is None:
+            query_embedding = self.embed_question(question)
+        return self.get_statute_contexts([question], n_results=n_results, query_embeddings=[query_embedding])[0]
+
+    def get_statute_contexts(self, questions, n_results=3, query_embeddings=None):
+        """
+        get_statute_context for many questions: one embedding call and one multi-query search.
+        With a reranker, rerank_candidates chunks are retrieved per question and the
+        cross-encoder keeps the best n_results, all questions scored in one batch.
+        """
+        if query_embeddings is None:
+            with telemetry.span("embed", questions=len(questions)):
+                query_embeddings = self.embedding_function(list(questions))
+
+        reranker = self.reranker
+        pool_size = max(n_results, self.rerank_candidates) if reranker else n_results
+        bm25_index = self.bm25_index
+        n_candidates = max(pool_size, HYBRID_CANDIDATES) if bm25_index else pool_size
+        with telemetry.span("retrieve", questions=len(questions), n_results=n_candidates):
+            results = self.retriever.query(list(query_embeddings), n_results=n_candidates)
+
+        contexts = []
+        for question, context_chunks, metadatas in zip(questions, results['documents'], results['metadatas']):
+            if bm25_index is not None:
+                with telemetry.span("bm25_fusion"):
+                    context_chunks, metadatas = self._fuse_with_bm25(
+                        bm25_index, question, context_chunks, metadatas, pool_size)
+            contexts.append((context_chunks, metadatas))
+
+        if reranker is not None:
+            with telemetry.span("rerank", questions=len(questions), candidates=pool_size):
+                reranker.check_version(read_index_version(self.chroma_path))
+                contexts = reranker.rerank_batch(list(questions), contexts, n_results)
+        return contexts
+
+    def _fuse_with_bm25(self, bm25_index, question, chunks, metadatas, n_results):
+        # Fuse per section: a section's vector rank is the rank of its best chunk
+        vector_hits = {}
+        for chunk, meta in zip(chunks, metadatas):
+            vector_hits.setdefault(meta['section'], (chunk, meta))
+        bm25_hits = {bm25_index.docs[i]['section']: i
+                     for i, _ in bm25_index.search(question, max(n_results, HYBRID_CANDIDATES))}
+
+        fused = reciprocal_rank_fusion([list(vector_hits), list(bm25_hits)])[:n_results]
+
+        fused_chunks, fused_metadatas = [], []
+        for section, _ in fused:
+            if section in vector_hits:
+                chunk, meta = vector_hits[section]
+            else:
+                doc_index = bm25_hits[section]
+                doc = bm25_index.docs[doc_index]
+                chunk = bm25_index.text(doc_index)[:MAX_SECTION_CHARS]
+                meta = {"title": doc["title"], "section": section, "heading": doc["heading"], "chunk_id": 0}
+            fused_chunks.append(chunk)
+            fused_metadatas.append(meta)
+        return fused_chunks, fused_metadatas
+
+    def generate_response(self, prompt):
+        with telemetry.span("generate") as current:
+            response = self.model.generate_content(prompt)
+            telemetry.record_tokens(prompt, response.text, getattr(response, "usage_metadata", None), current)
+        return response.text
+
+    def generate_response_stream(self, prompt):
+        # Same model as generate_response, but yields text as it arrives
+        start = time.perf_counter()
+        response = self.model.generate_content(prompt, stream=True)
+        parts = []
+        for text in iter_response_text(response):
+            parts.append(text)
+            yield text
+        # Not a span: the time between tokens is spent in the caller
+        telemetry.METRICS.observe("generate_stream", time.perf_counter() - start)
+        telemetry.record_tokens(prompt, "".join(parts), getattr(response, "usage_metadata", None))
+
+    def get_cited_context(self, question):
+        """Chunks of the sections cited in `question`, or None if it cites none we have indexed."""
+        citation_index = self.citation_index
+        if citation_index is None:
+            return None
+        with telemetry.span("citation_lookup"):
+            sections = citation_index.match(question)
+        if not sections:
+            return None
+
+        chunks, metadatas = [], []
+        for section in sections:
+            for _, document, metadata in citation_index.lookup(section):
+                chunks.append(document)
+                metadatas.append(metadata)
+        return chunks[:MAX_CITED_CHUNKS], metadatas[:MAX_CITED_CHUNKS]
+
+    def _retrieve(self, question):
+        """Returns (chunks, metadatas, query_embedding); the embedding is None on the citation fast path."""
+        cited = self.get_cited_context(question)
+        if cited is not None:
+            return cited[0], cited[1], None
+
+        query_embedding = self.embed_question(question)
+        chunks, metadatas = self.get_statute_context(question, query_embedding=query_embedding)
+        return chunks, metadatas, query_embedding
+
+    def build_context_prompt(self, question, chunks, metadatas):
+        """(prompt, metadatas of the chunks in it, context stats) for the retrieved chunks."""
+        with telemetry.span("build_prompt") as current:
+            context, used_metadatas, stats = self.context_assembler.assemble(chunks, metadatas)
+            telemetry.record_context(stats, current)
+            return build_prompt(context, question), used_metadatas, stats
+
+    def _cached_answer(self, query_embedding, section_ids):
+        if query_embedding is None:
+            return None
+        with telemetry.span("answer_cache"):
+            self.answer_cache.check_version(read_index_version(self.chroma_path))
+            return self.answer_cache.lookup(query_embedding, section_ids)
+
+    def _store_answer(self, query_embedding, section_ids, answer, metadatas):
+        if query_embedding is not None:
+            self.answer_cache.store(query_embedding, section_ids, answer, metadatas)
+
+    def get_answer(self, question):
+        with telemetry.span("get_answer"):
+            chunks, metadatas, query_embedding = self._retrieve(question)
+
+            # Skip generation if a near-identical question already got an answer from the same sections
+            section_ids = [meta['section'] for meta in metadatas]
+            cached = self._cached_answer(query_embedding, section_ids)
+            if cached is not None:
+                return cached
+
+            prompt, metadatas, _ = self.build_context_prompt(question, chunks, metadatas)
+            answer = self.generate_response(prompt)
+            self._store_answer(query_embedding, section_ids, answer, metadatas)
+            return answer, metadatas
+
+    def get_answers(self, questions, max_workers=GENERATION_WORKERS):
+        """get_answer for a list of questions, in order. Raises the first failed question's error."""
+        answers = [None] * len(questions)
+        for i, outcome, _ in self.answer_batch(questions, max_workers=max_workers):
+            if isinstance(outcome, Exception):
+                raise outcome
+            answers[i] = outcome
+        return answers
+
+    def answer_batch(self, questions, max_workers=GENERATION_WORKERS):
+        """
+        Batched get_answer. Questions that cite a section take the citation fast path;
+        the rest are embedded in one call and searched with one multi-query retriever
+        call, then generated with at most max_workers requests in flight.
+
+        Yields (index, outcome, timings) as each question finishes, where outcome is
+        (answer, metadatas) or the exception its generation raised. The timings hold
+        seconds per stage; embed and retrieve are batch time split evenly, and total is
+        the question's own work (those stages plus answering it), without the time it
+        waited for other questions. Generated answers also report context_tokens and
+        tokens_saved by the context assembler.
+        """
+        questions = list(questions)
+        retrieved = [None] * len(questions)
+        query_embeddings = [None] * len(questions)
+        timings = [{} for _ in questions]
+
+        to_search = []
+        for i, question in enumerate(questions):
+            start = time.perf_counter()
+            retrieved[i] = self.get_cited_context(question)
+            timings[i]["citation_lookup"] = time.perf_counter() - start
+            if retrieved[i] is None:
+                to_search.append(i)
+
+        if to_search:
+            start = time.perf_counter()
+            with telemetry.span("embed", questions=len(to_search)):
+                embeddings = self.embedding_function([questions[i] for i in to_search])
+            embed_time = (time.perf_counter() - start) / len(to_search)
+
+            start = time.perf_counter()
+            contexts = self.get_statute_contexts([questions[i] for i in to_search], query_embeddings=embeddings)
+            retrieve_time = (time.perf_counter() - start) / len(to_search)
+
+            for i, embedding, context in zip(to_search, embeddings, contexts):
+                query_embeddings[i] = embedding
+                retrieved[i] = context
+                timings[i].update(embed=embed_time, retrieve=retrieve_time)
+
+        def answer(i):
+            chunks, metadatas = retrieved[i]
+            section_ids = [meta['section'] for meta in metadatas]
+            start = time.perf_counter()
+            retrieval_time = sum(timings[i].get(stage, 0.0) for stage in ("citation_lookup", "embed", "retrieve"))
+            cached = self._cached_answer(query_embeddings[i], section_ids)
+            timings[i]["cached"] = cached is not None
+            if cached is not None:
+                timings[i]["total"] = retrieval_time + time.perf_counter() - start
+                return cached
+            prompt, metadatas, stats = self.build_context_prompt(questions[i], chunks, metadatas)
+            timings[i].update(context_tokens=stats["context_tokens"], tokens_saved=stats["tokens_saved"])
+            answer = self.generate_response(prompt)
+            timings[i]["generate"] = time.perf_counter() - start
+            timings[i]["total"] = retrieval_time + timings[i]["generate"]
+            self._store_answer(query_embeddings[i], section_ids, answer, metadatas)
+            return answer, metadatas
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(answer, i): i for i in range(len(questions))}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    outcome = e
+                yield i, outcome, timings[i]
+
+    def stream_answer(self, question):
+        """
+        Streaming version of get_answer. Yields ("sources", metadatas) right after
+        retrieval, then ("token", text) for each piece of the answer as it arrives,
+        then ("done", stats) with time_to_first_token / total_time in seconds and,
+        when the answer was generated, the context assembler's token stats.
+        """
+        started_at = time.perf_counter()
+        chunks, metadatas, query_embedding = self._retrieve(question)
+        section_ids = [meta['section'] for meta in metadatas]
+        # Assembled up front so the sources shown are the chunks the answer is based on
+        prompt, metadatas, context_stats = self.build_context_prompt(question, chunks, metadatas)
+        yield "sources", metadatas
+
+        cached = self._cached_answer(query_embedding, section_ids)
+        if cached is not None:
+            tokens = TimedTokenStream([cached[0]], started_at=started_at)
+        else:
+            tokens = TimedTokenStream(self.generate_response_stream(prompt), started_at=started_at)
+
+        answer_parts = []
+        for token in tokens:
+            answer_parts.append(token)
+            yield "token", token
+
+        if cached is None:
+            self._store_answer(query_embedding, section_ids, "".join(answer_parts), metadatas)
+        stats = tokens.stats()
+        if stats["time_to_first_token"] is not None:
+            telemetry.METRICS.observe("time_to_first_token", stats["time_to_first_token"])
+        telemetry.METRICS.observe("stream_answer", time.perf_counter() - started_at)
+        if cached is None:
+            stats.update(context_tokens=context_stats["context_tokens"], tokens_saved=context_stats["tokens_saved"])
+        yield "done", {**stats, "cached": cached is not None}
+
+
+# -------------------------------
+# Process-wide default pipeline used by app.py and api.py
+# -------------------------------
+_default_pipeline = None
+_default_pipeline_lock = threading.Lock()
+
+
+def get_pipeline():
+    global _default_pipeline
+    if _default_pipeline is None:
+        with _default_pipeline_lock:
+            if _default_pipeline is None:
+                _default_pipeline = RagPipeline()
+    return _default_pipeline
+
+
+def get_statute_context(question, n_results=3, query_embedding=None):
+    return get_pipeline().get_statute_context(question, n_results=n_results, query_embedding=query_embedding)
+
+
 def generate_gemini_response(prompt):
-    # Create a GenerativeModel using the Gemini 1.5 Flash model
-    model = genai.GenerativeModel('gemini-1.5-flash')
-    
-    # Generate content with the prompt
-    response = model.generate_content(prompt)
-    
-    # Return the text response
-    return response.text
+    return get_pipeline().generate_response(prompt)
+
 
 def get_answer(question):
-    chunks, metadatas = get_statute_context(question)
-    context = "\n\n".join(chunks)
-    prompt = build_prompt(context, question)
-    answer = generate_gemini_response(prompt)
-    return answer, metadatas
\ No newline at end of file
+    return get_pipeline().get_answer(question)
+
+
+def get_answers(questions):
+    return get_pipeline().get_answers(questions)
+
+
+def stream_answer(question):
+    return get_pipeline().stream_answer(question)
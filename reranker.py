@@ -0,0 +1,143 @@
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from typing import List, Sequence, Tuple
+
+from bm25_retriever import tokenize
+from embedding_cache import normalize_text
+from utils.statute_documents import content_hash
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+# Candidates pulled from retrieval for the cross-encoder to choose the prompt's chunks from
+RERANK_CANDIDATES = 20
+# (question, chunk text) scores kept; a repeated question re-scores nothing
+SCORE_CACHE_SIZE = 20_000
+
+
+def question_hash(question: str) -> str:
+    return hashlib.sha256(normalize_text(question).lower().encode("utf-8")).hexdigest()
+
+
+def chunk_key(text: str, metadata: dict) -> str:
+    """
+    The chunk's content hash. Not its id: a BM25-only hit carries a stand-in chunk_id 0
+    with the whole section's text, which must not share scores with the real chunk 0.
+    """
+    return metadata.get("content_hash") or content_hash(text)
+
+
+class OverlapScorer:
+    """
+    Deterministic offline stand-in for a cross-encoder, for benchmarks and tests: a
+    pair scores by how many distinct question terms the chunk contains, with chunk
+    length as the tie-break (shorter wins). Has CrossEncoder.predict's signature.
+    """
+
+    model = "fake/term-overlap"
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, pairs: Sequence[Tuple[str, str]], batch_size: int = 32) -> List[float]:
+        self.calls += 1
+        scores = []
+        for question, text in pairs:
+            terms = tokenize(text)
+            overlap = len(set(tokenize(question)) & set(terms))
+            scores.append(overlap + 1 / (2 + math.log1p(len(terms))))
+        return scores
+
+
+class CrossEncoderReranker:
+    """
+    Re-orders retrieved chunks by a local CPU cross-encoder's (question, chunk) score
+    and keeps the best k, so more candidates can be retrieved without a bigger prompt.
+
+    The candidates a question hasn't been scored against yet go through the model in a
+    single predict() call. Scores are cached by (question hash, chunk content hash) in
+    an LRU of max_entries, which is cleared when the index version changes, as in
+    SemanticAnswerCache.
+    """
+
+    def __init__(self, model: str = DEFAULT_RERANK_MODEL, threads: int = None, max_entries: int = SCORE_CACHE_SIZE,
+                 scorer=None):
+        self.model = model
+        self.threads = threads
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._scorer = scorer
+        self._lock = threading.Lock()
+        self._scorer_lock = threading.Lock()
+        self._scores = OrderedDict()  # (question hash, chunk content hash) -> score, least recently used first
+        self._index_version = None
+
+    @property
+    def scorer(self):
+        with self._scorer_lock:
+            if self._scorer is None:
+                # Imported here so the app only loads torch when re-ranking is turned on
+                import torch
+                from sentence_transformers import CrossEncoder
+
+                if self.threads:
+                    torch.set_num_threads(self.threads)
+                self._scorer = CrossEncoder(self.model, device="cpu")
+            return self._scorer
+
+    def check_version(self, index_version: str) -> None:
+        """Drops every cached score if the collection was re-indexed since they were computed."""
+        with self._lock:
+            if self._index_version is not None and index_version != self._index_version:
+                self._scores.clear()
+            self._index_version = index_version
+
+    def scores(self, questions: Sequence[str], candidates: Sequence[Sequence[Tuple[str, dict]]]) -> List[List[float]]:
+        """Score of each (chunk, metadata) candidate against its question, scoring every miss in one batch."""
+        keys = [[(question_hash(question), chunk_key(text, metadata)) for text, metadata in chunks]
+                for question, chunks in zip(questions, candidates)]
+        results = [[None] * len(chunks) for chunks in candidates]
+        missing = []
+        with self._lock:
+            for q, row in enumerate(keys):
+                for c, key in enumerate(row):
+                    score = self._scores.get(key)
+                    if score is None:
+                        missing.append((q, c))
+                    else:
+                        self._scores.move_to_end(key)
+                        results[q][c] = score
+            self.hits += sum(len(row) for row in keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            pairs = [(questions[q], candidates[q][c][0]) for q, c in missing]
+            predicted = self.scorer.predict(pairs, batch_size=len(pairs))
+            with self._lock:
+                for (q, c), score in zip(missing, predicted):
+                    results[q][c] = float(score)
+                    self._scores[keys[q][c]] = float(score)
+                while len(self._scores) > self.max_entries:
+                    self._scores.popitem(last=False)
+        return results
+
+    def rerank_batch(self, questions: Sequence[str], contexts: Sequence[Tuple[List[str], List[dict]]],
+                     k: int) -> List[Tuple[List[str], List[dict]]]:
+        """The best k (chunks, metadatas) of each question's candidates, best first."""
+        candidates = [list(zip(chunks, metadatas)) for chunks, metadatas in contexts]
+        reranked = []
+        for chunks, scores in zip(candidates, self.scores(questions, candidates)):
+            # Stable sort: ties keep their retrieval order
+            best = [chunks[i] for i in sorted(range(len(chunks)), key=lambda i: -scores[i])[:k]]
+            reranked.append(([chunk for chunk, _ in best], [metadata for _, metadata in best]))
+        return reranked
+
+    def rerank(self, question: str, chunks: List[str], metadatas: List[dict], k: int) -> Tuple[List[str], List[dict]]:
+        return self.rerank_batch([question], [(chunks, metadatas)], k)[0]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._scores)}
@@ -0,0 +1,38 @@
+from typing import Dict, List, Sequence
+
+from embedding_engine import recorded_embedding_backend
+
+
+class Retriever:
+    """
+    What get_statute_context needs from a vector store: nearest chunks for
+    precomputed query embeddings, in the shape Chroma's collection.query returns:
+
+        {"ids": [[...]], "documents": [[...]], "metadatas": [[...]], "distances": [[...]]}
+
+    with one inner list per query embedding, nearest first.
+    """
+
+    # Backend id the stored vectors were embedded with (see embedding_engine), None if unknown
+    embedding_backend = None
+
+    def query(self, query_embeddings: Sequence[Sequence[float]], n_results: int = 3) -> Dict[str, List[list]]:
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+
+class ChromaRetriever(Retriever):
+    """The Chroma collection behind the Retriever interface."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.embedding_backend = recorded_embedding_backend(collection)
+
+    def query(self, query_embeddings, n_results=3):
+        return self.collection.query(query_embeddings=query_embeddings, n_results=n_results)
+
+    def count(self):
+        # Also makes Chroma load the collection's index from disk
+        return self.collection.count()
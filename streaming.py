@@ -0,0 +1,65 @@
+import time
+from typing import Iterable, Iterator, Optional
+
+
+def iter_response_text(response: Iterable) -> Iterator[str]:
+    """Yields the text of each chunk of a streamed generate_content response."""
+    for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks without text parts (e.g. a trailing safety/finish chunk) raise on .text
+            continue
+        if text:
+            yield text
+
+
+class TimedTokenStream:
+    """
+    Wraps a token iterator and records time-to-first-token and total time.
+
+    `started_at` should be taken when the request arrives (before retrieval), so
+    the reported time-to-first-token is what the user actually waits.
+    """
+
+    def __init__(self, tokens: Iterable[str], started_at: Optional[float] = None):
+        self._tokens = iter(tokens)
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+        self.token_count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        try:
+            token = next(self._tokens)
+        except StopIteration:
+            if self.finished_at is None:
+                self.finished_at = time.perf_counter()
+            raise
+
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.token_count += 1
+        return token
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    @property
+    def total_time(self) -> Optional[float]:
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def stats(self) -> dict:
+        return {
+            "time_to_first_token": self.time_to_first_token,
+            "total_time": self.total_time,
+            "chunks": self.token_count,
+        }
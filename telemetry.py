@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+# Spans go through the OpenTelemetry API, which is a no-op until an SDK tracer provider
+# is configured (e.g. by running under opentelemetry-instrument with an exporter set)
+try:
+    from opentelemetry import trace
+    _tracer = trace.get_tracer("rag_pipeline")
+except ImportError:
+    _tracer = None
+
+# Latest durations kept per stage for the percentiles
+WINDOW = 2048
+QUANTILES = (0.5, 0.95, 0.99)
+# Rough Gemini ratio, used when a response carries no usage_metadata
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    return sorted_values[int(fraction * (len(sorted_values) - 1))] if sorted_values else 0.0
+
+
+class StageMetrics:
+    """
+    In-process latency and token counters for the request path: per stage, the
+    last WINDOW durations (for p50/p95/p99) plus all-time count, sum and errors.
+    render_prometheus() returns them in the Prometheus text format, so a /metrics
+    endpoint can be scraped without running a collector.
+    """
+
+    def __init__(self, window: int = WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._durations = {}
+            self._counts = {}
+            self._sums = {}
+            self._errors = {}
+            self._tokens = {"prompt": 0, "completion": 0}
+            self._context_tokens = {"retrieved": 0, "context": 0}
+
+    def observe(self, stage: str, seconds: float, error: bool = False):
+        with self._lock:
+            if stage not in self._durations:
+                self._durations[stage] = deque(maxlen=self.window)
+                self._counts[stage] = 0
+                self._sums[stage] = 0.0
+                self._errors[stage] = 0
+            self._durations[stage].append(seconds)
+            self._counts[stage] += 1
+            self._sums[stage] += seconds
+            self._errors[stage] += error
+
+    def add_tokens(self, prompt_tokens: int, completion_tokens: int):
+        with self._lock:
+            self._tokens["prompt"] += prompt_tokens
+            self._tokens["completion"] += completion_tokens
+
+    def add_context_tokens(self, retrieved_tokens: int, context_tokens: int):
+        with self._lock:
+            self._context_tokens["retrieved"] += retrieved_tokens
+            self._context_tokens["context"] += context_tokens
+
+    def summary(self) -> dict:
+        with self._lock:
+            stages = {}
+            for stage, durations in self._durations.items():
+                values = sorted(durations)
+                stages[stage] = {"count": self._counts[stage], "sum": self._sums[stage], "errors": self._errors[stage],
+                                 **{f"p{int(q * 100)}": percentile(values, q) for q in QUANTILES}}
+            return {"stages": stages, "tokens": dict(self._tokens), "context_tokens": dict(self._context_tokens)}
+
+    def render_prometheus(self) -> str:
+        summary = self.summary()
+        lines = ["# HELP rag_stage_seconds Time spent in each stage of the RAG request path",
+                 "# TYPE rag_stage_seconds summary"]
+        for stage, stats in summary["stages"].items():
+            for q in QUANTILES:
+                lines.append(f'rag_stage_seconds{{stage="{stage}",quantile="{q}"}} {stats[f"p{int(q * 100)}"]:.6f}')
+            lines.append(f'rag_stage_seconds_sum{{stage="{stage}"}} {stats["sum"]:.6f}')
+            lines.append(f'rag_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        lines += ["# HELP rag_stage_errors_total Stages that raised",
+                  "# TYPE rag_stage_errors_total counter"]
+        lines += [f'rag_stage_errors_total{{stage="{stage}"}} {stats["errors"]}'
+                  for stage, stats in summary["stages"].items()]
+        lines += ["# HELP rag_generation_tokens_total Gemini tokens (estimated when usage is not reported)",
+                  "# TYPE rag_generation_tokens_total counter"]
+        lines += [f'rag_generation_tokens_total{{kind="{kind}"}} {count}' for kind, count in summary["tokens"].items()]
+        lines += ["# HELP rag_context_tokens_total Estimated tokens of the retrieved chunks and of the assembled context",
+                  "# TYPE rag_context_tokens_total counter"]
+        lines += [f'rag_context_tokens_total{{kind="{kind}"}} {count}'
+                  for kind, count in summary["context_tokens"].items()]
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide metrics, shared by every RagPipeline
+METRICS = StageMetrics()
+
+
+@contextmanager
+def span(stage: str, **attributes):
+    """Times a stage into METRICS and, when tracing is configured, wraps it in an OpenTelemetry span."""
+    context = _tracer.start_as_current_span(f"rag.{stage}", attributes=attributes) if _tracer else nullcontext()
+    with context as current:
+        start = time.perf_counter()
+        try:
+            yield current
+        except Exception:
+            METRICS.observe(stage, time.perf_counter() - start, error=True)
+            raise
+        METRICS.observe(stage, time.perf_counter() - start)
+
+
+def record_context(stats: dict, current_span=None):
+    """Counts an assembled context's tokens against those of the chunks it was built from."""
+    METRICS.add_context_tokens(stats["retrieved_tokens"], stats["context_tokens"])
+    if current_span is not None:
+        for key in ("retrieved_tokens", "context_tokens", "tokens_saved", "context_chunks"):
+            current_span.set_attribute(f"rag.{key}", stats[key])
+
+
+def record_tokens(prompt: str, completion: str, usage=None, current_span=None):
+    """Counts a generation's tokens from its usage_metadata, or estimates them from the text."""
+    prompt_tokens = getattr(usage, "prompt_token_count", None) or estimate_tokens(prompt)
+    completion_tokens = getattr(usage, "candidates_token_count", None) or estimate_tokens(completion)
+    METRICS.add_tokens(prompt_tokens, completion_tokens)
+    if current_span is not None:
+        current_span.set_attribute("rag.prompt_tokens", prompt_tokens)
+        current_span.set_attribute("rag.completion_tokens", completion_tokens)
+    return prompt_tokens, completion_tokens
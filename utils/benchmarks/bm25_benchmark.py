@@ -0,0 +1,96 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from bm25_retriever import BM25Index
+from utils.organize_statutes import iter_processed_sections
+
+WORDS = """action adoption agency appeal assessment board child complaint county court crime damages deposit
+district election employee expungement fee fine hearing insurance judgment landlord lease license municipality
+name notice officer owner penalty permit person petition property prosecutor record registration rent school
+security sentence statute tax tenant vehicle violation water zoning""".split()
+
+
+def synthetic_sections(n, seed=0):
+    """Statute-shaped sections with realistic length spread, for when the real corpus isn't on disk."""
+    rng = random.Random(seed)
+    for i in range(n):
+        title = f"{i // 1000 + 1}A"
+        length = int(rng.lognormvariate(4.8, 0.8))
+        text = " ".join(rng.choice(WORDS) for _ in range(length))
+        yield {
+            "title": f"TITLE {title} - SYNTHETIC",
+            "section": f"{title}:{(i % 1000) // 20 + 1}-{i % 20 + 1}",
+            "heading": " ".join(rng.choice(WORDS) for _ in range(4)),
+            "text": f"{text} L.{rng.randint(1950, 2023)}, c.{rng.randint(1, 400)}, s.{rng.randint(1, 30)}.",
+        }
+
+
+def make_queries(index, n, seed=1):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        doc = index.docs[rng.randrange(index.num_docs)]
+        if rng.random() < 0.3:
+            queries.append((f"What does N.J.S.A. {doc['section']} say?", doc["section"]))
+        else:
+            queries.append((f"What are the rules about {doc['heading']}?", doc["section"]))
+    return queries
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BM25 build time, size and query latency.")
+    parser.add_argument("--input_file", default=None, help="Processed statutes .json/.jsonl (synthetic corpus if omitted)")
+    parser.add_argument("--num_sections", type=int, default=60000, help="Synthetic corpus size")
+    parser.add_argument("--num_queries", type=int, default=500, help="Queries to time")
+    parser.add_argument("--n_results", type=int, default=20, help="Results per query")
+    parser.add_argument("--target_p95_ms", type=float, default=25.0, help="Fail if p95 latency exceeds this")
+    args = parser.parse_args()
+
+    sections = iter_processed_sections(args.input_file) if args.input_file else synthetic_sections(args.num_sections)
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        start = time.perf_counter()
+        index = BM25Index.build(sections, index_dir)
+        build_time = time.perf_counter() - start
+
+        queries = make_queries(index, args.num_queries)
+        latencies = []
+        citation_hits = 0
+        citation_queries = 0
+        for query, section in queries:
+            start = time.perf_counter()
+            results = index.search(query, args.n_results)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if "N.J.S.A." in query:
+                citation_queries += 1
+                citation_hits += bool(results) and index.docs[results[0][0]]["section"] == section
+
+        latencies.sort()
+        p50 = statistics.median(latencies)
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+
+        print(f"Sections: {index.num_docs}, terms: {len(index.vocab)}, postings: {len(index.postings_doc)}")
+        print(f"Build time: {build_time:.1f}s, index size: {directory_size(index_dir) / 1e6:.1f} MB")
+        print(f"Query latency: p50 {p50:.2f} ms, p95 {p95:.2f} ms (target {args.target_p95_ms:.0f} ms)")
+        print(f"Exact citation queries ranked first: {citation_hits}/{citation_queries}")
+
+    if p95 > args.target_p95_ms:
+        sys.exit(f"❌ p95 latency {p95:.2f} ms is over the {args.target_p95_ms:.0f} ms target")
+
+
+if __name__ == "__main__":
+    main()
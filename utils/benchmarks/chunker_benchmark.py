@@ -0,0 +1,168 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from bm25_retriever import BM25Index
+from telemetry import estimate_tokens
+from utils.benchmarks.bm25_benchmark import WORDS
+from utils.benchmarks.retrieval_benchmark import QUESTIONS_FILE, load_labeled_questions
+from utils.organize_statutes import iter_processed_sections
+from utils.statute_chunker import StatuteChunker
+from utils.statute_documents import clean_statute_text, iter_statute_chunks, make_text_splitter
+
+# Chunks a question's prompt is built from, as in get_statute_context
+PROMPT_CHUNKS = 3
+
+
+def sentence(rng, length, extra=()):
+    words = [rng.choice(WORDS) for _ in range(length)] + list(extra)
+    rng.shuffle(words)
+    return " ".join(words).capitalize() + "."
+
+
+def synthetic_structured_sections(n, seed=0):
+    """
+    Statute-shaped sections with NJ-style enumerated structure ("1. a.", "(1)", "(a)")
+    and realistic length spread, with the units joined by spaces as organize_statutes'
+    parsers join a section's lines. One unit of each section mentions a unique term, and
+    the labeled question asks about it, so a prompt either contains the answer or not.
+    """
+    rng = random.Random(seed)
+    sections, questions = [], []
+    for i in range(n):
+        title = f"{i // 1000 + 1}A"
+        section_id = f"{title}:{(i % 1000) // 20 + 1}-{i % 20 + 1}"
+        units = []
+        if rng.random() < 0.4:
+            # Short prose sections: definitions, short titles, effective dates
+            units.append(" ".join(sentence(rng, rng.randint(10, 30)) for _ in range(rng.randint(1, 4))))
+        else:
+            for s, letter in enumerate("abcdefgh"[:rng.randint(2, 8)]):
+                prefix = "1. a." if s == 0 else f"{letter}."
+                units.append(f"{prefix} {sentence(rng, rng.randint(15, 45))}")
+                for p in range(rng.randint(0, 5) if rng.random() < 0.6 else 0):
+                    units.append(f"({p + 1}) {sentence(rng, rng.randint(10, 40))}")
+                    for q in range(rng.randint(0, 3) if rng.random() < 0.3 else 0):
+                        units.append(f"({'abc'[q]}) {sentence(rng, rng.randint(8, 25))}")
+        term = f"answer{i}"
+        target = rng.randrange(len(units))
+        units[target] = units[target][:-1] + f" {term}."
+        sections.append({"title": f"TITLE {title} - SYNTHETIC", "section": section_id,
+                         "heading": sentence(rng, 4)[:-1], "text": " ".join(units) +
+                         f" L.{rng.randint(1950, 2023)}, c.{rng.randint(1, 400)}, s.{rng.randint(1, 30)}."})
+        if rng.random() < 0.1:
+            questions.append((f"What does the law say about {term} and {rng.choice(WORDS)}?", section_id, term))
+    return sections, questions
+
+
+def unit_ends(text):
+    """Where each structural unit's text stops, trailing whitespace excluded."""
+    return {len(text[:unit["end"]].rstrip()) for unit in StatuteChunker().units(text)}
+
+
+def measure(name, split_text, sections, questions, work_dir):
+    start = time.perf_counter()
+    chunks = list(iter_statute_chunks(sections, split_text))
+    chunk_seconds = time.perf_counter() - start
+
+    tokens = [estimate_tokens(text) for _, text, _ in chunks]
+    corpus_tokens = sum(estimate_tokens(clean_statute_text(section["text"])) for section in sections)
+
+    # Chunks that stop inside a structural unit, among sections split into more than one chunk
+    texts = {section["section"]: clean_statute_text(section["text"]) for section in sections}
+    chunk_counts = {}
+    for _, _, metadata in chunks:
+        chunk_counts[metadata["section"]] = chunk_counts.get(metadata["section"], 0) + 1
+    mid_unit = split_chunks = 0
+    positions = {}
+    ends = {}
+    for _, text, metadata in chunks:
+        section = metadata["section"]
+        if chunk_counts[section] < 2:
+            continue
+        source = texts[section]
+        if section not in ends:
+            ends[section] = unit_ends(source)
+        position = source.find(text, positions.get(section, 0))
+        positions[section] = position + 1
+        split_chunks += 1
+        mid_unit += position + len(text) not in ends[section]
+
+    # Prompt size and whether it holds the answer, with chunk-level BM25 standing in for retrieval
+    index = BM25Index.build(({"title": metadata["title"], "section": chunk_id, "heading": metadata["heading"],
+                              "text": text} for chunk_id, text, metadata in chunks), os.path.join(work_dir, name))
+    by_id = {chunk_id: (text, metadata) for chunk_id, text, metadata in chunks}
+    prompt_tokens, covered = [], 0
+    for question, section, term in questions:
+        hits = [by_id[index.docs[i]["section"]] for i, _ in index.search(question, PROMPT_CHUNKS)]
+        prompt_tokens.append(sum(estimate_tokens(text) for text, _ in hits))
+        covered += any(metadata["section"] == section and (term is None or term in text) for text, metadata in hits)
+
+    tokens.sort()
+    return {
+        "chunks": len(chunks),
+        "embed_tokens": sum(tokens),
+        "overlap_tokens": max(sum(tokens) - corpus_tokens, 0),
+        "mean_tokens": statistics.mean(tokens),
+        "p95_tokens": tokens[int(0.95 * (len(tokens) - 1))],
+        "mid_unit_cuts": mid_unit / split_chunks if split_chunks else 0.0,
+        "prompt_tokens": statistics.mean(prompt_tokens) if prompt_tokens else 0.0,
+        "answer_in_prompt": covered / len(questions) if questions else 0.0,
+        "chunk_seconds": chunk_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the structure-aware chunker with the notebook's splitter.")
+    parser.add_argument("--input_file", default=None, help="Processed statutes .json/.jsonl (synthetic if omitted)")
+    parser.add_argument("--num_sections", type=int, default=20000, help="Synthetic corpus size")
+    parser.add_argument("--max_tokens", type=int, nargs="+", default=[500, 550, 600], help="Chunker token budgets")
+    args = parser.parse_args()
+
+    if args.input_file:
+        sections = list(iter_processed_sections(args.input_file))
+        known = {section["section"] for section in sections}
+        # Labeled questions only say which section answers, so any of its chunks counts
+        questions = [(question, expected[0], None) for question, expected in load_labeled_questions(QUESTIONS_FILE, known)]
+    else:
+        sections, questions = synthetic_structured_sections(args.num_sections)
+
+    splitters = {}
+    try:
+        splitters["recursive 2000/100"] = make_text_splitter()
+    except ImportError:
+        print("Recursive splitter skipped - langchain is not installed")
+    for max_tokens in args.max_tokens:
+        splitters[f"structure {max_tokens}"] = StatuteChunker(max_tokens=max_tokens)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = {name: measure(name.replace(" ", "_").replace("/", "_"), split_text, sections, questions, work_dir)
+                   for name, split_text in splitters.items()}
+
+    print(f"\nSections: {len(sections)}, questions: {len(questions)}, tokens estimated at 4 chars/token")
+    columns = ["chunks", "embed_tokens", "overlap_tokens", "mean_tokens", "p95_tokens", "mid_unit_cuts",
+               "prompt_tokens", "answer_in_prompt", "chunk_seconds"]
+    print(f"{'splitter':<20}" + "".join(f"{column:>17}" for column in columns))
+    for name, result in results.items():
+        print(f"{name:<20}" + "".join(f"{result[column]:>17,.2f}" if isinstance(result[column], float)
+                                      else f"{result[column]:>17,}" for column in columns))
+
+    baseline = results.get("recursive 2000/100")
+    if baseline:
+        for name, result in results.items():
+            if name != "recursive 2000/100":
+                print(f"{name} vs recursive: chunks {result['chunks'] / baseline['chunks'] - 1:+.1%}, "
+                      f"embedded tokens {result['embed_tokens'] / baseline['embed_tokens'] - 1:+.1%}, "
+                      f"prompt tokens {result['prompt_tokens'] / baseline['prompt_tokens'] - 1:+.1%}")
+
+if __name__ == "__main__":
+    main()
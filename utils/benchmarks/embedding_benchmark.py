@@ -0,0 +1,86 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from embedding_engine import BatchEmbeddingEngine, FakeEmbeddingBackend
+from local_embed_function import LocalEmbeddingFunction
+
+
+def make_texts(n):
+    return [f"Section 2A:52-{i}. Any person may institute an action for change of name number {i}." for i in range(n)]
+
+
+def run_serial(backend, texts):
+    """The old GeminiEmbeddingFunction behaviour: one request per text, one at a time."""
+    return [backend.embed_batch([text], "retrieval_document")[0] for text in texts]
+
+
+def run_local(model, texts, threads, processes, num_questions=200):
+    """Question latency (one text per call, as on the request path) and bulk throughput on the CPU."""
+    embedding_function = LocalEmbeddingFunction(model=model, threads=threads, processes=processes)
+    embedding_function(["warm up"])  # loads the model
+
+    latencies = []
+    for i in range(num_questions):
+        start = time.perf_counter()
+        embedding_function.embed_text(f"Can my landlord keep my security deposit after {i} days?", task_type="retrieval_query")
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    embedding_function(texts)
+    bulk_time = time.perf_counter() - start
+    embedding_function.close()
+
+    latencies.sort()
+    print(f"Local {model} ({threads or 'default'} threads, {processes} processes): "
+          f"question p50 {statistics.median(latencies) * 1000:.1f} ms, p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:.1f} ms; "
+          f"bulk {len(texts) / bulk_time:.1f} texts/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare serial vs batched embedding against a fake backend, and optionally time a local model.")
+    parser.add_argument("--num_texts", type=int, default=2000, help="Number of texts to embed")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per request")
+    parser.add_argument("--batch_size", type=int, default=100, help="Texts per request")
+    parser.add_argument("--max_workers", type=int, default=4, help="Concurrent requests")
+    parser.add_argument("--serial_sample", type=int, default=200, help="Texts to time serially (extrapolated)")
+    parser.add_argument("--local_model", default=None, help="Also time this sentence-transformers model on the CPU")
+    parser.add_argument("--threads", type=int, default=None, help="Torch threads for --local_model")
+    parser.add_argument("--processes", type=int, default=0, help="Worker processes for --local_model bulk embedding")
+    args = parser.parse_args()
+
+    texts = make_texts(args.num_texts)
+
+    serial_texts = texts[:args.serial_sample]
+    backend = FakeEmbeddingBackend(latency=args.latency)
+    start = time.perf_counter()
+    serial = run_serial(backend, serial_texts)
+    serial_time = (time.perf_counter() - start) * len(texts) / len(serial_texts)
+
+    engine = BatchEmbeddingEngine(FakeEmbeddingBackend(latency=args.latency),
+                                  batch_size=args.batch_size, max_workers=args.max_workers)
+    start = time.perf_counter()
+    batched = engine.embed(texts)
+    batched_time = time.perf_counter() - start
+
+    assert batched[:len(serial)] == serial, "Batched output order does not match serial output"
+
+    print(f"Texts: {len(texts)}, simulated latency: {args.latency * 1000:.0f} ms/request")
+    print(f"Serial (extrapolated): {serial_time:.2f}s ({len(texts) / serial_time:.1f} texts/s)")
+    print(f"Batched x{args.batch_size}, {args.max_workers} workers: {batched_time:.2f}s "
+          f"({len(texts) / batched_time:.1f} texts/s, {engine.backend.calls} requests)")
+    print(f"Speedup: {serial_time / batched_time:.1f}x")
+
+    if args.local_model:
+        run_local(args.local_model, texts, args.threads, args.processes)
+
+
+if __name__ == "__main__":
+    main()
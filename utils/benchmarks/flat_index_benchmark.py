@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from flat_index import FlatIndex
+from retrievers import ChromaRetriever
+
+
+def synthetic_records(n, dim, seed=0):
+    """Clustered unit vectors (chunks of a section sit close together), like real statute embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(n // 4, 1), dim)).astype(np.float32)
+    for start in range(0, n, 10000):
+        rows = np.arange(start, min(start + 10000, n))
+        vectors = centers[rows // 4] + 0.5 * rng.normal(size=(len(rows), dim)).astype(np.float32)
+        for i, vector in zip(rows, vectors):
+            section = f"{i // 4000 + 1}A:{i // 40 % 100 + 1}-{i // 4}"
+            yield (f"statute_{section}_{i % 4}", f"Synthetic chunk {i}",
+                   {"title": f"TITLE {i // 4000 + 1}A", "section": section, "heading": f"Heading {i // 4}",
+                    "chunk_id": int(i % 4)}, vector)
+
+
+def build_chroma(path, records, batch_size=5000):
+    import chromadb
+
+    client = chromadb.PersistentClient(path=path)
+    collection = client.get_or_create_collection("bench", embedding_function=None)
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == batch_size:
+            collection.add(ids=[r[0] for r in batch], documents=[r[1] for r in batch],
+                           metadatas=[r[2] for r in batch], embeddings=[r[3].tolist() for r in batch])
+            batch = []
+    if batch:
+        collection.add(ids=[r[0] for r in batch], documents=[r[1] for r in batch],
+                       metadatas=[r[2] for r in batch], embeddings=[r[3].tolist() for r in batch])
+
+
+def peak_rss_mb():
+    # ru_maxrss survives exec on Linux, so a probe would inherit the parent's peak; VmHWM doesn't
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def open_retriever(backend, path):
+    if backend == "flat":
+        return FlatIndex(path)
+    if backend in ("int8", "binary"):
+        return FlatIndex(path, quantization=backend)
+    import chromadb
+    return ChromaRetriever(chromadb.PersistentClient(path=path).get_collection("bench", embedding_function=None))
+
+
+def probe(backend, path, queries_file, n_results, batch_size):
+    """Runs in its own interpreter, so peak RSS is this backend's alone."""
+    queries = np.load(queries_file)
+    start = time.perf_counter()
+    retriever = open_retriever(backend, path)
+    retriever.count()
+    load_time = time.perf_counter() - start
+
+    latencies = []
+    ids = []
+    for query in queries:
+        start = time.perf_counter()
+        results = retriever.query([query.tolist()], n_results=n_results)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append(results["ids"][0])
+
+    start = time.perf_counter()
+    for i in range(0, len(queries), batch_size):
+        retriever.query(queries[i:i + batch_size].tolist(), n_results=n_results)
+    batched = (time.perf_counter() - start) * 1000 / len(queries)
+
+    latencies.sort()
+    print(json.dumps({
+        "load_ms": load_time * 1000,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+        "batched_ms_per_query": batched,
+        "peak_rss_mb": peak_rss_mb(),
+        "ids": ids,
+    }))
+
+
+def run_probe(backend, path, queries_file, args):
+    command = [sys.executable, os.path.abspath(__file__), "--probe", backend, "--index_dir", path,
+               "--queries_file", queries_file, "--n_results", str(args.n_results), "--batch_size", str(args.batch_size)]
+    output = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare FlatIndex (float32, int8, binary) with a Chroma collection: latency, RSS and recall.")
+    parser.add_argument("--num_chunks", type=int, default=100000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=768, help="Embedding dimensions (models/embedding-001 is 768)")
+    parser.add_argument("--num_queries", type=int, default=200, help="Queries to time")
+    parser.add_argument("--n_results", type=int, default=20, help="Results per query")
+    parser.add_argument("--batch_size", type=int, default=32, help="Queries per batched call")
+    parser.add_argument("--probe", choices=["flat", "int8", "binary", "chroma"], help=argparse.SUPPRESS)
+    parser.add_argument("--index_dir", help=argparse.SUPPRESS)
+    parser.add_argument("--queries_file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        probe(args.probe, args.index_dir, args.queries_file, args.n_results, args.batch_size)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        flat_dir = os.path.join(tmp_dir, "flat")
+        start = time.perf_counter()
+        index = FlatIndex.build(synthetic_records(args.num_chunks, args.dim), flat_dir)
+        builds = {"flat": time.perf_counter() - start}
+
+        # Queries near random stored chunks, like a question about a specific section
+        rng = np.random.default_rng(1)
+        rows = rng.choice(index.count(), size=args.num_queries, replace=False)
+        queries = np.asarray(index.vectors[rows]) + 0.05 * rng.normal(size=(args.num_queries, args.dim))
+        queries_file = os.path.join(tmp_dir, "queries.npy")
+        np.save(queries_file, queries.astype(np.float32))
+
+        results = {"flat": run_probe("flat", flat_dir, queries_file, args)}
+        # The codes are written as part of the flat build, and searched straight from flat_dir
+        for quantization in ("int8", "binary"):
+            builds[quantization] = builds["flat"]
+            results[quantization] = run_probe(quantization, flat_dir, queries_file, args)
+        try:
+            chroma_dir = os.path.join(tmp_dir, "chroma")
+            start = time.perf_counter()
+            build_chroma(chroma_dir, synthetic_records(args.num_chunks, args.dim))
+            builds["chroma"] = time.perf_counter() - start
+            results["chroma"] = run_probe("chroma", chroma_dir, queries_file, args)
+        except ImportError:
+            print("Chroma skipped - chromadb is not installed")
+
+        size = sum(os.path.getsize(os.path.join(flat_dir, name)) for name in os.listdir(flat_dir))
+        scanned = {"flat": "vectors.npy", "int8": "int8_codes.npy", "binary": "binary_codes.npy"}
+        scanned_mb = {backend: os.path.getsize(os.path.join(flat_dir, name)) / 1e6 for backend, name in scanned.items()}
+        print(f"Chunks: {index.count()} x {args.dim}, flat index {size / 1e6:.0f} MB on disk (all encodings)")
+        print(f"{'backend':<8} {'build s':>8} {'load ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'batch ms/q':>11} "
+              f"{'RSS MB':>8} {'scan MB':>8} {'recall@k':>9}")
+        for backend, result in results.items():
+            # Flat search is exact, so it is the reference for recall
+            recall = np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(result["ids"], results["flat"]["ids"])])
+            print(f"{backend:<8} {builds[backend]:>8.1f} {result['load_ms']:>8.1f} {result['p50_ms']:>8.2f} "
+                  f"{result['p95_ms']:>8.2f} {result['batched_ms_per_query']:>11.2f} {result['peak_rss_mb']:>8.0f} "
+                  f"{scanned_mb.get(backend, float('nan')):>8.0f} {recall:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from embedding_engine import BatchEmbeddingEngine, FakeEmbeddingBackend
+from gemini_embed_function import GeminiEmbeddingFunction
+from utils.benchmarks.bm25_benchmark import synthetic_sections
+from utils.index_statutes import IndexCursor, index_statutes
+from utils.organize_statutes import iter_processed_sections
+from utils.statute_documents import iter_statute_chunks, make_text_splitter
+
+
+def run_notebook_style(collection, chunks, batch_size=15):
+    """The index_statues.ipynb loop: collection.add 15 chunks at a time, embedded one request after another."""
+    start = time.perf_counter()
+    for i in range(0, len(chunks), batch_size):
+        batch = chunks[i:i + batch_size]
+        collection.add(ids=[chunk[0] for chunk in batch], documents=[chunk[1] for chunk in batch],
+                       metadatas=[chunk[2] for chunk in batch])
+    return time.perf_counter() - start
+
+
+def main():
+    import chromadb
+
+    parser = argparse.ArgumentParser(description="End-to-end indexing throughput with a fake embedder.")
+    parser.add_argument("--input_file", default=None, help="Processed statutes .json/.jsonl (synthetic if omitted)")
+    parser.add_argument("--num_sections", type=int, default=70000, help="Synthetic corpus size (about the full NJ statutes)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per embedding request")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent embedding requests")
+    parser.add_argument("--batch_size", type=int, default=2000, help="Chunks per upsert")
+    parser.add_argument("--baseline_sample", type=int, default=600, help="Chunks to index notebook-style (extrapolated)")
+    args = parser.parse_args()
+
+    sections = lambda: iter_processed_sections(args.input_file) if args.input_file else synthetic_sections(args.num_sections)
+    split_text = make_text_splitter()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        client = chromadb.PersistentClient(path=tmp_dir)
+        batch_size = min(args.batch_size, client.get_max_batch_size())
+
+        embedding_function = GeminiEmbeddingFunction(
+            engine=BatchEmbeddingEngine(FakeEmbeddingBackend(latency=args.latency), max_workers=args.workers))
+        collection = client.get_or_create_collection("bench", embedding_function=embedding_function)
+        cursor = IndexCursor(os.path.join(tmp_dir, "cursor.json"))
+        stats = index_statutes(collection, sections(), embedding_function, split_text, batch_size, cursor)
+
+        serial_function = GeminiEmbeddingFunction(
+            engine=BatchEmbeddingEngine(FakeEmbeddingBackend(latency=args.latency), max_workers=1))
+        baseline = client.get_or_create_collection("baseline", embedding_function=serial_function)
+        sample = list(itertools.islice(iter_statute_chunks(sections(), split_text), args.baseline_sample))
+        baseline_rate = len(sample) / run_notebook_style(baseline, sample)
+
+    print(f"\nChunks: {stats['indexed']}, simulated latency {args.latency * 1000:.0f} ms/request, "
+          f"{args.workers} workers, upsert batch {batch_size}")
+    print(f"index_statutes: {stats['seconds']:.1f}s, {stats['docs_per_second']:.1f} docs/s "
+          f"(embedding {stats['embed_seconds']:.1f}s, upserts {stats['upsert_seconds']:.1f}s overlapped)")
+    print(f"Notebook loop:  {baseline_rate:.1f} docs/s, "
+          f"~{stats['indexed'] / baseline_rate / 60:.0f} min for the same corpus")
+    print(f"Speedup: {stats['docs_per_second'] / baseline_rate:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from utils.organize_statutes import iter_processed_sections
+
+WORDS = """the court shall any person may institute action authority assume another name complaint affidavit
+municipality board county tax property notice hearing penalty section provided pursuant thereof""".split()
+
+# Each parser runs in its own interpreter so peak RSS isn't shared between them
+# (for the process pool, the largest worker is reported if it beats the parent)
+PROBE = """
+import json, resource, sys, time
+sys.path.append({root!r})
+from utils.organize_statutes import {function}
+start = time.perf_counter()
+{function}({input_file!r}, {output_file!r}{extra_args})
+elapsed = time.perf_counter() - start
+peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+print(json.dumps({{"seconds": elapsed, "peak_rss_mb": peak / 1024}}))
+"""
+
+
+def write_synthetic_statutes(path, size_mb, seed=0):
+    """Writes a STATUTES.txt-shaped file of roughly `size_mb` MB, including a few very long sections."""
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    line = lambda: "    " + " ".join(rng.choice(WORDS) for _ in range(14))
+    written = 0
+    title = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            title += 1
+            block = [f"TITLE {title}A  SYNTHETIC TITLE {title}"]
+            for section in range(1, 400):
+                block.append(f"{title}A:{section // 20 + 1}-{section}.     {' '.join(rng.choice(WORDS) for _ in range(5))}")
+                # Mostly short sections, with the occasional huge one like the real corpus
+                lines = 3000 if rng.random() < 0.002 else int(rng.lognormvariate(2, 0.8)) + 1
+                block.extend(line() for _ in range(lines))
+                if rng.random() < 0.01:
+                    block.append(f"{title}A:{section // 20 + 1}-{section}.     Repeated section header line")
+                block.append(f"    L.{rng.randint(1950, 2023)}, c.{rng.randint(1, 400)}, s.{rng.randint(1, 30)}.")
+            text = "\n".join(block) + "\n"
+            f.write(text)
+            written += len(text)
+
+
+def run(function, input_file, output_file, extra_args=""):
+    code = PROBE.format(root=project_root, function=function, input_file=input_file, output_file=output_file,
+                        extra_args=extra_args)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare parse_statutes with the streaming and parallel parsers.")
+    parser.add_argument("--size_mb", type=int, default=300, help="Size of the synthetic STATUTES file")
+    parser.add_argument("--input_file", default=None, help="Use an existing statutes file instead")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processes for the parallel parser")
+    parser.add_argument("--verify", action="store_true", help="Check all outputs hold the same sections")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = args.input_file
+        if input_file is None:
+            input_file = os.path.join(tmp_dir, "STATUTES.txt")
+            write_synthetic_statutes(input_file, args.size_mb)
+        print(f"Input: {os.path.getsize(input_file) / 1e6:.0f} MB")
+
+        json_output = os.path.join(tmp_dir, "processed.json")
+        jsonl_output = os.path.join(tmp_dir, "processed.jsonl")
+        parallel_output = os.path.join(tmp_dir, "processed_parallel.jsonl")
+        results = {
+            "parse_statutes": run("parse_statutes", input_file, json_output),
+            "parse_statutes_stream": run("parse_statutes_stream", input_file, jsonl_output),
+            f"parse_statutes_parallel x{args.workers}": run("parse_statutes_parallel", input_file, parallel_output,
+                                                            f", {args.workers}"),
+        }
+        for name, result in results.items():
+            print(f"{name:<28} {result['seconds']:8.1f}s   peak RSS {result['peak_rss_mb']:8.0f} MB")
+
+        if args.verify:
+            for output in (jsonl_output, parallel_output):
+                same = all(a == b for a, b in itertools.zip_longest(iter_processed_sections(json_output),
+                                                                    iter_processed_sections(output)))
+                print(f"{os.path.basename(output)} matches parse_statutes: {same}")
+
+
+if __name__ == "__main__":
+    main()
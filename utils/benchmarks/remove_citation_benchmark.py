@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from utils.benchmarks.parse_statutes_benchmark import write_synthetic_statutes
+from utils.citations_extractions.citation_grammar import match_citations
+from utils.citations_extractions.citation_removal import find_citation, remove_citation
+from utils.organize_statutes import get_top_sections_by_word_count, parse_statutes
+
+
+def legacy_remove_citation(original_text, extracted_citation, buffer=8):
+    """remove_citation as it was: rebuild the text without spaces in the window, then a global replace."""
+    search_window = original_text[-(len(extracted_citation) + buffer):]
+    stripped_citation = extracted_citation.replace(" ", "")
+    original_text_whitespace_removed = original_text[:-(len(extracted_citation) + buffer)] + search_window.replace(" ", "")
+    if stripped_citation in original_text_whitespace_removed:
+        return original_text_whitespace_removed.replace(stripped_citation, ""), True
+    return original_text, False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time remove_citation on the longest statute sections.")
+    parser.add_argument("--input_file", default=None, help="STATUTES.txt (a synthetic one if omitted)")
+    parser.add_argument("--top_n", type=int, default=10, help="Number of longest sections to time")
+    parser.add_argument("--number", type=int, default=200, help="Calls per section")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = args.input_file
+        if input_file is None:
+            input_file = os.path.join(tmp_dir, "STATUTES.txt")
+            write_synthetic_statutes(input_file, 16)
+        parsed_data = parse_statutes(input_file, os.path.join(tmp_dir, "processed.json"))
+
+    texts = {section["section"]: section["text"] for title in parsed_data for section in title["sections"]}
+    # "find" is only the tail match; "tail" also includes copying the section without the citation
+    print(f"{'section':<14} {'words':>8} {'legacy µs':>10} {'tail µs':>10} {'find µs':>10} {'speedup':>8}  same text")
+    for top in get_top_sections_by_word_count(parsed_data, args.top_n):
+        text = texts[top["section"]]
+        citation, _ = match_citations(text)
+        if citation == "None":
+            continue
+        legacy = timeit.timeit(lambda: legacy_remove_citation(text, citation), number=args.number) / args.number
+        tail = timeit.timeit(lambda: remove_citation(text, citation), number=args.number) / args.number
+        find = timeit.timeit(lambda: find_citation(text, citation), number=args.number) / args.number
+        # The old version also squeezes spaces out of the window, so compare ignoring spaces
+        same = legacy_remove_citation(text, citation)[0].replace(" ", "") == remove_citation(text, citation)[0].replace(" ", "")
+        print(f"{top['section']:<14} {top['word_count']:>8} {legacy * 1e6:>10.1f} {tail * 1e6:>10.1f} {find * 1e6:>10.1f} "
+              f"{legacy / tail:>7.0f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from flat_index import FlatIndex
+from rag_pipeline import RagPipeline
+from reranker import CrossEncoderReranker, OverlapScorer, RERANK_CANDIDATES
+from telemetry import estimate_tokens
+from utils.benchmarks.retrieval_benchmark import (QUESTIONS_FILE, load_labeled_questions, make_embedding_function,
+                                                  recall_at_k, synthetic_corpus, unique_sections, whole_section)
+from utils.organize_statutes import iter_processed_sections
+from utils.statute_documents import iter_statute_chunks, make_splitter
+
+# Chunks that reach build_prompt, as in get_answer
+PROMPT_CHUNKS = 3
+
+
+def build_flat_index(chunks, path):
+    embeddings = make_embedding_function()([text for _, text, _ in chunks])
+    FlatIndex.build(((chunk_id, text, metadata, embedding)
+                     for (chunk_id, text, metadata), embedding in zip(chunks, embeddings)), path)
+    return FlatIndex(path)
+
+
+def measure(pipeline, questions, n_results):
+    latencies, recalls, prompt_tokens = [], [], []
+    for question, expected in questions:
+        start = time.perf_counter()
+        chunks, metadatas = pipeline.get_statute_context(question, n_results=n_results)
+        latencies.append(time.perf_counter() - start)
+        recalls.append(recall_at_k(unique_sections(metadatas), expected, n_results))
+        prompt_tokens.append(estimate_tokens("\n\n".join(chunks)))
+    latencies.sort()
+    return {
+        "recall": statistics.mean(recalls),
+        "prompt_tokens": statistics.mean(prompt_tokens),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency, prompt size and recall with and without re-ranking.")
+    parser.add_argument("--input_file", default=None, help="Processed statutes .json/.jsonl (synthetic corpus if omitted)")
+    parser.add_argument("--num_sections", type=int, default=20000, help="Synthetic corpus size")
+    parser.add_argument("--num_questions", type=int, default=300, help="Synthetic labeled questions")
+    parser.add_argument("--candidates", type=int, default=RERANK_CANDIDATES, help="Chunks pulled for the re-ranker")
+    parser.add_argument("--model", default=None,
+                        help="Cross-encoder to load (default: the offline term-overlap stand-in)")
+    parser.add_argument("--threads", type=int, default=None, help="Torch threads for --model")
+    args = parser.parse_args()
+
+    if args.input_file:
+        sections = list(iter_processed_sections(args.input_file))
+        questions = load_labeled_questions(QUESTIONS_FILE, {section["section"] for section in sections})
+    else:
+        sections, questions = synthetic_corpus(args.num_sections, args.num_questions)
+    try:
+        split_text = make_splitter("recursive")
+    except ImportError:
+        split_text = whole_section
+    chunks = list(iter_statute_chunks(sections, split_text))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        index = build_flat_index(chunks, os.path.join(work_dir, "flat"))
+        scorer = None if args.model else OverlapScorer()
+        reranker = CrossEncoderReranker(args.model or OverlapScorer.model, threads=args.threads, scorer=scorer)
+        reranker.scorer  # load the model outside the timings
+
+        def pipeline(reranker=None):
+            return RagPipeline(chroma_path=work_dir, embedding_function=make_embedding_function(), retriever=index,
+                               bm25_index_path=os.path.join(work_dir, "no_bm25"),
+                               citation_index_path=os.path.join(work_dir, "no_citation_index.json"),
+                               reranker=reranker, rerank_candidates=args.candidates)
+
+        results = {
+            f"top-{PROMPT_CHUNKS}": measure(pipeline(), questions, PROMPT_CHUNKS),
+            f"top-{args.candidates}": measure(pipeline(), questions, args.candidates),
+        }
+        reranking = pipeline(reranker)
+        results[f"rerank {args.candidates}->{PROMPT_CHUNKS}"] = measure(reranking, questions, PROMPT_CHUNKS)
+        # Same questions again: every score comes from the cache
+        results[f"rerank {args.candidates}->{PROMPT_CHUNKS} cached"] = measure(reranking, questions, PROMPT_CHUNKS)
+
+    print(f"\nCorpus: {len(sections)} sections, {len(chunks)} chunks, {len(questions)} questions, "
+          f"re-ranker {reranker.model}")
+    columns = ["recall", "prompt_tokens", "p50_ms", "p95_ms"]
+    print(f"{'context':<24}" + "".join(f"{column:>16}" for column in columns))
+    for name, result in results.items():
+        print(f"{name:<24}" + "".join(f"{result[column]:>16.3f}" for column in columns))
+
+    top_k, wide = results[f"top-{PROMPT_CHUNKS}"], results[f"top-{args.candidates}"]
+    reranked = results[f"rerank {args.candidates}->{PROMPT_CHUNKS}"]
+    print(f"\nRe-ranking vs top-{PROMPT_CHUNKS}: recall {reranked['recall'] - top_k['recall']:+.3f}, "
+          f"p50 latency {reranked['p50_ms'] - top_k['p50_ms']:+.1f} ms")
+    print(f"Re-ranking vs top-{args.candidates} in the prompt: recall {reranked['recall'] - wide['recall']:+.3f}, "
+          f"prompt tokens {reranked['prompt_tokens'] - wide['prompt_tokens']:+.0f} "
+          f"({reranked['prompt_tokens'] / wide['prompt_tokens'] - 1:+.1%})")
+    print(f"Score cache: {reranker.stats()}")
+
+
+if __name__ == "__main__":
+    main()
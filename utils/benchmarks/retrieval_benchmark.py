@@ -0,0 +1,328 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from bm25_retriever import BM25Index
+from embedding_engine import BatchEmbeddingEngine, FakeEmbeddingBackend
+from flat_index import FlatIndex
+from gemini_embed_function import GeminiEmbeddingFunction
+from rag_pipeline import RagPipeline
+from retrievers import ChromaRetriever
+from utils.benchmarks.bm25_benchmark import WORDS, synthetic_sections
+from utils.benchmarks.flat_index_benchmark import peak_rss_mb
+from utils.organize_statutes import iter_processed_sections
+from utils.statute_documents import SPLITTERS, iter_statute_chunks, make_splitter
+
+QUESTIONS_FILE = os.path.join(current_dir, "retrieval_questions.jsonl")
+RETRIEVERS = ("chroma", "flat", "flat-int8", "flat-binary", "bm25", "hybrid")
+# The hashing embedder is deterministic and offline, so runs are comparable across commits and machines
+EMBEDDING_DIM = 768
+K_VALUES = (1, 3, 5, 10)
+
+
+def make_embedding_function():
+    return GeminiEmbeddingFunction(engine=BatchEmbeddingEngine(FakeEmbeddingBackend(dim=EMBEDDING_DIM)))
+
+
+def load_labeled_questions(path, known_sections=None):
+    """[(question, [expected sections])], keeping only questions whose sections are all in the corpus."""
+    with open(path, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(row["question"], row["sections"]) for row in rows
+            if known_sections is None or all(section in known_sections for section in row["sections"])]
+
+
+def synthetic_corpus(n, num_questions, seed=1):
+    """
+    synthetic_sections, each tagged with three rare topic terms (shared by a handful of
+    sections) in its heading and text, plus labeled questions that ask about two of a
+    section's terms or cite it - so there is something to retrieve.
+    """
+    rng = random.Random(seed)
+    sections = list(synthetic_sections(n))
+    topic_terms = [f"{rng.choice(WORDS)}{i}" for i in range(max(n // 2, 3))]
+    topics = {}
+    for section in sections:
+        terms = rng.sample(topic_terms, 3)
+        topics[section["section"]] = terms
+        section["heading"] = " ".join(terms)
+        words = section["text"].split()
+        for term in terms:
+            words.insert(rng.randrange(len(words) + 1), term)
+        section["text"] = " ".join(words)
+
+    questions = []
+    for section in rng.sample(sections, min(num_questions, n)):
+        if rng.random() < 0.2:
+            questions.append((f"What does N.J.S.A. {section['section']} say?", [section["section"]]))
+        else:
+            asked = rng.sample(topics[section["section"]], 2)
+            questions.append((f"What are the rules about {asked[0]} and {asked[1]}?", [section["section"]]))
+    return sections, questions
+
+
+def whole_section(text):
+    """Each section as a single chunk, for when langchain (the notebook splitter) isn't installed."""
+    return [text]
+
+
+def recall_at_k(retrieved, expected, k):
+    return len(set(retrieved[:k]) & set(expected)) / len(expected)
+
+
+def reciprocal_rank(retrieved, expected):
+    for rank, section in enumerate(retrieved, start=1):
+        if section in expected:
+            return 1.0 / rank
+    return 0.0
+
+
+def unique_sections(metadatas):
+    sections = []
+    for meta in metadatas:
+        if meta["section"] not in sections:
+            sections.append(meta["section"])
+    return sections
+
+
+# -------------------------------
+# Building the indexes
+# -------------------------------
+def build_indexes(names, sections, chunks, work_dir):
+    """Builds every index `names` needs under work_dir. Returns {name: build seconds}, chunk embedding excluded."""
+    builds = {}
+    needs_vectors = any(name != "bm25" for name in names)
+    records = []
+    if needs_vectors:
+        start = time.perf_counter()
+        embeddings = make_embedding_function()([text for _, text, _ in chunks])
+        builds["embed"] = time.perf_counter() - start
+        records = [(chunk_id, text, metadata, embedding)
+                   for (chunk_id, text, metadata), embedding in zip(chunks, embeddings)]
+
+    if any(name.startswith("flat") or name == "hybrid" for name in names):
+        start = time.perf_counter()
+        FlatIndex.build(records, os.path.join(work_dir, "flat"))
+        builds["flat"] = time.perf_counter() - start
+    if any(name in ("bm25", "hybrid") for name in names):
+        start = time.perf_counter()
+        BM25Index.build(sections, os.path.join(work_dir, "bm25"))
+        builds["bm25"] = time.perf_counter() - start
+    if "chroma" in names:
+        start = time.perf_counter()
+        build_chroma(os.path.join(work_dir, "chroma"), records)
+        builds["chroma"] = time.perf_counter() - start
+
+    return {
+        name: builds["flat"] + builds["bm25"] if name == "hybrid" else builds[name.split("-")[0]]
+        for name in names
+    }, builds.get("embed", 0.0)
+
+
+def build_chroma(path, records, batch_size=5000):
+    import chromadb
+
+    collection = chromadb.PersistentClient(path=path).get_or_create_collection(
+        "bench", metadata={"hnsw:space": "cosine"}, embedding_function=None)
+    for i in range(0, len(records), batch_size):
+        batch = records[i:i + batch_size]
+        collection.add(ids=[r[0] for r in batch], documents=[r[1] for r in batch],
+                       metadatas=[r[2] for r in batch], embeddings=[list(r[3]) for r in batch])
+
+
+def index_size_mb(name, work_dir):
+    parts = {"hybrid": ["flat", "bm25"]}.get(name, [name.split("-")[0]])
+    total = 0
+    for part in parts:
+        for root, _, files in os.walk(os.path.join(work_dir, part)):
+            total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total / 1e6
+
+
+# -------------------------------
+# Querying, one process per retriever so memory is its own
+# -------------------------------
+def open_searcher(name, work_dir):
+    """A question -> ranked section ids function over the index built for `name`."""
+    if name == "bm25":
+        index = BM25Index(os.path.join(work_dir, "bm25"))
+        return lambda question, k: [index.docs[i]["section"] for i, _ in index.search(question, k)]
+
+    if name == "chroma":
+        import chromadb
+        retriever = ChromaRetriever(chromadb.PersistentClient(path=os.path.join(work_dir, "chroma"))
+                                    .get_collection("bench", embedding_function=None))
+    else:
+        quantization = {"flat-int8": "int8", "flat-binary": "binary"}.get(name, "float32")
+        retriever = FlatIndex(os.path.join(work_dir, "flat"), quantization=quantization)
+
+    # The same get_statute_context the app runs; BM25 fusion only when hybrid
+    pipeline = RagPipeline(chroma_path=work_dir, embedding_function=make_embedding_function(), retriever=retriever,
+                           bm25_index_path=os.path.join(work_dir, "bm25" if name == "hybrid" else "no_bm25"),
+                           citation_index_path=os.path.join(work_dir, "no_citation_index.json"))
+    retriever.count()
+    return lambda question, k: unique_sections(pipeline.get_statute_context(question, n_results=k)[1])
+
+
+def probe(name, work_dir, questions_file, max_k):
+    with open(questions_file, "r", encoding="utf-8") as f:
+        questions = json.load(f)
+
+    start = time.perf_counter()
+    search = open_searcher(name, work_dir)
+    load_seconds = time.perf_counter() - start
+
+    latencies, rankings = [], []
+    for question, _ in questions:
+        start = time.perf_counter()
+        rankings.append(search(question, max_k))
+        latencies.append(time.perf_counter() - start)
+    print(json.dumps({"load_seconds": load_seconds, "latencies": latencies, "rankings": rankings,
+                      "peak_rss_mb": peak_rss_mb()}))
+
+
+def run_probe(name, work_dir, questions_file, max_k):
+    command = [sys.executable, os.path.abspath(__file__), "--probe", name, "--work_dir", work_dir,
+               "--questions_file", questions_file, "--max_k", str(max_k)]
+    output = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def score(questions, probe_result, build_seconds, size_mb):
+    rankings = probe_result["rankings"]
+    latencies = sorted(probe_result["latencies"])
+    result = {f"recall@{k}": statistics.mean(recall_at_k(ranking, expected, k)
+                                             for ranking, (_, expected) in zip(rankings, questions))
+              for k in K_VALUES}
+    result.update({
+        "mrr": statistics.mean(reciprocal_rank(ranking, expected) for ranking, (_, expected) in zip(rankings, questions)),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "build_seconds": build_seconds,
+        "load_seconds": probe_result["load_seconds"],
+        "index_mb": size_mb,
+        "peak_rss_mb": probe_result["peak_rss_mb"],
+    })
+    return result
+
+
+def run_benchmark(names, sections, questions, split_text, work_dir):
+    """Builds and queries every retriever in `names`. Returns the JSON-ready report."""
+    chunks = list(iter_statute_chunks(sections, split_text))
+    builds, embed_seconds = build_indexes(names, sections, chunks, work_dir)
+
+    questions_file = os.path.join(work_dir, "questions.json")
+    with open(questions_file, "w", encoding="utf-8") as f:
+        json.dump(questions, f)
+
+    results = {}
+    for name in names:
+        probe_result = run_probe(name, work_dir, questions_file, max(K_VALUES))
+        results[name] = score(questions, probe_result, builds[name], index_size_mb(name, work_dir))
+
+    return {
+        "corpus": {"sections": len(sections), "chunks": len(chunks), "questions": len(questions),
+                   "embedder": FakeEmbeddingBackend.model, "embed_seconds": embed_seconds},
+        "results": results,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    corpus = report["corpus"]
+    print(f"\nCorpus: {corpus['sections']} sections, {corpus['chunks']} chunks, {corpus['questions']} questions, "
+          f"embedder {corpus['embedder']} ({corpus['embed_seconds']:.1f}s to embed)")
+    columns = [f"recall@{k}" for k in K_VALUES] + ["mrr", "p50_ms", "p95_ms", "build_seconds", "index_mb", "peak_rss_mb"]
+    print(f"{'retriever':<12}" + "".join(f"{column:>14}" for column in columns))
+    for name, result in report["results"].items():
+        row = f"{name:<12}" + "".join(f"{result[column]:>14.3f}" for column in columns)
+        print(row)
+        previous = (baseline or {}).get("results", {}).get(name)
+        if previous:
+            print(f"{'  vs base':<12}" + "".join(f"{result[column] - previous.get(column, 0.0):>+14.3f}"
+                                                for column in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall, MRR, latency, build time and memory for each retriever.")
+    parser.add_argument("--input_file", default=None, help="Processed statutes .json/.jsonl (synthetic corpus if omitted)")
+    parser.add_argument("--questions_file", default=QUESTIONS_FILE, help="Labeled question -> sections set (.jsonl)")
+    parser.add_argument("--num_sections", type=int, default=20000, help="Synthetic corpus size")
+    parser.add_argument("--num_questions", type=int, default=300, help="Synthetic labeled questions")
+    parser.add_argument("--retrievers", default=",".join(RETRIEVERS), help="Comma-separated subset of " + ",".join(RETRIEVERS))
+    parser.add_argument("--splitter", choices=SPLITTERS + ("section",), default="recursive",
+                        help="recursive: the notebook's splitter; structure: statute_chunker.py; section: one chunk per section")
+    parser.add_argument("--output_file", default="retrieval_benchmark.json", help="Where to save the JSON report")
+    parser.add_argument("--baseline", default=None, help="A previous report to print deltas against")
+    parser.add_argument("--target_recall", type=float, default=None, help="Fail if any recall@5 is below this")
+    parser.add_argument("--target_p95_ms", type=float, default=None, help="Fail if any p95 latency is above this")
+    parser.add_argument("--probe", choices=RETRIEVERS, help=argparse.SUPPRESS)
+    parser.add_argument("--work_dir", help=argparse.SUPPRESS)
+    parser.add_argument("--max_k", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        probe(args.probe, args.work_dir, args.questions_file, args.max_k)
+        return
+
+    names = [name for name in args.retrievers.split(",") if name]
+    if "chroma" in names:
+        try:
+            import chromadb  # noqa: F401
+        except ImportError:
+            print("Chroma skipped - chromadb is not installed")
+            names.remove("chroma")
+
+    if args.input_file:
+        sections = list(iter_processed_sections(args.input_file))
+        questions = load_labeled_questions(args.questions_file, {section["section"] for section in sections})
+    else:
+        sections, questions = synthetic_corpus(args.num_sections, args.num_questions)
+    split_text = whole_section if args.splitter == "section" else make_splitter(args.splitter)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        report = run_benchmark(names, sections, questions, split_text, work_dir)
+    report["commit"] = git_commit()
+    report["config"] = {"input_file": args.input_file, "splitter": args.splitter,
+                        "questions_file": args.questions_file if args.input_file else "synthetic"}
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    with open(args.output_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {args.output_file}")
+
+    failures = [f"{name}: recall@5 {result['recall@5']:.3f} < {args.target_recall}"
+                for name, result in report["results"].items()
+                if args.target_recall is not None and result["recall@5"] < args.target_recall]
+    failures += [f"{name}: p95 {result['p95_ms']:.1f} ms > {args.target_p95_ms} ms"
+                 for name, result in report["results"].items()
+                 if args.target_p95_ms is not None and result["p95_ms"] > args.target_p95_ms]
+    if failures:
+        sys.exit("❌ " + "; ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
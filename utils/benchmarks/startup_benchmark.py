@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+
+# The commit before rag_pipeline became lazy, whose import opened Chroma and built every client
+EAGER_REV = "28504db^"
+
+# Runs in a fresh interpreter so every measurement is a true cold start
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import rag_pipeline
+t1 = time.perf_counter()
+result = {"import": t1 - t0}
+try:
+    pipeline = rag_pipeline.get_pipeline().warm_up()
+    t2 = time.perf_counter()
+    result["warm_up"] = t2 - t1
+
+    # Before the refactor every generate call built a new GenerativeModel
+    from google import generativeai as genai
+    t3 = time.perf_counter()
+    for _ in range(20):
+        genai.GenerativeModel(pipeline.model_name)
+    result["model_per_call"] = (time.perf_counter() - t3) / 20
+    t4 = time.perf_counter()
+    for _ in range(20):
+        pipeline.model
+    result["model_cached"] = (time.perf_counter() - t4) / 20
+except Exception as e:
+    result["error"] = f"{type(e).__name__}: {e}"
+print(json.dumps(result))
+"""
+
+# Imports the old module from a checkout of its commit, with the same working directory (./chroma_db)
+EAGER_PROBE = """
+import json, sys, time
+sys.path.insert(0, {tree!r})
+t0 = time.perf_counter()
+try:
+    import rag_pipeline
+    result = {{"import": time.perf_counter() - t0}}
+except Exception as e:
+    result = {{"error": f"{{type(e).__name__}}: {{e}}"}}
+print(json.dumps(result))
+"""
+
+
+def run_probe(code=PROBE):
+    output = subprocess.run([sys.executable, "-c", code], cwd=project_root, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def checkout_modules(rev, tree):
+    """Writes the top-level modules of `rev` into `tree`."""
+    names = subprocess.run(["git", "ls-tree", "--name-only", rev], cwd=project_root, capture_output=True, text=True,
+                           check=True).stdout.split()
+    for name in names:
+        if name.endswith(".py"):
+            source = subprocess.run(["git", "show", f"{rev}:{name}"], cwd=project_root, capture_output=True,
+                                    check=True).stdout
+            with open(os.path.join(tree, name), "wb") as f:
+                f.write(source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure rag_pipeline cold-start time.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to start")
+    parser.add_argument("--eager_rev", default=EAGER_REV, help="Commit whose rag_pipeline is the eager baseline")
+    args = parser.parse_args()
+
+    runs = [run_probe() for _ in range(args.runs)]
+    imports = [run["import"] for run in runs]
+    print(f"import rag_pipeline (lazy):          {statistics.median(imports) * 1000:.1f} ms median")
+
+    with tempfile.TemporaryDirectory() as tree:
+        checkout_modules(args.eager_rev, tree)
+        eager_runs = [run_probe(EAGER_PROBE.format(tree=tree)) for _ in range(args.runs)]
+    if "error" in eager_runs[0]:
+        print(f"import rag_pipeline (eager, {args.eager_rev}) failed ({eager_runs[0]['error']})")
+    else:
+        eager = statistics.median(run["import"] for run in eager_runs)
+        print(f"import rag_pipeline (eager, {args.eager_rev}): {eager * 1000:.1f} ms median")
+        print(f"Cold-start saved at import:            {(eager - statistics.median(imports)) * 1000:.1f} ms")
+
+    if "error" in runs[0]:
+        print(f"warm_up skipped ({runs[0]['error']}) - needs chromadb, google-generativeai and ./chroma_db")
+        return
+
+    warm_ups = [run["warm_up"] for run in runs]
+    print(f"warm_up() (client, collection, model): {statistics.median(warm_ups) * 1000:.1f} ms median")
+    print(f"GenerativeModel per call (old):        {statistics.median(r['model_per_call'] for r in runs) * 1e6:.1f} us")
+    print(f"Shared model handle (new):             {statistics.median(r['model_cached'] for r in runs) * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import os
+import re
+import sys
+from typing import Callable, Optional, Tuple
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from utils.organize_statutes import SECTION_NUMBER
+
+# How much of the end of a section the grammar looks at; footnote chains are rarely longer
+TAIL_CHARS = 1000
+# What the LLM fallback gets, same as the prompt-based pipeline
+LLM_TAIL_CHARS = 300
+
+# Session-law footnotes, following the forms listed in the extract_citations prompt:
+#   L.1997,c.278,s.2.
+#   Amended by L.1948, c. 329, p. 1312, s. 1;  L.1953, c. 4, p. 24, s. 4, eff. March 19, 1953.
+#   L.1987, c.453, s.2; amended 1995,c.401, ss.45,17 (s.17 amended 1996, c.15, s.2); 1996, c.15, s.1.
+#   L.1997, c.152, s.3 (repealed 2005, c.292, s.9.) 1997, c.152, s.5 (C.2A:4A-43.1).
+YEAR = r"(?:1[6-9]|20)\d{2}"
+# Digit runs are possessive, so a decimal part that is really the next law's year
+# ("s.2.1996, c.15") is ruled out by lookahead rather than by backtracking
+NUMBER = r"\d++[A-Z]?(?:\.\d++(?!\s*,\s*c\.))?"
+MONTH = r"(?:Jan|Feb|Mar|Apr|May|June?|July?|Aug|Sept?|Oct|Nov|Dec)[a-z]*\.?"
+# "ss.45,17" - a trailing number followed by ", c." is the next law's year, not a section
+SECTIONS = rf"ss?\.\s*{NUMBER}(?:\s*(?:,|-|to|and|&)\s*{NUMBER}(?!\s*,\s*c\.))*"
+EFFECTIVE = rf"eff\.\s*{MONTH}\s*\d{{1,2}}\s*,\s*{YEAR}"
+CODIFIED = rf"\(C\.\s*{SECTION_NUMBER}(?:\s*(?:to|,|and|&)\s*{SECTION_NUMBER})*\)"
+LAW = (rf"(?:P\.\s*)?(?:L\.\s*)?{YEAR}\s*,\s*c\.\s*{NUMBER}(?:\s*,\s*p\.\s*\d+)?(?:\s*,\s*{SECTIONS})?"
+       rf"(?:\s*(?:,\s*)?{EFFECTIVE})?(?:\s*{CODIFIED})?")
+VERB = r"(?:(?:amended|repealed|supplemented|renumbered|recodified)(?:\s+by)?|source:?)"
+CLAUSE = rf"(?:{VERB}\s+)?{LAW}"
+# One level of parentheticals, e.g. "(s.17 amended 1996, c.15, s.2)"
+NESTED = rf"\(\s*(?:{SECTIONS}\s+)?{CLAUSE}(?:\s*[;,]\s*{CLAUSE})*\s*\.?\s*\)"
+# Items are atomic and the chain repeat possessive: a chain that can't reach the end then
+# fails in linear time instead of retrying every way of splitting it into clauses
+ITEM = rf"(?>{CLAUSE}(?:\s*{NESTED})*+)"
+CHAIN = rf"{ITEM}(?:\s*(?:[;.,]\s*)?{ITEM})*+\s*[.;]?"
+
+# Anchored at the end: the leftmost start that still reaches the end is the whole footnote
+FOOTNOTE_PATTERN = re.compile(rf"(?<![\w.])({CHAIN})\s*$", re.IGNORECASE)
+
+# Every law has a chapter, and nothing in a footnote comes more than ~30 characters before
+# its first one, so the (slow) anchored search can start just before the first chapter
+CHAPTER_PATTERN = re.compile(r"[cC]\.\s*\d")
+MAX_PREFIX_CHARS = 60
+
+# Pieces of a footnote; if one sits in the tail outside the match, the grammar missed something
+CITATION_HINT = re.compile(rf"\bL\.\s*{YEAR}|\b{YEAR}\s*,\s*c\.\s*\d|\beff\.\s", re.IGNORECASE)
+# How far before a match to look for leftover footnote pieces
+HINT_CHARS = 80
+
+
+def match_citations(text: str) -> Tuple[str, bool]:
+    """
+    Extracts the trailing session-law footnote of a section with FOOTNOTE_PATTERN.
+
+    Returns (citations, confident). citations is the footnote exactly as it appears
+    in the text, or "None" like the LLM extractor. confident is False when something
+    that looks like a citation is left in the tail, i.e. a form the grammar doesn't know.
+    """
+    tail = text[-TAIL_CHARS:]
+    chapter = CHAPTER_PATTERN.search(tail)
+    match = chapter and FOOTNOTE_PATTERN.search(tail, max(0, chapter.start() - MAX_PREFIX_CHARS))
+    if match:
+        rest = tail[max(0, match.start() - HINT_CHARS):match.start()]
+        return match.group(1).strip(), not CITATION_HINT.search(rest)
+    return "None", not CITATION_HINT.search(tail[-LLM_TAIL_CHARS:])
+
+
+def extract_citations(text: str, fallback: Optional[Callable[[str], str]] = None) -> str:
+    """
+    Drop-in replacement for the LLM extract_citations: uses the grammar, and only
+    calls fallback (e.g. process_statute_text.extract_citations) with the last
+    LLM_TAIL_CHARS characters when the grammar isn't confident.
+    """
+    citations, confident = match_citations(text)
+    if not confident and fallback is not None:
+        return fallback(text[-LLM_TAIL_CHARS:])
+    return citations
@@ -0,0 +1,63 @@
+from typing import Tuple
+
+# How far before the end of the text (ignoring trailing whitespace) the citation may end,
+# e.g. a trailing "." the extractor left off
+DEFAULT_BUFFER = 8
+
+
+def _match_backwards(text: str, end: int, citation: str) -> int:
+    """
+    Matches the whitespace-free citation against text ending at `end`, walking
+    backwards and skipping whitespace in the text. Returns the start offset or -1.
+    """
+    i = end - 1
+    j = len(citation) - 1
+    while j >= 0:
+        if i < 0:
+            return -1
+        char = text[i]
+        if char.isspace():
+            i -= 1
+            continue
+        if char != citation[j]:
+            return -1
+        i -= 1
+        j -= 1
+    return i + 1
+
+
+def find_citation(text: str, citation: str, buffer: int = DEFAULT_BUFFER) -> Tuple[int, int]:
+    """
+    Finds an extracted citation at the end of a section, comparing without whitespace
+    (the extractor may respace "c. 329" as "c.329"). Only the last len(citation) + buffer
+    characters are looked at, so the cost doesn't depend on the section's length.
+
+    Returns the (start, end) offsets of the citation in text, or (-1, -1).
+    """
+    stripped_citation = "".join(citation.split())
+    if not stripped_citation:
+        return -1, -1
+
+    end = len(text)
+    while end > 0 and text[end - 1].isspace():
+        end -= 1
+
+    # The closest match to the end wins, so text in the body is never touched
+    for candidate in range(end, max(0, end - buffer - 1), -1):
+        if text[candidate - 1] != stripped_citation[-1]:
+            continue
+        start = _match_backwards(text, candidate, stripped_citation)
+        if start != -1:
+            return start, candidate
+    return -1, -1
+
+
+def remove_citation(text: str, citation: str, buffer: int = DEFAULT_BUFFER) -> Tuple[str, bool]:
+    """
+    Cuts the citation out of the end of text, keeping the body (and anything after
+    the citation, e.g. a trailing ".") exactly as it was. Returns (text, found).
+    """
+    start, end = find_citation(text, citation, buffer)
+    if start == -1:
+        return text, False
+    return text[:start] + text[end:], True
@@ -1,5 +1,14 @@
 import requests
 import json
+import os
+import sys
+
+# Add the current directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from citation_grammar import extract_citations as extract_citations_fast
+from citation_removal import remove_citation as strip_citation
 
 API_URL = "http://localhost:1234/v1/chat/completions"
 MODEL = "qwen/qwen2.5-coder-32b-instruct"
@@ -177,18 +186,7 @@ Output:
         raise ValueError(f"Unexpected response format: {response}")
     
 def remove_citation(truncated_text, original_text, extracted_citation, buffer=8, augmenting=False):
-    # Truncate last N characters + buffer as a search window
-    search_window = original_text[-(len(extracted_citation) + buffer):]
-
-    # Remove whitespace in both the citation and search window
-    stripped_citation = extracted_citation.replace(" ", "")
-    
-    # Replace original text with the search window with whitespace removed  
-    original_text_whitespace_removed = original_text[:-(len(extracted_citation) + buffer)] + search_window.replace(" ", "")
-
-
-    
-    if stripped_citation == "None":
+    if extracted_citation == "None":
         sample = {
             "prompt": f"Extract citations from: {truncated_text}",
             "completion": extracted_citation
@@ -197,13 +195,9 @@ def remove_citation(truncated_text, original_text, extracted_citation, buffer=8,
             fine_tuning_data.append(sample)
         return original_text
 
-      # Check if the citation is in the original text
-    # If it is, remove the citation from original text
-    if stripped_citation in original_text_whitespace_removed:
-        
-        #remove the citation from the original text
-        original_text_whitespace_removed = original_text_whitespace_removed.replace(stripped_citation, "")
-        
+    # Tail-anchored match that ignores whitespace; the body keeps its original spacing
+    text_removed_citations, found = strip_citation(original_text, extracted_citation, buffer)
+    if found:
         sample = {
             "prompt": f"Extract citations from: {truncated_text}",
             "completion": extracted_citation
@@ -211,10 +205,10 @@ def remove_citation(truncated_text, original_text, extracted_citation, buffer=8,
         if not augmenting:
             fine_tuning_data.append(sample)
         
-        #return the cleaned text and a similarity score of 100
-        return original_text_whitespace_removed
+        return text_removed_citations
         
     else:
+        search_window = original_text[-(len(extracted_citation) + buffer):]
         print("❌ Match not found in original string despite normalization")
         log_missed_citation(extracted_citation, original_text, search_window)
         print(f"Search window: {search_window}")
@@ -249,7 +243,8 @@ def process_statute_citations(file):
             print(truncated_text+"\n")
             print("Citations:")
             try:
-                citations = extract_citations(truncated_text)
+                # The grammar handles the usual footnotes; the model only sees tails it isn't sure about
+                citations = extract_citations_fast(text, fallback=extract_citations)
                 print(citations + "\n")
                 
                 text_removed_citations = remove_citation(truncated_text, text, citations) if citations != "None" else text
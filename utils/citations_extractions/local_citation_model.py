@@ -0,0 +1,250 @@
+import argparse
+import hashlib
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Sequence
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+sys.path.append(current_dir)
+
+from citation_grammar import LLM_TAIL_CHARS, match_citations
+
+FINETUNED_DIR = os.path.join(project_root, "qwen2.5-1.5b-finetuned")
+# Merged weights are written next to the checkpoints, one directory per adapter
+MERGED_DIR = os.path.join(FINETUNED_DIR, "merged")
+ADAPTER_WEIGHTS = ("adapter_model.safetensors", "adapter_model.bin")
+MERGE_MARKER = "merged_from.json"
+
+# The prompt the adapter was trained on (fine_tune_extract_data.py), completion = the footnote or "None"
+PROMPT_TEMPLATE = "Extract citations from: {text}"
+# A 300-character tail holds at most ~100 tokens of footnote, so decoding never needs to run longer
+MAX_NEW_TOKENS = 96
+# Tails decoded together; sorted by length first so a batch pads to about its own length
+BATCH_SIZE = 16
+# How long the first extract_citations call of a batch waits for others to join it
+MAX_WAIT_SECONDS = 0.02
+
+
+def latest_checkpoint(root: str = FINETUNED_DIR) -> str:
+    """The checkpoint-N directory with the highest N."""
+    checkpoints = [name for name in os.listdir(root) if re.fullmatch(r"checkpoint-\d+", name)]
+    if not checkpoints:
+        raise FileNotFoundError(f"No checkpoint-N directories in {root}")
+    return os.path.join(root, max(checkpoints, key=lambda name: int(name.split("-")[1])))
+
+
+def adapter_weights_file(adapter_path: str) -> str:
+    for name in ADAPTER_WEIGHTS:
+        path = os.path.join(adapter_path, name)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"{adapter_path} has no adapter weights ({' or '.join(ADAPTER_WEIGHTS)}); "
+                            f"copy them in from the training run's output directory")
+
+
+def adapter_fingerprint(adapter_path: str) -> str:
+    """Hash of the adapter config and weights, so a retrained adapter invalidates the merged copy."""
+    digest = hashlib.sha256()
+    for path in (os.path.join(adapter_path, "adapter_config.json"), adapter_weights_file(adapter_path)):
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_completion(completion: str) -> str:
+    """The footnote from a decoded completion: its first line, or "None" like the LLM extractor."""
+    lines = completion.strip().splitlines()
+    citations = lines[0].strip().strip('"') if lines else ""
+    return citations or "None"
+
+
+def length_buckets(lengths: Sequence[int], batch_size: int) -> List[List[int]]:
+    """Indexes grouped into batches of at most batch_size, shortest first."""
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+class LocalCitationModel:
+    """
+    In-process CPU runner for the fine-tuned Qwen2.5-1.5B citation adapter.
+
+    The LoRA adapter is merged into the base weights once and the merged model is
+    saved under MERGED_DIR, so later runs load one plain checkpoint. Tails are
+    decoded greedily in length-sorted batches, stopping at the first newline or
+    after max_new_tokens.
+
+    extract_citations has the same signature and output as
+    process_statute_text.extract_citations. Concurrent calls (e.g. from that
+    pipeline's worker pool) are collected into one batch by a background thread.
+    """
+
+    def __init__(self, adapter_path: str = None, merged_path: str = None, threads: int = None,
+                 batch_size: int = BATCH_SIZE, max_new_tokens: int = MAX_NEW_TOKENS,
+                 max_wait: float = MAX_WAIT_SECONDS):
+        self.adapter_path = adapter_path or latest_checkpoint()
+        self.merged_path = merged_path or os.path.join(MERGED_DIR, os.path.basename(os.path.normpath(self.adapter_path)))
+        self.threads = threads
+        self.batch_size = batch_size
+        self.max_new_tokens = max_new_tokens
+        self.max_wait = max_wait
+        self.sections = 0
+        self.decode_seconds = 0.0
+
+        self._model = None
+        self._tokenizer = None
+        self._load_lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    # -------------------------------
+    # Loading
+    # -------------------------------
+    def _merged_is_current(self, fingerprint: str) -> bool:
+        marker = os.path.join(self.merged_path, MERGE_MARKER)
+        if not os.path.exists(marker):
+            return False
+        with open(marker, "r") as f:
+            return json.load(f).get("fingerprint") == fingerprint
+
+    def merge(self) -> None:
+        """Merges the adapter into its base model and saves the result to merged_path."""
+        import torch
+        from peft import PeftModel
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        with open(os.path.join(self.adapter_path, "adapter_config.json"), "r") as f:
+            base_model = json.load(f)["base_model_name_or_path"]
+        fingerprint = adapter_fingerprint(self.adapter_path)
+
+        print(f"🔧 Merging {self.adapter_path} into {base_model}")
+        model = AutoModelForCausalLM.from_pretrained(base_model, torch_dtype=torch.float32)
+        model = PeftModel.from_pretrained(model, self.adapter_path).merge_and_unload()
+        os.makedirs(self.merged_path, exist_ok=True)
+        model.save_pretrained(self.merged_path)
+        AutoTokenizer.from_pretrained(base_model).save_pretrained(self.merged_path)
+        # Written last, so an interrupted merge is redone rather than half loaded
+        with open(os.path.join(self.merged_path, MERGE_MARKER), "w") as f:
+            json.dump({"adapter": self.adapter_path, "base_model": base_model, "fingerprint": fingerprint}, f)
+
+    def load(self) -> "LocalCitationModel":
+        with self._load_lock:
+            if self._model is not None:
+                return self
+            import torch
+            from transformers import AutoModelForCausalLM, AutoTokenizer
+
+            if not self._merged_is_current(adapter_fingerprint(self.adapter_path)):
+                self.merge()
+            if self.threads:
+                torch.set_num_threads(self.threads)
+
+            tokenizer = AutoTokenizer.from_pretrained(self.merged_path)
+            # Prompts are padded on the left so every row's next token comes right after its prompt
+            tokenizer.padding_side = "left"
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
+            model = AutoModelForCausalLM.from_pretrained(self.merged_path, torch_dtype=torch.float32)
+            model.eval()
+            self._tokenizer, self._model = tokenizer, model
+        return self
+
+    # -------------------------------
+    # Decoding
+    # -------------------------------
+    def extract_citations_batch(self, texts: Sequence[str]) -> List[str]:
+        """Citations ("None" if there are none) for each text's last LLM_TAIL_CHARS characters."""
+        import torch
+
+        self.load()
+        prompts = [PROMPT_TEMPLATE.format(text=text[-LLM_TAIL_CHARS:]) for text in texts]
+        lengths = [len(ids) for ids in self._tokenizer(prompts)["input_ids"]]
+        results = [None] * len(prompts)
+
+        start = time.perf_counter()
+        for batch in length_buckets(lengths, self.batch_size):
+            inputs = self._tokenizer([prompts[i] for i in batch], return_tensors="pt", padding=True)
+            with torch.inference_mode():
+                outputs = self._model.generate(**inputs, max_new_tokens=self.max_new_tokens, do_sample=False,
+                                               num_beams=1, pad_token_id=self._tokenizer.pad_token_id,
+                                               stop_strings=["\n"], tokenizer=self._tokenizer)
+            completions = self._tokenizer.batch_decode(outputs[:, inputs["input_ids"].shape[1]:],
+                                                       skip_special_tokens=True)
+            for i, completion in zip(batch, completions):
+                results[i] = parse_completion(completion)
+        self.decode_seconds += time.perf_counter() - start
+        self.sections += len(prompts)
+        return results
+
+    def extract_citations(self, text, session=None, api_url=None):
+        """Drop-in for process_statute_text.extract_citations; session and api_url are ignored."""
+        future = Future()
+        self._requests.put((text, future))
+        self._start_worker()
+        return future.result()
+
+    def _start_worker(self):
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._serve, daemon=True)
+                self._worker.start()
+
+    def _serve(self):
+        while True:
+            pending = [self._requests.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(pending) < self.batch_size:
+                try:
+                    pending.append(self._requests.get(timeout=max(deadline - time.perf_counter(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                citations = self.extract_citations_batch([text for text, _ in pending])
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+            else:
+                for (_, future), result in zip(pending, citations):
+                    future.set_result(result)
+
+    def sections_per_second(self) -> float:
+        return self.sections / self.decode_seconds if self.decode_seconds else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode section tails with the fine-tuned citation model on CPU.")
+    parser.add_argument("--input_file", default="data/processed/processed_nj_statutes_sample.json",
+                        help="Processed statutes JSON")
+    parser.add_argument("--adapter", default=None, help="LoRA checkpoint directory (default: the latest)")
+    parser.add_argument("--limit", type=int, default=200, help="Sections to decode")
+    parser.add_argument("--batch_size", type=int, default=BATCH_SIZE, help="Tails decoded together")
+    parser.add_argument("--max_new_tokens", type=int, default=MAX_NEW_TOKENS, help="Decode length cap")
+    parser.add_argument("--threads", type=int, default=None, help="Torch threads")
+    args = parser.parse_args()
+
+    with open(args.input_file, "r") as f:
+        texts = [section["text"] for title in json.load(f) for section in title["sections"]][:args.limit]
+
+    model = LocalCitationModel(args.adapter, threads=args.threads, batch_size=args.batch_size,
+                               max_new_tokens=args.max_new_tokens).load()
+    citations = model.extract_citations_batch(texts)
+
+    # The grammar is right on the common footnote forms, so agreement with it is a cheap quality check
+    agree = sum(citation == match_citations(text)[0] for text, citation in zip(texts, citations))
+    print(f"✅ {model.sections} sections in {model.decode_seconds:.1f}s ({model.sections_per_second():.2f} sections/s), "
+          f"batch {args.batch_size}, max_new_tokens {args.max_new_tokens}; "
+          f"agrees with the grammar on {agree}/{len(texts)}")
+
+
+if __name__ == "__main__":
+    main()
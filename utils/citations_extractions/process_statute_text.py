@@ -1,23 +1,55 @@
 import requests
+import argparse
 import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
+
+# Add the current directory to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from citation_grammar import extract_citations as extract_citations_fast
+from citation_removal import remove_citation as strip_citation
 
 API_URL = "http://localhost:1234/v1/chat/completions"
 MODEL = "qwen2.5-coder-7b-instruct"
 DRAFT_MODEL = "qwen2.5-coder-0.5b-instruct"
 
-#Add logging of missed citations to a file
-missed_citations = []
+# A local inference server only decodes a few requests at once; more workers just queue
+MAX_WORKERS = 4
+REQUEST_TIMEOUT = 120
+
+INPUT_FILE = "data/processed/processed_nj_statutes_sample.json"
+OUTPUT_FILE = "data/processed/citations_removed_nj_statutes_sample.jsonl"
+MISSED_CITATIONS_FILE = "data/processed/missed_citations.jsonl"
 
+_missed_lock = threading.Lock()
+
+#Add logging of missed citations to a file (appended, one JSON object per line)
 def log_missed_citation(citation, original_text, search_window):
-    missed_citations.append({
+    record = json.dumps({
         "citation": citation,
         "original_text": original_text,
         "search_window": search_window
     })
-    with open('data/processed/missed_citations.json', 'w') as f:
-        json.dump(missed_citations, f)
+    os.makedirs(os.path.dirname(MISSED_CITATIONS_FILE) or ".", exist_ok=True)
+    with _missed_lock, open(MISSED_CITATIONS_FILE, 'a') as f:
+        f.write(record + "\n")
+
+def make_session(pool_size=MAX_WORKERS):
+    """One keep-alive connection per worker instead of a new TCP connection per request."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
-def generate_response(prompt):
+def generate_response(prompt, session=None, api_url=None):
     payload = {
         "model": MODEL,
         "messages": [
@@ -47,10 +79,10 @@ def generate_response(prompt):
         }
     }
 
-    response = requests.post(API_URL, json=payload)
+    response = (session or requests).post(api_url or API_URL, json=payload, timeout=REQUEST_TIMEOUT)
     return response.json()
 
-def extract_citations(text):
+def extract_citations(text, session=None, api_url=None):
     prompt = f"""
 Extract citations and legislative footnotes from the text matching the following patterns:
 - "L.[year], c.[number], s.[number]"
@@ -123,7 +155,7 @@ Output:
 {text}
 """
 
-    response = generate_response(prompt)
+    response = generate_response(prompt, session, api_url)
 
     if "choices" in response and response["choices"]:
         try:
@@ -137,87 +169,181 @@ Output:
         raise ValueError(f"Unexpected response format: {response}")
     
 def remove_citation(original_text, extracted_citation, buffer=8):
-    # Truncate last N characters + buffer as a search window
-    search_window = original_text[-(len(extracted_citation) + buffer):]
+    # Tail-anchored match that ignores whitespace; the body keeps its original spacing
+    text_removed_citations, found = strip_citation(original_text, extracted_citation, buffer)
+    if found:
+        return text_removed_citations
 
-    # Remove whitespace in both the citation and search window
-    stripped_citation = extracted_citation.replace(" ", "")
-    
-    # Replace original text with the search window with whitespace removed  
-    original_text_whitespace_removed = original_text[:-(len(extracted_citation) + buffer)] + search_window.replace(" ", "")
-
-    # Check if the citation is in the original text
-    # If it is, remove the citation from original text
-    if stripped_citation in original_text_whitespace_removed:
-        
-        #remove the citation from the original text
-        original_text_whitespace_removed = original_text_whitespace_removed.replace(stripped_citation, "")
-        
-        #return the cleaned text and a similarity score of 100
-        return original_text_whitespace_removed
-        
-    else:
-        print("❌ Match not found in original string despite normalization")
-        log_missed_citation(extracted_citation, original_text, search_window)
-        print(f"Search window: {search_window}")
-        return original_text
+    search_window = original_text[-(len(extracted_citation) + buffer):]
+    print("❌ Match not found in original string despite normalization")
+    log_missed_citation(extracted_citation, original_text, search_window)
+    print(f"Search window: {search_window}")
+    return original_text
 
 
 '''
-Output file format: Json
-
-[
-    {
-        "id": "1:1-1" (section numer)
-        "title": <TITLE>,
-        "section_id": <section number and heading>,
-        "text": <text without citations>,
-        "citations": <citations found in the text or "None">
-    },
-    ...
-]
+Output file format: JSON Lines, one object per section, appended as each section finishes
 
+{"id": "1:1-1" (section numer), "title": <TITLE>, "section_id": <section number and heading>,
+ "text": <text without citations>, "citations": <citations found in the text or "None">}
+
+A rerun after a crash skips the sections whose records are already in the output.
 '''
 
-def process_statute_citations(file):
-    processed_file = []
-    for title in file:
-        for section in title['sections']:
-            text = section['text']
-            truncated_text = text[-300:]
-            
-            print("="*25)
-            print(f"Original text: {section['section']}")
-            print(truncated_text+"\n")
-            print("Citations:")
-            try:
-                citations = extract_citations(truncated_text)
-                print(citations + "\n")
-                
-                text_removed_citations = remove_citation(text, citations) if citations != "None" else (text, "")
-                print(f"Text removed citations: \n{text_removed_citations} \n")
-                print("="*25)
-                
-            except Exception as e:
-                print(f"Error: {e}")
-            
-            processed_file.append({
-                "id": section['section'],
-                "title": title['title'],
-                "section_id": section['section'] + " " + section['heading'],
-                "text": truncated_text,
-                "citations": citations
-            })
-            
-    # Write the processed text to a new file
-    with open('data/processed/citations_removed_nj_statutes_sample.json', 'w') as f:
-        json.dump(processed_file, f)
+def load_done_ids(output_file):
+    """
+    Ids of the sections with a complete record in output_file. A last line cut off
+    by a crash is removed, so the next record starts on a line of its own and that
+    section is redone.
+    """
+    if not os.path.exists(output_file):
+        return set()
+    done = set()
+    complete = 0
+    with open(output_file, 'r+b') as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            done.add(json.loads(line)["id"])
+            complete += len(line)
+        f.truncate(complete)
+    return done
 
 
-if __name__ == "__main__":
-    with open('data/processed/processed_nj_statutes_sample.json', 'r') as f:
+def process_section(title, section, session, api_url, use_grammar=True, extract=extract_citations):
+    """Extracts and removes one section's citations. Returns (record, seconds, used_llm)."""
+    text = section['text']
+    truncated_text = text[-300:]
+    llm_calls = []
+
+    def llm(tail):
+        llm_calls.append(tail)
+        return extract(tail, session, api_url)
+
+    start = time.perf_counter()
+    # The grammar handles the usual footnotes; the model only sees tails it isn't sure about
+    citations = extract_citations_fast(text, fallback=llm) if use_grammar else llm(truncated_text)
+    text_removed_citations = remove_citation(text, citations) if citations != "None" else text
+    elapsed = time.perf_counter() - start
+
+    record = {
+        "id": section['section'],
+        "title": title['title'],
+        "section_id": section['section'] + " " + section['heading'],
+        "text": text_removed_citations,
+        "citations": citations
+    }
+    return record, elapsed, bool(llm_calls)
+
+
+def process_statute_citations(file, output_file=OUTPUT_FILE, workers=MAX_WORKERS, api_url=None, use_grammar=True,
+                              extract=extract_citations):
+    """
+    Runs citation extraction over every section with a bounded pool of workers sharing
+    one pooled HTTP session. Results are appended to output_file as they finish, and
+    sections already in it are skipped, so an interrupted run resumes where it stopped.
+    Returns a throughput/latency report.
+
+    extract replaces the model server call, e.g. LocalCitationModel.extract_citations.
+    """
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    done = load_done_ids(output_file)
+    skipped = 0
+
+    def iter_pending():
+        # Counts only this input's sections, not every id in the output
+        nonlocal skipped
+        for title in file:
+            for section in title['sections']:
+                if section['section'] in done:
+                    skipped += 1
+                else:
+                    yield title, section
+
+    pending_sections = iter_pending()
+
+    session = make_session(workers)
+    latencies = []
+    llm_calls = 0
+    errors = 0
+    start = time.perf_counter()
+
+    with open(output_file, 'a') as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+
+        def submit_next():
+            for title, section in pending_sections:
+                future = pool.submit(process_section, title, section, session, api_url, use_grammar, extract)
+                in_flight[future] = section['section']
+                return
+
+        # Keep the queue bounded so a large corpus isn't loaded into futures all at once
+        for _ in range(workers * 2):
+            submit_next()
+
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                section_id = in_flight.pop(future)
+                try:
+                    record, elapsed, used_llm = future.result()
+                except Exception as e:
+                    # Not written, so the next run retries it
+                    errors += 1
+                    print(f"Error: {section_id}: {e}")
+                else:
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+                    latencies.append(elapsed)
+                    llm_calls += used_llm
+                submit_next()
+
+    session.close()
+    total_time = time.perf_counter() - start
+    latencies.sort()
+    report = {
+        "processed": len(latencies),
+        "skipped": skipped,
+        "errors": errors,
+        "llm_calls": llm_calls,
+        "seconds": total_time,
+        "sections_per_second": len(latencies) / total_time if total_time else 0.0,
+        "p50_latency": statistics.median(latencies) if latencies else 0.0,
+        "p95_latency": latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+    }
+    print(f"✅ {report['processed']} sections in {total_time:.1f}s ({report['sections_per_second']:.1f}/s), "
+          f"skipped {report['skipped']}, errors {errors}, LLM calls {llm_calls}, "
+          f"latency p50 {report['p50_latency']:.2f}s p95 {report['p95_latency']:.2f}s")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract and remove citations from processed statutes.")
+    parser.add_argument("--input_file", default=INPUT_FILE, help="Processed statutes JSON")
+    parser.add_argument("--output_file", default=OUTPUT_FILE, help="JSONL output (resumes if it exists)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Concurrent requests to the model server")
+    parser.add_argument("--api_url", default=API_URL, help="OpenAI-compatible chat completions endpoint")
+    parser.add_argument("--llm_only", action="store_true", help="Send every section to the model")
+    parser.add_argument("--local_model", nargs="?", const="latest", default=None,
+                        help="Decode in-process with the fine-tuned LoRA checkpoint (default: the latest) "
+                             "instead of calling the model server")
+    parser.add_argument("--threads", type=int, default=None, help="Torch threads for --local_model")
+    args = parser.parse_args()
+
+    with open(args.input_file, 'r') as f:
         file = json.load(f)
-    
-    process_statute_citations(file)
 
-    
+    extract, workers = extract_citations, args.workers
+    if args.local_model:
+        from local_citation_model import LocalCitationModel
+        model = LocalCitationModel(None if args.local_model == "latest" else args.local_model,
+                                   threads=args.threads).load()
+        # Workers only queue tails; enough of them to fill every decode batch
+        extract, workers = model.extract_citations, max(args.workers, 2 * model.batch_size)
+
+    process_statute_citations(file, args.output_file, workers, args.api_url, use_grammar=not args.llm_only,
+                              extract=extract)
+
+
+if __name__ == "__main__":
+    main()
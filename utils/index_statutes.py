@@ -0,0 +1,209 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+from answer_cache import bump_index_version
+from citation_index import CitationIndex, DEFAULT_INDEX_PATH as DEFAULT_CITATION_INDEX_PATH
+from embedding_engine import EMBEDDING_BACKEND_KEY, check_embedding_backend, recorded_embedding_backend
+from utils.organize_statutes import iter_processed_sections
+from utils.statute_documents import (SPLITTER_KEY, SPLITTERS, check_splitter, iter_statute_chunks, make_splitter,
+                                     recorded_splitter, splitter_id)
+
+DEFAULT_INPUT = os.path.join(project_root, "data/processed/processed_nj_statutes.json")
+CHROMA_PATH = "./chroma_db"
+COLLECTION_NAME = "nj_statutes_test_chunks"
+CURSOR_FILE = "index_statutes.cursor.json"
+
+# Chunks per upsert. Chroma accepts up to client.get_max_batch_size() (~5k on SQLite);
+# bigger batches mostly cost memory, since embeddings come back as Python lists
+UPSERT_BATCH_SIZE = 2000
+# Concurrent embedding requests within a batch
+EMBED_WORKERS = 8
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    items = iter(items)
+    while True:
+        batch = list(itertools.islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+class IndexCursor:
+    """
+    Persists how many chunks of the input stream are safely upserted, so a run that
+    dies can pick up where it stopped. The cursor is tied to the input file's size
+    and mtime (and the splitter, which decides the chunk positions) and ignored if
+    either changes.
+    """
+
+    def __init__(self, path: str, input_file: str = None, splitter: str = None):
+        self.path = path
+        self.fingerprint = None
+        if input_file:
+            stat = os.stat(input_file)
+            self.fingerprint = {"input_file": os.path.abspath(input_file), "size": stat.st_size,
+                                "mtime": stat.st_mtime}
+            if splitter:
+                self.fingerprint["splitter"] = splitter
+
+    def load(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("fingerprint") != self.fingerprint:
+            print("⚠️ Input changed since the last run, starting from the beginning")
+            return 0
+        return state["position"]
+
+    def save(self, position: int, last_id: str = None) -> None:
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"position": position, "last_id": last_id, "fingerprint": self.fingerprint}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def index_statutes(collection, sections: Iterable[dict], embedding_function, split_text=None,
+                   batch_size: int = UPSERT_BATCH_SIZE, cursor: IndexCursor = None) -> dict:
+    """
+    Streams chunks from sections into the collection: each batch is embedded (the
+    embedding function fans out parallel requests) while the previous batch is being
+    upserted, and the cursor advances once an upsert lands. Returns run stats.
+    """
+    start_position = cursor.load() if cursor else 0
+    if start_position:
+        print(f"⏩ Resuming after {start_position} chunks")
+    chunks = itertools.islice(iter_statute_chunks(sections, split_text), start_position, None)
+
+    stats = {"skipped": start_position, "indexed": 0, "embed_seconds": 0.0, "upsert_seconds": 0.0}
+    started = time.perf_counter()
+
+    def upsert(batch, embeddings):
+        upsert_start = time.perf_counter()
+        collection.upsert(ids=[chunk[0] for chunk in batch], embeddings=embeddings,
+                          documents=[chunk[1] for chunk in batch], metadatas=[chunk[2] for chunk in batch])
+        stats["upsert_seconds"] += time.perf_counter() - upsert_start
+
+    def commit(future, position, last_id):
+        future.result()
+        stats["indexed"] = position - start_position
+        if cursor:
+            cursor.save(position, last_id)
+        elapsed = time.perf_counter() - started
+        print(f"📄 Indexed {position} chunks ({stats['indexed'] / elapsed:.1f} docs/s)")
+
+    position = start_position
+    with ThreadPoolExecutor(max_workers=1) as upserter:
+        pending = None
+        for batch in batched(chunks, batch_size):
+            embed_start = time.perf_counter()
+            embeddings = embedding_function([chunk[1] for chunk in batch])
+            stats["embed_seconds"] += time.perf_counter() - embed_start
+
+            # At most one upsert in flight, so the cursor only ever covers finished batches
+            if pending:
+                commit(*pending)
+            position += len(batch)
+            pending = (upserter.submit(upsert, batch, embeddings), position, batch[-1][0])
+        if pending:
+            commit(*pending)
+
+    if cursor:
+        cursor.clear()
+    stats["seconds"] = time.perf_counter() - started
+    stats["docs_per_second"] = stats["indexed"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def open_collection(client, name: str, embedding_function, splitter: str = "recursive", change_splitter: bool = False):
+    """
+    get_or_create_collection that records embedding_function's backend and the
+    splitter on an empty collection, and refuses to add to one that was embedded with
+    another backend or chunked by another splitter (unless change_splitter, for a
+    run that deletes the old chunks; it records the new splitter when done).
+    """
+    collection = client.get_or_create_collection(name=name, embedding_function=embedding_function)
+    if collection.count() == 0:
+        collection.modify(metadata={**(collection.metadata or {}), EMBEDDING_BACKEND_KEY: embedding_function.backend_id,
+                                    SPLITTER_KEY: splitter_id(splitter)})
+    else:
+        check_embedding_backend(recorded_embedding_backend(collection), embedding_function)
+        if not change_splitter:
+            check_splitter(recorded_splitter(collection), splitter_id(splitter))
+    return collection
+
+
+def publish_index(collection, chroma_path: str, citation_index_path: str, embedding_function=None) -> None:
+    """What has to follow any change to the collection for the app to see it."""
+    # Invalidate answers cached by rag_pipeline against the previous index
+    index_version = bump_index_version(chroma_path)
+    # Section number -> chunks, for questions that cite a section directly
+    CitationIndex.from_collection(collection, index_version=index_version).save(citation_index_path)
+    cache = getattr(embedding_function, "cache", None)
+    if cache is not None:
+        cache.flush()
+
+
+def main():
+    from rag_pipeline import RagPipeline
+
+    parser = argparse.ArgumentParser(description="Index processed statutes into Chroma (resumable).")
+    parser.add_argument("--input_file", default=DEFAULT_INPUT, help="Processed statutes (.json or .jsonl)")
+    parser.add_argument("--chroma_path", default=CHROMA_PATH, help="Chroma persistent directory")
+    parser.add_argument("--collection", default=COLLECTION_NAME, help="Collection name")
+    parser.add_argument("--citation_index", default=DEFAULT_CITATION_INDEX_PATH, help="Citation index to rebuild")
+    parser.add_argument("--batch_size", type=int, default=UPSERT_BATCH_SIZE, help="Chunks per upsert")
+    parser.add_argument("--workers", type=int, default=EMBED_WORKERS, help="Concurrent embedding requests")
+    parser.add_argument("--embedding_processes", type=int, default=0,
+                        help="Worker processes for EMBEDDING_BACKEND=local (0: embed in this process)")
+    parser.add_argument("--restart", action="store_true", help="Ignore the resume cursor")
+    parser.add_argument("--splitter", choices=SPLITTERS, default="recursive",
+                        help="recursive: the notebook's splitter; structure: statute_chunker.py")
+    args = parser.parse_args()
+
+    # Same client and embedding function (EMBEDDING_BACKEND) the app queries with
+    pipeline = RagPipeline(chroma_path=args.chroma_path, collection_name=args.collection)
+    embedding_function = pipeline.embedding_function
+    if pipeline.embedding_backend == "local":
+        # Parallelism comes from torch threads or worker processes, not concurrent requests
+        embedding_function.engine.backend.processes = args.embedding_processes
+    else:
+        embedding_function.engine.max_workers = args.workers
+    collection = open_collection(pipeline.chroma_client, args.collection, embedding_function, args.splitter)
+    batch_size = min(args.batch_size, pipeline.chroma_client.get_max_batch_size())
+
+    cursor = IndexCursor(os.path.join(args.chroma_path, CURSOR_FILE), args.input_file, args.splitter)
+    if args.restart:
+        cursor.clear()
+
+    try:
+        stats = index_statutes(collection, iter_processed_sections(args.input_file), embedding_function,
+                               make_splitter(args.splitter), batch_size=batch_size, cursor=cursor)
+    finally:
+        if hasattr(embedding_function, "close"):
+            embedding_function.close()
+    publish_index(collection, args.chroma_path, args.citation_index, embedding_function)
+
+    print(f"🎉 Indexed {stats['indexed']} chunks ({stats['skipped']} already done) in {stats['seconds']:.1f}s: "
+          f"{stats['docs_per_second']:.1f} docs/s, embedding {stats['embed_seconds']:.1f}s, "
+          f"upserts {stats['upsert_seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,11 @@ import os
 import sys
 import re
 import heapq
-from typing import List, Dict, Any
+import io
+import mmap
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, Set, Tuple
 
 # Add the current directory to the Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -14,9 +18,12 @@ sys.path.append(project_root)
 # Patterns to detect title and sections
 title_pattern = re.compile(r"^TITLE\s(\d+[A-Z]*)\s+(.+)$")
 
+# Section number grammar, e.g. 2A:52-1 or 54A:9-25.1 (also used to spot citations in questions)
+SECTION_NUMBER = r"\d+[A-Z]*(?::[0-9A-Za-z]+)-[0-9A-Za-z]+(?:\.[0-9A-Za-z]+)*"
+
 # Section pattern
 section_pattern = re.compile(
-    r"^(\d+[A-Z]*(?::[0-9A-Za-z]+)-[0-9A-Za-z]+(?:\.[0-9A-Za-z]+)*)(?:\.)?\s+(.+)$"
+    rf"^({SECTION_NUMBER})(?:\.)?\s+(.+)$"
 )
 
 # Paths for test defaults - using absolute paths
@@ -27,14 +34,8 @@ LOG_FILE = os.path.join(project_root, "logs/encoding_issues.log")
 def clean_line(line):
     """Detects and replaces problematic characters without logging them."""
     line = line.rstrip('\n')  # Remove trailing newlines
-    cleaned_line = ""
-    for char in line:
-        try:
-            char.encode("utf-8")  # Try encoding to UTF-8
-            cleaned_line += char
-        except UnicodeEncodeError:
-            cleaned_line += "?"  # Replace with '?' or another placeholder
-    return cleaned_line
+    # Characters that can't be encoded to UTF-8 (lone surrogates) become '?'
+    return line.encode("utf-8", errors="replace").decode("utf-8")
 
 
 def get_top_sections_by_word_count(parsed_data: List[Dict], n: int = 10) -> List[Dict]:
@@ -65,6 +66,20 @@ def get_top_sections_by_word_count(parsed_data: List[Dict], n: int = 10) -> List
     return top_sections
 
 
+def top_sections_by_word_count(sections: Iterable[Dict], n: int = 10) -> List[Dict]:
+    """
+    Same as get_top_sections_by_word_count, but over flat section dicts (e.g. from
+    iter_processed_sections), holding only the current top n in memory.
+    """
+    counted = ({
+        "title": section["title"],
+        "section": section["section"],
+        "heading": section["heading"],
+        "word_count": len(section["text"].split())
+    } for section in sections)
+    return heapq.nlargest(n, counted, key=lambda x: x["word_count"])
+
+
 def parse_statutes(input_file, output_file):
     """Parses STATUTES.txt into structured JSON format, handling duplicate section numbers."""
     parsed_data = []
@@ -134,6 +149,222 @@ def parse_statutes(input_file, output_file):
 
     return parsed_data
 
+class SectionBuffer:
+    """
+    Accumulates a section's text as a list of parts instead of growing a string
+    with +=, which is quadratic on long sections. Follows the same spacing rules
+    as parse_statutes.
+    """
+
+    __slots__ = ("section", "heading", "parts", "has_text")
+
+    def __init__(self, section, heading):
+        self.section = section
+        self.heading = heading
+        self.parts = []
+        self.has_text = False
+
+    def add_line(self, line):
+        # Add a space instead of newline character
+        if self.has_text:
+            self.parts.append(" ")
+            self.parts.append(line)
+        else:
+            self.parts = [line]
+            self.has_text = bool(line)
+
+    def add_duplicate(self, line):
+        # A repeated section header line is appended as-is, without a space
+        self.parts.append(line)
+        self.has_text = self.has_text or bool(line)
+
+    def to_dict(self):
+        return {"section": self.section, "heading": self.heading, "text": "".join(self.parts)}
+
+
+def iter_statute_sections(lines: Iterable[str], seen_sections: Set[str] = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Streaming version of parse_statutes: yields (title, section) pairs as soon as
+    each section closes, so memory stays flat regardless of input size.
+    Duplicate section numbers are handled exactly like parse_statutes; pass
+    `seen_sections` to continue from sections already parsed (it is updated).
+    """
+    current_title = None
+    seen_sections = set() if seen_sections is None else seen_sections  # Track seen section numbers
+    last_section = None  # The open section, yielded when the next one starts
+
+    for line in lines:
+        # Detect title
+        title_match = title_pattern.match(line)
+        if title_match:
+            if last_section:
+                yield current_title, last_section.to_dict()
+            current_title = f"TITLE {title_match.group(1)} - {title_match.group(2)}"
+            last_section = None  # Reset last processed section
+            continue
+
+        # Detect section
+        section_match = section_pattern.match(line)
+        if section_match:
+            section_number = section_match.group(1)
+
+            # If section is a duplicate but appears consecutively, append text instead of skipping
+            if section_number in seen_sections:
+                if last_section and last_section.section == section_number:
+                    last_section.add_duplicate(clean_line(line))
+                continue
+
+            seen_sections.add(section_number)
+            if last_section:
+                yield current_title, last_section.to_dict()
+            last_section = SectionBuffer(section_number, section_match.group(2))
+            continue
+
+        if last_section:
+            last_section.add_line(clean_line(line))
+
+    if last_section:
+        yield current_title, last_section.to_dict()
+
+
+def write_jsonl(records: Iterable[Tuple[str, Dict]], output_file) -> int:
+    """Writes (title, section) pairs as one JSON object per line. Returns the number written."""
+    count = 0
+    with open(output_file, "w", encoding="utf-8") as f:
+        for title, section in records:
+            f.write(json.dumps({"title": title, **section}))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def parse_statutes_stream(input_file, output_file):
+    """Parses STATUTES.txt into JSON Lines (one section per line) with constant memory."""
+    # Ensure the output directory exists
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+
+    with open(input_file, "r", encoding="utf-8", errors="replace") as f:
+        return write_jsonl(iter_statute_sections(f), output_file)
+
+
+def find_title_offsets(input_file) -> List[int]:
+    """
+    Byte offsets of every line that title_pattern matches, found by scanning a
+    memory-mapped copy of the file instead of decoding it.
+    """
+    if os.path.getsize(input_file) == 0:
+        return []
+
+    offsets = []
+    with open(input_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        def next_candidate(start):
+            found = mm.find(b"\nTITLE", start)
+            return -1 if found == -1 else found + 1
+
+        position = 0 if mm[:5] == b"TITLE" else next_candidate(0)
+        while position != -1:
+            end = mm.find(b"\n", position)
+            # Text mode also ends a line at a lone \r, so only look at the part before it
+            line = mm[position:end if end != -1 else len(mm)].split(b"\r", 1)[0]
+            if title_pattern.match(line.decode("utf-8", errors="replace")):
+                offsets.append(position)
+            position = next_candidate(position)
+    return offsets
+
+
+def shard_ranges(input_file, num_shards) -> List[Tuple[int, int]]:
+    """
+    Splits the file into (start, end) byte ranges that each begin at a TITLE line
+    (except the first, which also holds anything before the first title), grouping
+    whole titles so each range is roughly size / num_shards bytes.
+    """
+    size = os.path.getsize(input_file)
+    target = size / max(num_shards, 1)
+    ranges = []
+    start = 0
+    for offset in find_title_offsets(input_file):
+        if offset - start >= target:
+            ranges.append((start, offset))
+            start = offset
+    ranges.append((start, size))
+    return ranges
+
+
+def _read_shard(input_file, start, end):
+    with open(input_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[start:end]
+    # Same decoding and newline handling as open(..., "r", errors="replace")
+    return io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", errors="replace")
+
+
+def _parse_shard(task):
+    """
+    Parses one byte range into its (title, section) pairs in a worker process.
+
+    Every range but the first starts at a TITLE line, which closes the open
+    section, so no section spans two shards. Only duplicate detection crosses
+    them: a header whose number an earlier shard already saw is no new section.
+    The shard can't know that, so it parses as if it were first and also returns
+    the section numbers it opened, for iter_statute_sections_parallel to check.
+    """
+    sections = list(iter_statute_sections(_read_shard(*task)))
+    return sections, {section["section"] for _, section in sections}
+
+
+def iter_statute_sections_parallel(input_file, workers=None, shards_per_worker=4) -> Iterator[Tuple[str, Dict]]:
+    """
+    Parallel version of iter_statute_sections over a file: shards are parsed in a
+    process pool and their sections yielded in file order. The rare shard that
+    opens a section number seen in an earlier shard is parsed again here against
+    every number seen so far, so the output is identical to the serial parser.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = [(input_file, start, end) for start, end in shard_ranges(input_file, workers * shards_per_worker)]
+
+    seen_sections = set()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep a bounded number of shards in flight so memory doesn't grow with the file
+        pending = deque(pool.submit(_parse_shard, task) for task in tasks[:workers * 2])
+        next_task = workers * 2
+
+        for task in tasks:
+            sections, opened = pending.popleft().result()
+            if next_task < len(tasks):
+                pending.append(pool.submit(_parse_shard, tasks[next_task]))
+                next_task += 1
+
+            if seen_sections.isdisjoint(opened):
+                seen_sections |= opened
+                yield from sections
+            else:
+                yield from iter_statute_sections(_read_shard(*task), seen_sections)
+
+
+def parse_statutes_parallel(input_file, output_file, workers=None):
+    """Parses STATUTES.txt into JSON Lines using a process pool. Output matches parse_statutes_stream."""
+    # Ensure the output directory exists
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    return write_jsonl(iter_statute_sections_parallel(input_file, workers), output_file)
+
+
+def iter_processed_sections(path) -> Iterator[Dict]:
+    """
+    Yields flat section dicts ({"title", "section", "heading", "text"}) from either
+    the nested JSON written by parse_statutes or the JSON Lines from parse_statutes_stream.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        statutes = json.load(f)
+    for title in statutes:
+        for section in title["sections"]:
+            yield {"title": title["title"], **section}
+
+
 #Find the longest line in the file of words
 def find_longest_line(input_file):
     with open(input_file, "r", encoding="utf-8", errors="replace") as f:
@@ -147,13 +378,26 @@ def main():
     parser.add_argument("--input_file", default=DEFAULT_INPUT, help="Path to the input file")
     parser.add_argument("--output_file", default=DEFAULT_OUTPUT, help="Path to the output file")
     parser.add_argument("--top_n", type=int, default=10, help="Number of top sections to display")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="Stream sections to JSON Lines with constant memory (implied by a .jsonl output file)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Parse TITLE shards in this many processes (writes JSON Lines)")
     args = parser.parse_args()
 
-    parsed_output = parse_statutes(args.input_file, args.output_file)
-    print(f"Processed file saved to {args.output_file}")
+    if args.jsonl or args.workers or args.output_file.endswith(".jsonl"):
+        output_file = args.output_file if args.output_file.endswith(".jsonl") else os.path.splitext(args.output_file)[0] + ".jsonl"
+        if args.workers:
+            count = parse_statutes_parallel(args.input_file, output_file, args.workers)
+        else:
+            count = parse_statutes_stream(args.input_file, output_file)
+        print(f"Processed {count} sections, saved to {output_file}")
+        top_sections = top_sections_by_word_count(iter_processed_sections(output_file), args.top_n)
+    else:
+        parsed_output = parse_statutes(args.input_file, args.output_file)
+        print(f"Processed file saved to {args.output_file}")
+        top_sections = get_top_sections_by_word_count(parsed_output, args.top_n)
     
-    # Get and display top sections
-    top_sections = get_top_sections_by_word_count(parsed_output, args.top_n)
+    # Display top sections
     print(f"\nTop {args.top_n} sections with the most words:")
     for i, section in enumerate(top_sections, 1):
         print(f"{i}. {section['section']} - {section['heading']} ({section['word_count']} words)")
@@ -0,0 +1,149 @@
+import argparse
+import os
+import sys
+import time
+from typing import Dict, Iterable, List, Tuple
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+from citation_index import DEFAULT_INDEX_PATH as DEFAULT_CITATION_INDEX_PATH
+from utils.index_statutes import CHROMA_PATH, COLLECTION_NAME, DEFAULT_INPUT, open_collection, publish_index
+from utils.organize_statutes import iter_processed_sections
+from utils.statute_documents import (SPLITTER_KEY, SPLITTERS, content_hash, iter_statute_chunks, make_splitter,
+                                     recorded_splitter, splitter_id)
+
+# Chroma caps a single add/upsert at a few thousand records
+BATCH_SIZE = 500
+PAGE_SIZE = 5000
+
+
+def fetch_indexed_hashes(collection, page_size: int = PAGE_SIZE) -> Dict[str, Tuple[str, dict]]:
+    """
+    id -> (content hash, stored metadata) for every chunk in the collection. Chunks
+    indexed before content hashes existed get one computed from their stored
+    document, so they aren't re-embedded just for lacking it.
+    """
+    indexed = {}
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        for chunk_id, metadata in zip(page["ids"], page["metadatas"]):
+            indexed[chunk_id] = (metadata.get("content_hash"), metadata)
+        if len(page["ids"]) < page_size:
+            break
+        offset += page_size
+
+    missing = [chunk_id for chunk_id, (hash_, _) in indexed.items() if hash_ is None]
+    for start in range(0, len(missing), page_size):
+        page = collection.get(ids=missing[start:start + page_size], include=["documents"])
+        for chunk_id, document in zip(page["ids"], page["documents"]):
+            indexed[chunk_id] = (content_hash(document or ""), indexed[chunk_id][1])
+    return indexed
+
+
+class ReindexPlan:
+    """What has to happen to bring the collection in line with a new parse."""
+
+    def __init__(self):
+        self.added: List[Tuple[str, str, dict]] = []
+        self.changed: List[Tuple[str, str, dict]] = []
+        # Same text, different title/heading (or no stored hash yet): no embedding needed
+        self.metadata_only: List[Tuple[str, dict]] = []
+        self.removed: List[str] = []
+        self.unchanged = 0
+
+    @property
+    def total(self):
+        return len(self.added) + len(self.changed) + len(self.metadata_only) + self.unchanged
+
+    def summary(self) -> str:
+        return (f"{self.total} chunks: {self.unchanged} unchanged (skipped), "
+                f"{len(self.added)} added + {len(self.changed)} changed (embedded), "
+                f"{len(self.metadata_only)} metadata-only, {len(self.removed)} removed")
+
+
+def plan_reindex(chunks: Iterable[Tuple[str, str, dict]], indexed: Dict[str, Tuple[str, dict]]) -> ReindexPlan:
+    """Diffs (id, text, metadata) chunks against fetch_indexed_hashes' output by content hash."""
+    plan = ReindexPlan()
+    seen = set()
+    for chunk_id, text, metadata in chunks:
+        seen.add(chunk_id)
+        if chunk_id not in indexed:
+            plan.added.append((chunk_id, text, metadata))
+            continue
+        old_hash, old_metadata = indexed[chunk_id]
+        if old_hash != metadata["content_hash"]:
+            plan.changed.append((chunk_id, text, metadata))
+        elif old_metadata != metadata:
+            plan.metadata_only.append((chunk_id, metadata))
+        else:
+            plan.unchanged += 1
+    plan.removed = [chunk_id for chunk_id in indexed if chunk_id not in seen]
+    return plan
+
+
+def apply_plan(collection, plan: ReindexPlan, batch_size: int = BATCH_SIZE) -> None:
+    """Embeds and upserts added/changed chunks, updates metadata in place, deletes removed chunks."""
+    upserts = plan.added + plan.changed
+    for start in range(0, len(upserts), batch_size):
+        batch = upserts[start:start + batch_size]
+        collection.upsert(ids=[chunk[0] for chunk in batch], documents=[chunk[1] for chunk in batch],
+                          metadatas=[chunk[2] for chunk in batch])
+        print(f"📄 Upserted {min(start + batch_size, len(upserts))}/{len(upserts)} chunks")
+
+    for start in range(0, len(plan.metadata_only), batch_size):
+        batch = plan.metadata_only[start:start + batch_size]
+        collection.update(ids=[chunk[0] for chunk in batch], metadatas=[chunk[1] for chunk in batch])
+
+    for start in range(0, len(plan.removed), batch_size):
+        collection.delete(ids=plan.removed[start:start + batch_size])
+
+
+def reindex(collection, sections: Iterable[dict], split_text=None, batch_size: int = BATCH_SIZE,
+            dry_run: bool = False) -> ReindexPlan:
+    plan = plan_reindex(iter_statute_chunks(sections, split_text), fetch_indexed_hashes(collection))
+    if not dry_run:
+        apply_plan(collection, plan, batch_size)
+    return plan
+
+
+def main():
+    from rag_pipeline import RagPipeline
+
+    parser = argparse.ArgumentParser(description="Re-index only the statute chunks that changed.")
+    parser.add_argument("--input_file", default=DEFAULT_INPUT, help="Processed statutes (.json or .jsonl)")
+    parser.add_argument("--chroma_path", default=CHROMA_PATH, help="Chroma persistent directory")
+    parser.add_argument("--collection", default=COLLECTION_NAME, help="Collection name")
+    parser.add_argument("--citation_index", default=DEFAULT_CITATION_INDEX_PATH, help="Citation index to rebuild")
+    parser.add_argument("--batch_size", type=int, default=BATCH_SIZE, help="Chunks per upsert")
+    parser.add_argument("--dry_run", action="store_true", help="Only print what would change")
+    parser.add_argument("--splitter", choices=SPLITTERS, default="recursive",
+                        help="Must match the splitter the collection was indexed with, unless --change_splitter")
+    parser.add_argument("--change_splitter", action="store_true",
+                        help="Re-chunk the collection with --splitter, deleting chunks the new splitter doesn't produce")
+    args = parser.parse_args()
+
+    # Same client and embedding function (EMBEDDING_BACKEND) the app queries with
+    pipeline = RagPipeline(chroma_path=args.chroma_path, collection_name=args.collection)
+    collection = open_collection(pipeline.chroma_client, args.collection, pipeline.embedding_function,
+                                 args.splitter, change_splitter=args.change_splitter)
+
+    start = time.perf_counter()
+    plan = reindex(collection, iter_processed_sections(args.input_file), make_splitter(args.splitter),
+                   batch_size=args.batch_size, dry_run=args.dry_run)
+    elapsed = time.perf_counter() - start
+
+    if not args.dry_run and recorded_splitter(collection) != splitter_id(args.splitter):
+        # Only once every chunk is the new splitter's, so an interrupted switch still needs --change_splitter
+        collection.modify(metadata={**(collection.metadata or {}), SPLITTER_KEY: splitter_id(args.splitter)})
+    if not args.dry_run and (plan.added or plan.changed or plan.metadata_only or plan.removed):
+        publish_index(collection, args.chroma_path, args.citation_index, pipeline.embedding_function)
+
+    print(f"{'🔍 Dry run' if args.dry_run else '✅ Re-indexed'} in {elapsed:.1f}s - {plan.summary()}")
+
+
+if __name__ == "__main__":
+    main()
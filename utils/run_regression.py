@@ -0,0 +1,147 @@
+import argparse
+import csv
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Iterable, Iterator, List
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+from rag_pipeline import GENERATION_WORKERS
+from utils.index_statutes import batched
+
+DEFAULT_OUTPUT = os.path.join(project_root, "data/regression/answers.jsonl")
+# Questions retrieved together; a batch's generations finish before the next batch is searched
+QUESTION_BATCH_SIZE = 100
+STAGES = ("citation_lookup", "embed", "retrieve", "generate", "total")
+
+
+def load_questions(input_file: str) -> Iterator[dict]:
+    """
+    Yields {"id", "question", "reference"} from a .jsonl, .json or .csv export of the
+    legal-qa dataset (https://huggingface.co/datasets/dzunggg/legal-qa-v1), i.e. rows
+    with "question" and optionally "answer" and "id" fields.
+    """
+    if input_file.endswith(".csv"):
+        with open(input_file, "r", encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+    elif input_file.endswith(".jsonl"):
+        with open(input_file, "r", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(input_file, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+
+    for i, row in enumerate(rows):
+        yield {"id": str(row.get("id", i)), "question": row["question"], "reference": row.get("answer")}
+
+
+def load_checkpoint(checkpoint_file: str) -> set:
+    if not os.path.exists(checkpoint_file):
+        return set()
+    with open(checkpoint_file, "r") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[int(fraction * (len(values) - 1))] if values else 0.0
+
+
+def run_regression(pipeline, questions: Iterable[dict], output_file: str = DEFAULT_OUTPUT,
+                   batch_size: int = QUESTION_BATCH_SIZE, workers: int = GENERATION_WORKERS) -> dict:
+    """
+    Answers every question through pipeline.answer_batch and appends one JSON record
+    per answered question to output_file as it finishes. Answered ids go to a checkpoint
+    next to the output, so an interrupted run resumes where it stopped; failed questions
+    are only reported, and retried on the next run. Returns per-stage latency percentiles.
+    """
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    checkpoint_file = output_file + ".done"
+    done = load_checkpoint(checkpoint_file)
+    skipped = 0
+
+    def iter_pending():
+        # Counts only these questions, not every id in the checkpoint
+        nonlocal skipped
+        for question in questions:
+            if question["id"] in done:
+                skipped += 1
+            else:
+                yield question
+
+    pending = iter_pending()
+
+    stage_times = {stage: [] for stage in STAGES}
+    answered = errors = cached = tokens_saved = 0
+    start = time.perf_counter()
+
+    with open(output_file, "a", encoding="utf-8") as out, open(checkpoint_file, "a") as checkpoint:
+        for batch in batched(pending, batch_size):
+            for i, outcome, timings in pipeline.answer_batch([q["question"] for q in batch], max_workers=workers):
+                question = batch[i]
+                if isinstance(outcome, Exception):
+                    # Neither written nor checkpointed, so the retry on the next run is its only record
+                    errors += 1
+                    print(f"Error: {question['id']}: {type(outcome).__name__}: {outcome}")
+                    continue
+
+                answer, metadatas = outcome
+                record = {**question, "answer": answer, "sources": [meta["section"] for meta in metadatas],
+                          "timings": timings}
+                answered += 1
+                cached += bool(timings.get("cached"))
+                tokens_saved += timings.get("tokens_saved", 0)
+                for stage in STAGES:
+                    if stage in timings:
+                        stage_times[stage].append(timings[stage])
+
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                checkpoint.write(question["id"] + "\n")
+                checkpoint.flush()
+
+    seconds = time.perf_counter() - start
+    report = {
+        "answered": answered,
+        "skipped": skipped,
+        "errors": errors,
+        "cached": cached,
+        "context_tokens_saved": tokens_saved,
+        "seconds": seconds,
+        "questions_per_second": answered / seconds if seconds else 0.0,
+        "stages": {stage: {"p50": statistics.median(values), "p95": percentile(values, 0.95)}
+                   for stage, values in stage_times.items() if values},
+    }
+    return report
+
+
+def main():
+    from rag_pipeline import RagPipeline
+
+    parser = argparse.ArgumentParser(description="Run regression questions through the RAG pipeline in batches.")
+    parser.add_argument("--input_file", required=True, help="Questions (.jsonl, .json or .csv with a 'question' field)")
+    parser.add_argument("--output_file", default=DEFAULT_OUTPUT, help="JSONL results, appended to (resumable)")
+    parser.add_argument("--batch_size", type=int, default=QUESTION_BATCH_SIZE, help="Questions retrieved together")
+    parser.add_argument("--workers", type=int, default=GENERATION_WORKERS, help="Concurrent generation requests")
+    parser.add_argument("--limit", type=int, default=None, help="Only the first N questions")
+    args = parser.parse_args()
+
+    questions = list(load_questions(args.input_file))[:args.limit]
+    pipeline = RagPipeline().warm_up()
+    report = run_regression(pipeline, questions, args.output_file, args.batch_size, args.workers)
+
+    print(f"✅ {report['answered']} answered in {report['seconds']:.1f}s ({report['questions_per_second']:.2f}/s), "
+          f"skipped {report['skipped']}, errors {report['errors']}, answer cache hits {report['cached']}, "
+          f"context tokens saved {report['context_tokens_saved']:,}")
+    for stage, latency in report["stages"].items():
+        print(f"   {stage:<16} p50 {latency['p50'] * 1000:8.1f} ms   p95 {latency['p95'] * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
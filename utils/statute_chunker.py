@@ -0,0 +1,181 @@
+import itertools
+import os
+import re
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+from telemetry import estimate_tokens
+
+# A bit over the notebook's 2000-character (~500 token) chunks: whole units pack into fewer chunks,
+# with no overlap, at about the same prompt size (see utils/benchmarks/chunker_benchmark.py)
+DEFAULT_MAX_TOKENS = 550
+# A chunk this full is closed at the next numbered paragraph or subsection rather than packing on
+MIN_FILL = 0.8
+# Enumerator levels a chunk may be closed early at: "1." and "a."
+BREAK_LEVELS = 2
+
+# Enumerators opening a statute unit, outermost first:
+#   1.  numbered paragraph      a.  subsection      (1)  paragraph      (a)  subparagraph
+# A unit can open several levels at once, e.g. "1. a. Except as ..." or "b. (1) In the case of ..."
+LEVEL_PATTERNS = [
+    re.compile(r"(\d+[A-Za-z]?)\.\s+"),
+    re.compile(r"([a-z]{1,2})\.\s+"),
+    re.compile(r"\((\d+)\)\s*"),
+    re.compile(r"\(([a-z]{1,2}|[ivx]+)\)\s*"),
+]
+SENTENCE_END = re.compile(r"(?<=[.;:])\s+")
+# Where a unit can start: a new line, or after the end of a sentence or clause ("...with
+# respect to: (1) Heroin"). The parsers in organize_statutes join a section's lines with
+# spaces, so in processed text nearly every unit starts inline.
+UNIT_BOUNDARY = re.compile(r"\n\s*|(?<=[.;:])\s+")
+
+
+def match_enumerators(text: str, position: int = 0) -> Tuple[List[Tuple[int, str]], int]:
+    """(level, label) for each enumerator at text[position:], and where they end."""
+    found = []
+    level = 0
+    while level < len(LEVEL_PATTERNS):
+        match = LEVEL_PATTERNS[level].match(text, position)
+        if match:
+            found.append((level, match.group(1)))
+            position = match.end()
+        level += 1
+    return found, position
+
+
+def parse_enumerators(line: str) -> List[Tuple[int, str]]:
+    """(level, label) for each enumerator opening `line`, in order."""
+    return match_enumerators(line)[0]
+
+
+def format_path(path: List[Optional[str]]) -> str:
+    """["1", "a", "2", None] -> "1.a.(2)" """
+    parts = []
+    for level, label in enumerate(path):
+        if label is not None:
+            parts.append(f"{label}." if level < 2 else f"({label})")
+    return "".join(parts)
+
+
+class StatuteChunker:
+    """
+    Splits statute text on its own structure (numbered paragraphs, subsections "a.",
+    paragraphs "(1)", subparagraphs "(a)") and packs whole units into chunks of at
+    most max_tokens, with no overlap. Only a unit that alone exceeds the budget is cut,
+    at sentence ends and, failing that, between words.
+
+    Called with text it returns the chunk strings, so it can stand in for the
+    notebook's splitter anywhere a split_text function is taken. split_with_metadata
+    also returns each chunk's structural offsets for the chunk metadata.
+    """
+
+    def __init__(self, max_tokens: int = DEFAULT_MAX_TOKENS, count_tokens: Callable[[str], int] = estimate_tokens,
+                 min_fill: float = MIN_FILL):
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens
+        self.min_fill = min_fill
+
+    def __call__(self, text: str) -> List[str]:
+        return [chunk for chunk, _ in self.split_with_metadata(text)]
+
+    # -------------------------------
+    # Structural units
+    # -------------------------------
+    def units(self, text: str) -> List[Dict]:
+        """
+        The text as consecutive units, each an enumerator plus the unlabeled text after
+        it: {"start", "end", "level", "path"}. Offsets index into `text`; the text before
+        the first enumerator is a unit of its own.
+        """
+        if not text:
+            return []
+        units = []
+        path = [None] * len(LEVEL_PATTERNS)
+        candidates = itertools.chain([(0, len(text) - len(text.lstrip()))],
+                                     ((match.start(), match.end()) for match in UNIT_BOUNDARY.finditer(text)))
+        # End of the last enumerator run, so "1. a." isn't read again as a boundary before "a."
+        parsed_to = 0
+        for start, position in candidates:
+            if start < parsed_to or position == len(text):
+                continue
+            enumerators, parsed_to = match_enumerators(text, position)
+            if not enumerators and units:
+                continue
+            for level, label in enumerators:
+                path[level:] = [label] + [None] * (len(LEVEL_PATTERNS) - level - 1)
+            if units:
+                units[-1]["end"] = start
+            units.append({"start": start, "end": len(text),
+                          "level": enumerators[0][0] if enumerators else len(LEVEL_PATTERNS),
+                          "path": format_path(path)})
+        return units
+
+    def _pieces(self, text: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """(start, end) spans of text[start:end], each within max_tokens."""
+        if self.count_tokens(text[start:end]) <= self.max_tokens:
+            return [(start, end)]
+        for pattern in (SENTENCE_END, re.compile(r"\s+")):
+            boundaries = [match.end() for match in pattern.finditer(text, start, end)] + [end]
+            spans = []
+            piece_start = previous = start
+            for boundary in boundaries:
+                if previous > piece_start and self.count_tokens(text[piece_start:boundary]) > self.max_tokens:
+                    spans.append((piece_start, previous))
+                    piece_start = previous
+                previous = boundary
+            spans.append((piece_start, end))
+            if all(self.count_tokens(text[a:b]) <= self.max_tokens for a, b in spans):
+                return spans
+        # A single word over the budget: cut it by characters
+        size = max(len(text[start:end]) * self.max_tokens // max(self.count_tokens(text[start:end]), 1), 1)
+        return [(i, min(i + size, end)) for i in range(start, end, size)]
+
+    # -------------------------------
+    # Packing
+    # -------------------------------
+    def split_with_metadata(self, text: str) -> List[Tuple[str, Dict]]:
+        """
+        [(chunk text, metadata)], metadata holding the chunk's character offsets in
+        `text` ("start_offset", "end_offset"), the structural path of its first and last units
+        ("first_path", "last_path", e.g. "1.a.(2)"; "" before any enumerator) and its
+        token count.
+        """
+        spans = []
+        for unit in self.units(text):
+            for start, end in self._pieces(text, unit["start"], unit["end"]):
+                spans.append((start, end, self.count_tokens(text[start:end]), unit["level"], unit["path"]))
+
+        # Token counts of the spans are summed rather than recounted as a chunk grows
+        chunks = []
+        current = None
+        for start, end, tokens, level, path in spans:
+            if current is not None:
+                over_budget = current["tokens"] + tokens > self.max_tokens
+                # Prefer closing at a numbered paragraph or subsection once the chunk is reasonably full
+                full_enough = current["tokens"] >= self.min_fill * self.max_tokens and level < BREAK_LEVELS
+                if over_budget or full_enough:
+                    chunks.append(current)
+                    current = None
+            if current is None:
+                current = {"start": start, "end": end, "tokens": tokens, "first_path": path, "last_path": path}
+            else:
+                current.update(end=end, tokens=current["tokens"] + tokens, last_path=path)
+        if current is not None:
+            chunks.append(current)
+
+        results = []
+        for chunk in chunks:
+            raw = text[chunk["start"]:chunk["end"]]
+            # Offsets describe the stripped text, which is what gets embedded
+            start = chunk["start"] + len(raw) - len(raw.lstrip())
+            body = raw.strip()
+            if not body:
+                continue
+            results.append((body, {"start_offset": start, "end_offset": start + len(body), "first_path": chunk["first_path"],
+                                   "last_path": chunk["last_path"], "tokens": self.count_tokens(body)}))
+        return results
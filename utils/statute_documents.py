@@ -0,0 +1,112 @@
+import hashlib
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Same splitter settings as index_statues.ipynb, so ids and chunks line up with the existing index
+CHUNK_SIZE = 2000
+CHUNK_OVERLAP = 100
+# "recursive" is the notebook's splitter; "structure" is utils/statute_chunker.py
+SPLITTERS = ("recursive", "structure")
+
+# Collection metadata key for the splitter (and its settings) the chunks were made with
+SPLITTER_KEY = "splitter"
+# Collections indexed before the splitter was recorded were all split like the notebook
+LEGACY_SPLITTER = f"recursive:{CHUNK_SIZE}/{CHUNK_OVERLAP}"
+
+
+class SplitterMismatch(ValueError):
+    """Chunks from one splitter would be mixed into a collection chunked by another."""
+
+
+def clean_statute_text(text: str) -> str:
+    # Remove isolated digits/headers like "12." at the start of a line
+    text = re.sub(r'^\s*\d+\.\s*$', '', text, flags=re.MULTILINE)
+
+    # Normalize extra newlines and tabs
+    text = re.sub(r'\t', ' ', text)
+    text = re.sub(r'\n{2,}', '\n', text)
+    return text.strip()
+
+
+def make_text_splitter(chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> Callable[[str], List[str]]:
+    """The notebook's RecursiveCharacterTextSplitter, as a plain text -> chunks function."""
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    except ImportError:
+        # Older langchain releases ship it in the main package only
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return splitter.split_text
+
+
+def make_splitter(name: str = "recursive") -> Callable[[str], List[str]]:
+    if name == "structure":
+        from utils.statute_chunker import StatuteChunker
+        return StatuteChunker()
+    if name == "recursive":
+        return make_text_splitter()
+    raise ValueError(f"Unknown splitter {name!r}, expected one of {SPLITTERS}")
+
+
+def splitter_id(name: str = "recursive") -> str:
+    """The splitter and the settings that decide its chunk boundaries, e.g. "structure:550"."""
+    if name == "structure":
+        from utils.statute_chunker import DEFAULT_MAX_TOKENS
+        return f"structure:{DEFAULT_MAX_TOKENS}"
+    if name == "recursive":
+        return LEGACY_SPLITTER
+    raise ValueError(f"Unknown splitter {name!r}, expected one of {SPLITTERS}")
+
+
+def recorded_splitter(collection) -> Optional[str]:
+    """The splitter a Chroma collection was chunked with, or None for stand-ins without metadata."""
+    if not hasattr(collection, "metadata"):
+        return None
+    return (collection.metadata or {}).get(SPLITTER_KEY, LEGACY_SPLITTER)
+
+
+def check_splitter(recorded: Optional[str], splitter: str) -> None:
+    """
+    Raises SplitterMismatch unless `recorded` (None: not known) is `splitter`. Upserting
+    another splitter's chunks only overwrites the ids they share, so a section that now
+    splits into fewer chunks would keep its old ones next to the new.
+    """
+    if recorded is not None and recorded != splitter:
+        raise SplitterMismatch(
+            f"The collection was chunked with {recorded!r} but this run would use {splitter!r}; switch it over "
+            f"with reindex_statutes.py --change_splitter (it deletes the old chunks) or index into a new --collection")
+
+
+def chunk_document_id(section: str, chunk_id: int) -> str:
+    return f"statute_{section}_{chunk_id}"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def iter_statute_chunks(sections: Iterable[Dict], split_text: Callable[[str], List[str]] = None
+                        ) -> Iterator[Tuple[str, str, Dict]]:
+    """
+    Chunks flat section dicts (from iter_processed_sections) the way index_statues.ipynb
+    does, yielding (id, text, metadata). metadata carries the chunk's content_hash, so
+    later runs can tell which chunks changed without re-embedding them, plus whatever
+    a splitter with split_with_metadata (e.g. StatuteChunker's offsets) reports.
+    """
+    split_text = split_text or make_text_splitter()
+    split_with_metadata = getattr(split_text, "split_with_metadata", None)
+    for section in sections:
+        cleaned_text = clean_statute_text(section["text"])
+        pieces = split_with_metadata(cleaned_text) if split_with_metadata else \
+            ((chunk, {}) for chunk in split_text(cleaned_text))
+        for idx, (chunk, extra) in enumerate(pieces):
+            text = chunk.strip()
+            yield chunk_document_id(section["section"], idx), text, {
+                "title": section["title"],
+                "section": section["section"],
+                "heading": section["heading"],
+                "chunk_id": idx,
+                "content_hash": content_hash(text),
+                **extra,
+            }
@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from answer_cache import SemanticAnswerCache
+from embedding_engine import FakeEmbeddingBackend
+
+backend = FakeEmbeddingBackend(dim=64)
+question = "How do I get my record expunged in New Jersey?"
+paraphrase = "How do I get my record expunged in New Jersey"
+sections = ["2C:52-1", "2C:52-2"]
+metadatas = [{"section": "2C:52-1", "heading": "Expungement"}]
+
+
+def test_paraphrase_hits_only_with_same_sections():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store(backend.embed_one(question), sections, "cached answer", metadatas)
+
+    assert cache.lookup(backend.embed_one(paraphrase), sections) == ("cached answer", metadatas)
+    assert cache.lookup(backend.embed_one(paraphrase), ["2C:52-1"]) is None
+    assert cache.lookup(backend.embed_one("Can my landlord keep my security deposit?"), sections) is None
+
+
+def test_ttl_size_and_reindex():
+    cache = SemanticAnswerCache(threshold=0.9, ttl_seconds=0.05, max_entries=2)
+    for i in range(3):
+        cache.store(backend.embed_one(f"question {i}"), sections, f"answer {i}", metadatas)
+    assert len(cache) == 2
+    assert cache.lookup(backend.embed_one("question 0"), sections) is None
+
+    time.sleep(0.06)
+    assert cache.lookup(backend.embed_one("question 2"), sections) is None
+
+    cache.check_version("v1")
+    cache.store(backend.embed_one(question), sections, "cached answer", metadatas)
+    cache.check_version("v2")
+    assert len(cache) == 0
+
+
+if __name__ == "__main__":
+    test_paraphrase_hits_only_with_same_sections()
+    test_ttl_size_and_reindex()
+    print("✅ All answer cache tests passed")
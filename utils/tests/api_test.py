@@ -0,0 +1,130 @@
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from fastapi.testclient import TestClient
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+import api
+import rag_pipeline
+import telemetry
+
+METADATA = {"title": "TITLE 2A - ADMINISTRATION OF CIVIL AND CRIMINAL JUSTICE", "section": "2A:52-1",
+            "heading": "Action for change of name", "chunk_id": 0}
+
+
+class FakePipeline:
+    """Stands in for RagPipeline behind rag_pipeline.get_pipeline(), counting concurrent upstream calls."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.searches = []
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        return self
+
+    def _upstream_call(self):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+
+    def get_answer(self, question):
+        self._upstream_call()
+        return f"Answer to: {question}", [METADATA]
+
+    def stream_answer(self, question):
+        self._upstream_call()
+        yield "sources", [METADATA]
+        yield "token", "You may "
+        yield "token", "petition the Superior Court."
+        yield "done", {"time_to_first_token": 0.0, "total_time": 0.0, "cached": False}
+
+    def get_statute_context(self, question, n_results=3, query_embedding=None):
+        self._upstream_call()
+        self.searches.append(n_results)
+        return ["Any person may institute an action."] * n_results, [METADATA] * n_results
+
+
+@contextmanager
+def serving(pipeline, max_upstream_calls=None):
+    """A started TestClient whose app answers from `pipeline` instead of a real RagPipeline."""
+    saved = rag_pipeline._default_pipeline, api.MAX_UPSTREAM_CALLS
+    rag_pipeline._default_pipeline = pipeline
+    api.MAX_UPSTREAM_CALLS = max_upstream_calls or api.MAX_UPSTREAM_CALLS
+    try:
+        with TestClient(api.app) as client:
+            yield client
+    finally:
+        rag_pipeline._default_pipeline, api.MAX_UPSTREAM_CALLS = saved
+
+
+def test_endpoints():
+    with serving(FakePipeline()) as client:
+        response = client.post("/ask", json={"question": "How do I change my name?"})
+        assert response.status_code == 200
+        assert response.json() == {"answer": "Answer to: How do I change my name?", "sources": [METADATA]}
+
+        response = client.post("/ask/stream", json={"question": "How do I change my name?"})
+        assert response.status_code == 200 and response.headers["content-type"] == "application/x-ndjson"
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert [event["type"] for event in events] == ["sources", "token", "token", "done"]
+        assert "".join(event["data"] for event in events if event["type"] == "token") == \
+            "You may petition the Superior Court."
+
+        telemetry.METRICS.reset()
+        telemetry.METRICS.observe("retrieve", 0.25)
+        response = client.get("/metrics")
+        assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain")
+        assert 'rag_stage_seconds_count{stage="retrieve"} 1' in response.text
+        telemetry.METRICS.reset()
+
+
+def test_search_validates_n_results():
+    pipeline = FakePipeline()
+    with serving(pipeline) as client:
+        response = client.post("/search", json={"question": "name change"})
+        assert response.status_code == 200 and len(response.json()["results"]) == 3
+        assert response.json()["results"][0]["metadata"] == METADATA
+
+        response = client.post("/search", json={"question": "name change", "n_results": api.MAX_SEARCH_RESULTS})
+        assert response.status_code == 200 and len(response.json()["results"]) == api.MAX_SEARCH_RESULTS
+
+        # Out-of-range sizes are refused before they reach the retriever
+        for n_results in (0, -1, api.MAX_SEARCH_RESULTS + 1):
+            response = client.post("/search", json={"question": "name change", "n_results": n_results})
+            assert response.status_code == 422
+        assert pipeline.searches == [3, api.MAX_SEARCH_RESULTS]
+
+
+def test_upstream_calls_are_bounded():
+    pipeline = FakePipeline(delay=0.05)
+    with serving(pipeline, max_upstream_calls=2) as client:
+        requests = [("/ask", {"question": f"Question {i}"}) for i in range(4)]
+        requests += [("/ask/stream", {"question": f"Question {i}"}) for i in range(4)]
+        requests += [("/search", {"question": f"Question {i}"}) for i in range(4)]
+        with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+            responses = list(pool.map(lambda request: client.post(request[0], json=request[1]), requests))
+    assert all(response.status_code == 200 for response in responses)
+    # Twelve requests at once, never more than two in the pipeline
+    assert pipeline.peak == 2
+
+
+if __name__ == "__main__":
+    test_endpoints()
+    test_search_validates_n_results()
+    test_upstream_calls_are_bounded()
+    print("✅ All API tests passed")
@@ -0,0 +1,133 @@
+import math
+import os
+import sys
+import tempfile
+from collections import Counter
+
+import numpy as np
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from answer_cache import bump_index_version, read_index_version
+from bm25_retriever import BM25Index, reciprocal_rank_fusion, tokenize
+from rag_pipeline import MAX_SECTION_CHARS, RagPipeline
+from utils.tests.rag_pipeline_test import CHUNKS, FakeModel, make_pipeline
+
+SECTIONS = [
+    {"title": "TITLE 46 - PROPERTY", "section": "46:8-19", "heading": "Security deposits",
+     "text": "The landlord shall return the security deposit within 30 days. L.1997,c.278,s.2."},
+    {"title": "TITLE 46 - PROPERTY", "section": "46:8-21.1", "heading": "Return of deposit",
+     "text": "A deposit held by a landlord is returned with interest."},
+    {"title": "TITLE 2A - ADMINISTRATION OF CIVIL AND CRIMINAL JUSTICE", "section": "2A:18-61.1",
+     "heading": "Removal of tenants", "text": "No lessee or tenant may be removed except for good cause. " * 40},
+    {"title": "TITLE 2A - ADMINISTRATION OF CIVIL AND CRIMINAL JUSTICE", "section": "2A:52-1",
+     "heading": "Action for change of name", "text": "Any person may institute an action for authority to assume another name."},
+]
+
+
+def reference_scores(query, k1=1.5, b=0.75):
+    """Plain-Python Okapi BM25 over SECTIONS, with the same document text as BM25Index.build."""
+    docs = [Counter(tokenize(f"{s['section']} {s['heading']} {s['text']}")) for s in SECTIONS]
+    avgdl = sum(sum(doc.values()) for doc in docs) / len(docs)
+    scores = []
+    for doc in docs:
+        length = sum(doc.values())
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(term in other for other in docs)
+            if doc[term]:
+                idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+                score += idf * doc[term] * (k1 + 1) / (doc[term] + k1 * (1 - b + b * length / avgdl))
+        scores.append(score)
+    return scores
+
+
+def test_tokenize_keeps_citations():
+    tokens = tokenize("See N.J.S.A. 2A:18-61.1 and L.1997, c.278 for the tenant's rights")
+    assert "2a:18-61.1" in tokens and "l.1997" in tokens and "c.278" in tokens
+    # Stopwords go, plain words are lowercased
+    assert "the" not in tokens and "and" not in tokens and "tenant" in tokens
+
+
+def test_build_search_and_reload():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = BM25Index.build(SECTIONS, tmp_dir)
+        assert index.num_docs == 4 and isinstance(index.postings_doc, np.memmap)
+
+        query = "landlord security deposit"
+        expected = reference_scores(query)
+        hits = index.search(query, n_results=10)
+        assert [i for i, _ in hits] == [0, 1]
+        for i, score in hits:
+            assert abs(score - expected[i]) < 1e-4
+
+        # A citation matches its section exactly, and unknown terms match nothing
+        assert index.search("what does 2A:18-61.1 say?", n_results=1)[0][0] == 2
+        assert index.search("zoning variance") == []
+        assert index.text(2) == SECTIONS[2]["text"]
+        assert index.docs[3] == {"id": "section_2A:52-1", "title": SECTIONS[3]["title"], "section": "2A:52-1",
+                                 "heading": "Action for change of name"}
+
+        # Reopening maps the same files and ranks the same
+        reloaded = BM25Index(tmp_dir)
+        assert isinstance(reloaded.offsets, np.memmap)
+        assert reloaded.search(query, n_results=10) == hits
+        assert reloaded.text(0) == SECTIONS[0]["text"]
+
+
+def test_reciprocal_rank_fusion_order():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a", "d"]], k=60)
+    assert [key for key, _ in fused] == ["a", "c", "b", "d"]
+    assert abs(fused[0][1] - (1 / 61 + 1 / 62)) < 1e-12
+    assert abs(fused[-1][1] - 1 / 63) < 1e-12
+
+
+def test_fuse_with_bm25():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = BM25Index.build(SECTIONS, os.path.join(tmp_dir, "bm25_index"))
+        pipeline = make_pipeline(tmp_dir)
+
+        # Two vector chunks of 46:8-19: the section counts once, with its best chunk
+        second_chunk = dict(CHUNKS[1][2], chunk_id=1)
+        chunks, metadatas = pipeline._fuse_with_bm25(
+            index, "landlord security deposit", [CHUNKS[1][1], "Second chunk.", CHUNKS[0][1]],
+            [CHUNKS[1][2], second_chunk, CHUNKS[0][2]], n_results=3)
+        # 2A:52-1 (vector rank 2) and 46:8-21.1 (BM25 rank 2) tie; the tie keeps the vector list first
+        assert [meta["section"] for meta in metadatas] == ["46:8-19", "2A:52-1", "46:8-21.1"]
+        assert chunks[0] == CHUNKS[1][1] and metadatas[0] is CHUNKS[1][2]
+
+        # A section only BM25 found comes back as its clipped text with a stand-in chunk_id 0
+        assert chunks[2] == SECTIONS[1]["text"][:MAX_SECTION_CHARS]
+        assert metadatas[2] == {"title": "TITLE 46 - PROPERTY", "section": "46:8-21.1",
+                                "heading": "Return of deposit", "chunk_id": 0}
+
+
+def test_stale_index_is_ignored():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bm25_dir = os.path.join(tmp_dir, "bm25_index")
+        BM25Index.build(SECTIONS, bm25_dir, index_version=bump_index_version(tmp_dir))
+        pipeline = RagPipeline(chroma_path=tmp_dir, model=FakeModel(), bm25_index_path=bm25_dir)
+        assert pipeline.bm25_index is not None
+
+        # Re-indexing the collection turns hybrid retrieval off until the index is rebuilt
+        bump_index_version(tmp_dir)
+        assert pipeline.bm25_index is None
+
+        # Rebuilding it turns it back on in the running pipeline, while the old handle keeps its mapped files
+        old_index = BM25Index(bm25_dir)
+        BM25Index.build(SECTIONS[:2], bm25_dir, index_version=read_index_version(tmp_dir))
+        assert pipeline.bm25_index.num_docs == 2 and pipeline.bm25_index is pipeline.bm25_index
+        assert old_index.num_docs == 4 and old_index.text(3) == SECTIONS[3]["text"]
+        assert [i for i, _ in old_index.search("landlord security deposit")] == [0, 1]
+
+
+if __name__ == "__main__":
+    test_tokenize_keeps_citations()
+    test_build_search_and_reload()
+    test_reciprocal_rank_fusion_order()
+    test_fuse_with_bm25()
+    test_stale_index_is_ignored()
+    print("✅ All BM25 retriever tests passed")
@@ -1,29 +1,47 @@
-def remove_citation(original_text, extracted_citation, buffer=2):
-    # Truncate last N characters + buffer as a search window
-    search_window = original_text[-(len(extracted_citation) + buffer):]
+import os
+import sys
+import time
 
-    # Remove whitespace in both the citation and search window
-    stripped_citation = extracted_citation.replace(" ", "")
-    
-    # Replace original text with the search window with whitespace removed  
-    original_text_whitespace_removed = original_text[:-(len(extracted_citation) + buffer)] + search_window.replace(" ", "")
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from utils.citations_extractions.citation_removal import find_citation, remove_citation as strip_citation
 
-    # Check if the citation is in the original text
-    # If it is, remove the citation from original text
-    if stripped_citation in original_text_whitespace_removed:
+
+def remove_citation(original_text, extracted_citation, buffer=2):
+    # Tail-anchored, whitespace-insensitive match; the body keeps its original spacing
+    cleaned_text, found = strip_citation(original_text, extracted_citation, buffer)
+    if found:
         print("✅ Direct match found after whitespace normalization")
-        
-        #remove the citation from the original text
-        original_text_whitespace_removed = original_text_whitespace_removed.replace(stripped_citation, "")
-        
         #return the cleaned text and a similarity score of 100
-        return original_text_whitespace_removed, 100   
-        
+        return cleaned_text, 100
     else:
         print("❌ Match not found in original string despite normalization")
         return original_text, 0
 
 
+def test_remove_citation_is_tail_anchored():
+    citation = "L.1997, c.278, s.2."
+    # The same citation in the body is left alone; only the footer is cut
+    text = "As provided in L.1997,c.278,s.2. the  agency   shall act.\n    L.1997,c.278, s.2.\n"
+    cleaned_text, similarity = remove_citation(text, citation)
+    assert similarity == 100
+    assert cleaned_text == "As provided in L.1997,c.278,s.2. the  agency   shall act.\n    \n"
+
+    # A citation extracted without its final period still matches within the buffer
+    assert remove_citation("Body text.  L.1960, c. 187, p. 780, s. 4.", "L.1960, c.187, p.780, s.4")[0] == "Body text.  ."
+    assert find_citation("Body text. L.2000, c.11, s.4 and more words after it", "L.2000, c.11, s.4") == (-1, -1)
+
+    # Cost depends on the citation, not the section length
+    long_text = "word " * 200000 + citation
+    start = time.perf_counter()
+    for _ in range(1000):
+        find_citation(long_text, citation)
+    assert (time.perf_counter() - start) / 1000 < 0.001
+
+
 # Batch Testing
 def run_tests(test_cases):
     success_count = 0
@@ -0,0 +1,120 @@
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from utils.citations_extractions import process_statute_text
+
+
+class StubCompletions(BaseHTTPRequestHandler):
+    """Local stand-in for the model server's /v1/chat/completions."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, so the pooled session reuses connections
+    calls = 0
+    fail_sections = set()
+    lock = threading.Lock()
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        text = payload["messages"][1]["content"].split("### **Text:**", 1)[1]
+        with StubCompletions.lock:
+            StubCompletions.calls += 1
+        time.sleep(0.01)  # some decode time, so concurrency shows up
+
+        if any(section in text for section in StubCompletions.fail_sections):
+            self.send_response(500)
+            body = b'{"error": "model crashed"}'
+        else:
+            citation = re.search(r"L\.\d{4}.*?\.(?=\s*$)", text.strip())
+            content = json.dumps({"citations": citation.group(0) if citation else "None"})
+            self.send_response(200)
+            body = json.dumps({"choices": [{"message": {"content": content}}]}).encode()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_statutes(n):
+    sections = [{
+        "section": f"1:1-{i}",
+        "heading": f"Heading {i}",
+        "text": f"Text of section 1:1-{i} shall apply. L.{1950 + i}, c.{i}, s.1.",
+    } for i in range(n)]
+    return [{"title": "TITLE 1 - ACTS, LAWS AND STATUTES", "sections": sections}]
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_pipeline_resumes_from_checkpoint():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubCompletions)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+    missed_citations_file = process_statute_text.MISSED_CITATIONS_FILE
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = os.path.join(tmp_dir, "citations.jsonl")
+            process_statute_text.MISSED_CITATIONS_FILE = os.path.join(tmp_dir, "missed.jsonl")
+
+            # First run: one section's request fails, as if the server died on it
+            StubCompletions.fail_sections = {"1:1-7 "}
+            report = process_statute_text.process_statute_citations(
+                make_statutes(20), output_file, workers=4, api_url=api_url, use_grammar=False)
+            assert report["processed"] == 19 and report["errors"] == 1
+            assert StubCompletions.calls == 20
+
+            # A crash mid-write leaves a cut-off record, which the rerun drops and redoes
+            with open(output_file, "a") as f:
+                f.write('{"id": "1:1-7", "title": "TITLE 1')
+
+            # Rerun with more sections: only the failed one and the new ones are sent
+            StubCompletions.fail_sections = set()
+            StubCompletions.calls = 0
+            report = process_statute_text.process_statute_citations(
+                make_statutes(25), output_file, workers=4, api_url=api_url, use_grammar=False)
+            assert report["processed"] == 6 and report["skipped"] == 19
+            assert StubCompletions.calls == 6
+
+            records = read_jsonl(output_file)
+            assert sorted(record["id"] for record in records) == sorted(f"1:1-{i}" for i in range(25))
+            assert not os.path.exists(output_file + ".done")
+            record = next(record for record in records if record["id"] == "1:1-3")
+            assert record["citations"] == "L.1953, c.3, s.1."
+            assert record["text"].startswith("Text of section 1:1-3") and "L.1953" not in record["text"]
+            assert not os.path.exists(process_statute_text.MISSED_CITATIONS_FILE)
+
+            # A smaller input only counts its own sections as skipped
+            report = process_statute_text.process_statute_citations(
+                make_statutes(10), output_file, workers=4, api_url=api_url, use_grammar=False)
+            assert report["processed"] == 0 and report["skipped"] == 10
+
+            # With the grammar first, these footnotes never reach the model
+            StubCompletions.calls = 0
+            report = process_statute_text.process_statute_citations(
+                make_statutes(10), os.path.join(tmp_dir, "grammar.jsonl"), workers=4, api_url=api_url)
+            assert report["processed"] == 10 and report["llm_calls"] == 0
+            assert StubCompletions.calls == 0
+    finally:
+        process_statute_text.MISSED_CITATIONS_FILE = missed_citations_file
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_pipeline_resumes_from_checkpoint()
+    print("✅ All citation pipeline tests passed")
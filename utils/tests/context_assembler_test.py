@@ -0,0 +1,73 @@
+import os
+import sys
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from context_assembler import ContextAssembler, overlap_length
+from utils.statute_chunker import StatuteChunker
+from utils.statute_documents import iter_statute_chunks
+
+SECTION_TEXT = " ".join(f"Sentence {i} of the security deposit statute says something about tenants." for i in range(40))
+
+
+def overlapping_chunks(text, size=600, overlap=100):
+    """Fixed-size chunks with overlap, like the notebook's splitter."""
+    return [text[start:start + size] for start in range(0, len(text) - overlap, size - overlap)]
+
+
+def meta(section, chunk_id):
+    return {"title": "TITLE 46 - PROPERTY", "section": section, "heading": "", "chunk_id": chunk_id}
+
+
+def test_merges_consecutive_chunks_and_removes_overlap():
+    chunks = overlapping_chunks(SECTION_TEXT)
+    assert overlap_length(chunks[0], chunks[1]) == 100
+    # Retrieved out of order, with a chunk of another section in between and a repeat
+    retrieved = [chunks[2], "Names may be changed by the Superior Court.", chunks[1], chunks[2], chunks[4]]
+    metadatas = [meta("46:8-19", 2), meta("2A:52-1", 0), meta("46:8-19", 1), meta("46:8-19", 2), meta("46:8-19", 4)]
+
+    context, used, stats = ContextAssembler(max_tokens=10_000).assemble(retrieved, metadatas)
+    # Sections in order of their best chunk; 1 and 2 become one piece, 4 stays apart
+    merged = SECTION_TEXT[500:1600]
+    assert context == "\n\n".join([merged, chunks[4], "Names may be changed by the Superior Court."])
+    assert [(m["section"], m["chunk_id"]) for m in used] == [("46:8-19", 2), ("2A:52-1", 0), ("46:8-19", 1),
+                                                             ("46:8-19", 4)]
+    assert stats["retrieved_chunks"] == 5 and stats["context_chunks"] == 4
+    assert stats["tokens_saved"] == stats["retrieved_tokens"] - stats["context_tokens"] > 0
+
+
+def test_fills_token_budget_in_retrieval_order():
+    chunks = overlapping_chunks(SECTION_TEXT)
+    retrieved = [chunks[3], chunks[0], "Names may be changed by the Superior Court."]
+    metadatas = [meta("46:8-19", 3), meta("46:8-19", 0), meta("2A:52-1", 0)]
+
+    # Room for one chunk and the short one, not two chunks
+    context, used, stats = ContextAssembler(max_tokens=200).assemble(retrieved, metadatas)
+    assert [m["chunk_id"] for m in used] == [3, 0] and used[1]["section"] == "2A:52-1"
+    assert context.startswith(chunks[3]) and stats["context_tokens"] <= 200
+
+    # A best chunk that is over budget on its own is cut rather than dropped
+    context, used, stats = ContextAssembler(max_tokens=50).assemble(retrieved, metadatas)
+    assert len(used) == 1 and chunks[3].startswith(context) and stats["context_tokens"] <= 50
+
+
+def test_structure_chunks_join_by_offsets():
+    text = "\n".join(f"{letter}. Subsection {letter} of the statute covers tenants and deposits in detail."
+                     for letter in "abcdefgh")
+    section = {"title": "TITLE 46 - PROPERTY", "section": "46:8-19", "heading": "Security deposits", "text": text}
+    chunks = list(iter_statute_chunks([section], StatuteChunker(max_tokens=60)))
+    assert len(chunks) > 2
+
+    context, used, _ = ContextAssembler().assemble([c[1] for c in chunks][::-1], [c[2] for c in chunks][::-1])
+    # Adjacent structure chunks are rejoined into the section text
+    assert context == text and len(used) == len(chunks)
+
+
+if __name__ == "__main__":
+    test_merges_consecutive_chunks_and_removes_overlap()
+    test_fills_token_budget_in_retrieval_order()
+    test_structure_chunks_join_by_offsets()
+    print("✅ All context assembler tests passed")
@@ -0,0 +1,104 @@
+import atexit
+import os
+import sys
+import tempfile
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from embedding_cache import EmbeddingCache, cache_key
+from embedding_engine import FakeEmbeddingBackend
+
+backend = FakeEmbeddingBackend(dim=8)
+
+
+def embed(texts):
+    return backend.embed_batch(texts, "retrieval_document")
+
+
+def test_hits_and_persistence():
+    with tempfile.TemporaryDirectory() as path:
+        cache = EmbeddingCache(path, dim=8)
+        texts = ["Action for change of name", "Action  for change\nof name", "Expungement of records"]
+
+        first = cache.get_or_embed("models/embedding-001", "retrieval_document", texts, embed)
+        # The first two texts normalize to the same key
+        assert cache.stats()["misses"] == 3 and len(cache) == 2
+        assert first[0] == first[1]
+
+        cache.close()
+        reopened = EmbeddingCache(path, dim=8)
+        again = reopened.get_or_embed("models/embedding-001", "retrieval_document", texts, embed)
+        assert again == first
+        assert reopened.stats()["hits"] == 3 and reopened.stats()["misses"] == 0
+        reopened.close()
+
+
+def test_lru_eviction():
+    with tempfile.TemporaryDirectory() as path:
+        cache = EmbeddingCache(path, dim=8, max_entries=2, lru_size=1)
+        keys = [cache_key("m", "retrieval_query", text) for text in ("a", "b", "c")]
+
+        cache.put(keys[0], embed(["a"])[0])
+        cache.put(keys[1], embed(["b"])[0])
+        cache.get(keys[0])  # "a" is now the most recently used
+        cache.put(keys[2], embed(["c"])[0])
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+        assert len(cache) == 2
+        cache.close()
+
+
+def crash(cache):
+    """Drops the cache the way a killed process would: no final flush, the lock released by the OS."""
+    atexit.unregister(cache.flush)
+    os.close(cache._lock_fd)
+
+
+def test_reused_row_after_crash_is_not_misread():
+    with tempfile.TemporaryDirectory() as path:
+        cache = EmbeddingCache(path, dim=8, max_entries=2, flush_every=2)
+        keys = [cache_key("m", "retrieval_query", text) for text in ("a", "b", "c")]
+        cache.put(keys[0], embed(["a"])[0])
+        cache.put(keys[1], embed(["b"])[0])  # flushes: the index maps "a" and "b"
+        cache.put(keys[2], embed(["c"])[0])  # evicts "a" and reuses its row, unflushed
+        crash(cache)
+
+        reopened = EmbeddingCache(path, dim=8, max_entries=2)
+        assert reopened.get(keys[0]) is None and reopened.get(keys[2]) is None
+        assert reopened.get(keys[1]).tolist() == embed(["b"])[0]
+        assert len(reopened) == 1
+        reopened.close()
+
+
+def test_second_process_only_reads():
+    with tempfile.TemporaryDirectory() as path:
+        writer = EmbeddingCache(path, dim=8, max_entries=2, flush_every=1)
+        keys = [cache_key("m", "retrieval_query", text) for text in ("a", "b", "c")]
+        writer.put(keys[0], embed(["a"])[0])
+        writer.put(keys[1], embed(["b"])[0])
+
+        reader = EmbeddingCache(path, dim=8, max_entries=2, lru_size=1)
+        assert not reader.writable and writer.writable
+        assert reader.get(keys[0]).tolist() == embed(["a"])[0]
+        reader.put(keys[2], embed(["c"])[0])
+        assert reader.get(keys[2]) is not None and len(reader) == 2
+
+        # The writer reuses "a"'s row for "c"; the reader's index still points "a" there
+        writer.put(keys[2], embed(["c"])[0])
+        reader.get(keys[1])  # pushes "a" out of the reader's in-memory LRU
+        assert reader.get(keys[0]) is None
+        reader.close()
+        writer.close()
+        assert len(EmbeddingCache(path, dim=8, max_entries=2)) == 2
+
+
+if __name__ == "__main__":
+    test_hits_and_persistence()
+    test_lru_eviction()
+    test_reused_row_after_crash_is_not_misread()
+    test_second_process_only_reads()
+    print("✅ All embedding cache tests passed")
@@ -0,0 +1,74 @@
+import os
+import sys
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from embedding_engine import BatchEmbeddingEngine, FakeEmbeddingBackend, SentenceTransformerBackend
+from telemetry import estimate_tokens
+
+
+class FlakyBackend(FakeEmbeddingBackend):
+    """Fails the first `failures` requests with a rate limit error."""
+
+    def __init__(self, failures, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+
+    def embed_batch(self, texts, task_type):
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError("429 Resource has been exhausted")
+        return super().embed_batch(texts, task_type)
+
+    def is_retryable(self, error):
+        return "429" in str(error)
+
+
+def test_order_is_stable():
+    texts = [f"statute text {i}" for i in range(250)]
+    backend = FakeEmbeddingBackend(dim=16)
+    engine = BatchEmbeddingEngine(backend, batch_size=7, max_workers=8)
+
+    embeddings = engine.embed(texts)
+
+    assert embeddings == [backend.embed_one(text) for text in texts]
+    assert backend.calls == 36
+
+
+def test_rate_limit_backoff():
+    backend = FlakyBackend(failures=2, dim=16)
+    engine = BatchEmbeddingEngine(backend, batch_size=10, max_workers=1, base_delay=0.001)
+
+    embeddings = engine.embed(["expungement", "name change"])
+
+    assert len(embeddings) == 2
+    assert backend.failures == 0
+
+
+def test_local_batches_sorted_by_length():
+    # Batching is planned from text lengths alone, so no model has to be loaded
+    backend = SentenceTransformerBackend(batch_tokens=300, max_seq_tokens=256)
+    texts = ["word " * 300, "short question?", "word " * 60, "another short one?", "word " * 120]
+    batches = backend.batches(texts)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(texts)))
+    lengths = [min(estimate_tokens(text) + 2, 256) for text in texts]
+    order = [i for batch in batches for i in batch]
+    assert [lengths[i] for i in order] == sorted(lengths)
+    # Short texts share a forward pass, and no batch pads past the budget
+    assert batches == [[1, 3, 2], [4], [0]]
+    assert all(len(batch) * max(lengths[i] for i in batch) <= 300 for batch in batches)
+
+    # Enough short questions fill a batch each, long texts are capped at the model's sequence length
+    batches = backend.batches(["Is it legal?"] * 500 + ["word " * 1000])
+    assert [len(batch) for batch in batches] == [60] * 8 + [20, 1]
+
+
+if __name__ == "__main__":
+    test_order_is_stable()
+    test_rate_limit_backoff()
+    test_local_batches_sorted_by_length()
+    print("✅ All embedding engine tests passed")
@@ -0,0 +1,174 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from answer_cache import bump_index_version
+from embedding_engine import FakeEmbeddingBackend
+from embedding_engine import EmbeddingBackendMismatch
+from flat_index import FlatIndex, normalize_rows
+from rag_pipeline import RagPipeline
+from retrievers import ChromaRetriever
+from utils.tests.rag_pipeline_test import CHUNKS, FakeModel, make_pipeline
+
+
+def random_records(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    for i, vector in enumerate(vectors):
+        metadata = {"title": f"TITLE {i % 3}", "section": f"1:{i // 4}-{i}", "heading": f"Heading {i}", "chunk_id": i % 4}
+        yield f"statute_{metadata['section']}_{i % 4}", f"Text of chunk {i} ✓", metadata, vector.tolist()
+
+
+def test_search_matches_brute_force():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        records = list(random_records(500, 32))
+        index = FlatIndex.build(records, tmp_dir)
+        assert index.count() == 500 and index.vectors.dtype == np.float32
+        assert isinstance(index.vectors, np.memmap)
+
+        matrix = np.asarray([record[3] for record in records], dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        queries = np.random.default_rng(1).normal(size=(8, 32))
+
+        # One batched call returns the same as eight single ones, and the same as brute force
+        batched = index.search(queries, n_results=5)
+        for query, hits in zip(queries, batched):
+            expected = np.argsort(-(matrix @ (query / np.linalg.norm(query))))[:5]
+            assert [row for row, _ in hits] == expected.tolist()
+            single = index.search([query], n_results=5)[0]
+            assert [row for row, _ in single] == [row for row, _ in hits]
+            assert np.allclose([score for _, score in single], [score for _, score in hits], atol=1e-5)
+
+        results = index.query(queries[:1], n_results=2)
+        row = batched[0][0][0]
+        assert results["ids"][0][0] == records[row][0]
+        assert results["documents"][0][0] == records[row][1]
+        assert results["metadatas"][0][0] == records[row][2]
+
+        # Reopening maps the same files
+        assert [row for row, _ in FlatIndex(tmp_dir).search(queries[:1], 5)[0]] == [row for row, _ in batched[0]]
+
+
+def test_rebuild_leaves_open_index_intact():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "flat_index")
+        old_records = list(random_records(200, 16, seed=3))
+        serving = FlatIndex.build(old_records, path)
+        expected = serving.search(np.asarray([old_records[0][3]]), 3)
+
+        # A re-export swaps in a new directory; the mapped files of the open index stay as they were
+        rebuilt = FlatIndex.build(random_records(50, 16, seed=4), path)
+        assert rebuilt.count() == 50 and serving.count() == 200
+        assert serving.search(np.asarray([old_records[0][3]]), 3) == expected
+        assert serving.text(199) == old_records[199][1]
+        assert sorted(os.listdir(tmp_dir)) == ["flat_index"]
+
+        # A failed export leaves the current index in place
+        def failing():
+            yield from random_records(10, 16)
+            raise RuntimeError("collection went away")
+        try:
+            FlatIndex.build(failing(), path)
+            assert False, "expected the export to fail"
+        except RuntimeError:
+            pass
+        assert FlatIndex(path).count() == 50 and sorted(os.listdir(tmp_dir)) == ["flat_index"]
+
+
+def test_quantized_search_rescores_exactly():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        records = list(random_records(500, 64))
+        FlatIndex.build(records, tmp_dir)
+        exact = FlatIndex(tmp_dir)
+
+        # Questions close to a stored chunk, like the benchmark's
+        rng = np.random.default_rng(2)
+        rows = rng.choice(500, size=10, replace=False)
+        queries = normalize_rows(np.asarray(exact.vectors[rows]) + 0.02 * rng.normal(size=(10, 64)))
+        expected = exact.search(queries, n_results=5)
+
+        for quantization in ("int8", "binary"):
+            index = FlatIndex(tmp_dir, quantization=quantization)
+            assert index.codes.nbytes < exact.vectors.nbytes / 3
+            for row, query, hits, reference in zip(rows, queries, index.search(queries, n_results=5), expected):
+                assert hits[0][0] == row
+                # Whatever the candidates, returned scores come from the float vectors
+                for hit_row, score in hits:
+                    assert abs(score - float(exact.vectors[hit_row] @ query)) < 1e-5
+                if quantization == "int8":
+                    assert [hit_row for hit_row, _ in hits] == [hit_row for hit_row, _ in reference]
+
+
+def test_pipeline_uses_flat_index():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        backend = FakeEmbeddingBackend(dim=64)
+        embedding_function = make_pipeline(tmp_dir).embedding_function
+        index = FlatIndex.build(((chunk_id, document, metadata, backend.embed_one(document))
+                                 for chunk_id, document, metadata in CHUNKS), os.path.join(tmp_dir, "flat_index"),
+                                embedding_backend=embedding_function.backend_id)
+        pipeline = RagPipeline(chroma_path=tmp_dir, embedding_function=embedding_function, model=FakeModel(),
+                               flat_index_path=os.path.join(tmp_dir, "flat_index"), bm25_index_path=tmp_dir,
+                               citation_index_path=os.path.join(tmp_dir, "missing.json"))
+        assert isinstance(pipeline.retriever, FlatIndex)
+
+        chunks, metadatas = pipeline.get_statute_context("Can my landlord keep my security deposit?", n_results=1)
+        assert metadatas[0]["section"] == "46:8-19" and chunks == [CHUNKS[1][1]]
+        assert index.count() == len(CHUNKS)
+
+        # An index embedded by another backend is refused rather than searched with mismatched vectors
+        FlatIndex.build(((chunk_id, document, metadata, backend.embed_one(document))
+                         for chunk_id, document, metadata in CHUNKS), os.path.join(tmp_dir, "gemini_index"),
+                        embedding_backend="gemini:models/embedding-001")
+        pipeline = RagPipeline(chroma_path=tmp_dir, embedding_function=embedding_function, model=FakeModel(),
+                               flat_index_path=os.path.join(tmp_dir, "gemini_index"))
+        try:
+            pipeline.retriever
+            assert False, "expected the backend mismatch to be rejected"
+        except EmbeddingBackendMismatch as e:
+            assert "gemini:models/embedding-001" in str(e)
+
+
+def test_stale_flat_index_falls_back_to_chroma():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        backend = FakeEmbeddingBackend(dim=64)
+        collection_pipeline = make_pipeline(tmp_dir)
+        embedding_function = collection_pipeline.embedding_function
+        flat_dir = os.path.join(tmp_dir, "flat_index")
+
+        def export():
+            FlatIndex.build(((chunk_id, document, metadata, backend.embed_one(document))
+                             for chunk_id, document, metadata in CHUNKS), flat_dir,
+                            embedding_backend=embedding_function.backend_id, index_version=bump_index_version(tmp_dir))
+
+        export()
+        pipeline = RagPipeline(chroma_path=tmp_dir, collection=collection_pipeline.collection,
+                               embedding_function=embedding_function, model=FakeModel(), flat_index_path=flat_dir,
+                               bm25_index_path=tmp_dir, citation_index_path=os.path.join(tmp_dir, "missing.json"))
+        assert isinstance(pipeline.retriever, FlatIndex)
+
+        # A re-index without a new export: the running pipeline goes back to Chroma
+        bump_index_version(tmp_dir)
+        assert isinstance(pipeline.retriever, ChromaRetriever)
+        assert RagPipeline(chroma_path=tmp_dir, collection=collection_pipeline.collection,
+                           embedding_function=embedding_function, flat_index_path=flat_dir).retriever.count() == len(CHUNKS)
+
+        # Re-exporting brings the running pipeline back to the flat index
+        export()
+        retriever = pipeline.retriever
+        assert isinstance(retriever, FlatIndex) and pipeline.retriever is retriever
+
+
+if __name__ == "__main__":
+    test_search_matches_brute_force()
+    test_rebuild_leaves_open_index_intact()
+    test_quantized_search_rescores_exactly()
+    test_pipeline_uses_flat_index()
+    test_stale_flat_index_falls_back_to_chroma()
+    print("✅ All flat index tests passed")
@@ -0,0 +1,161 @@
+import os
+import sys
+import tempfile
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from embedding_engine import BatchEmbeddingEngine, FakeEmbeddingBackend
+from gemini_embed_function import GeminiEmbeddingFunction
+from embedding_engine import EmbeddingBackendMismatch
+from utils.index_statutes import IndexCursor, index_statutes, open_collection
+from utils.statute_documents import SplitterMismatch
+
+
+def split_text(text):
+    # Stand-in for RecursiveCharacterTextSplitter: one chunk per paragraph
+    return text.split("\n")
+
+
+class FakeCollection:
+    def __init__(self):
+        self.records = {}
+        self.upserts = 0
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.upserts += 1
+        for key, embedding, document, metadata in zip(ids, embeddings, documents, metadatas):
+            self.records[key] = (embedding, document, metadata)
+
+
+class FakeClient:
+    """get_or_create_collection over FakeCollections that keep Chroma's collection metadata."""
+
+    def __init__(self):
+        self.collections = {}
+
+    def get_or_create_collection(self, name, embedding_function=None):
+        if name not in self.collections:
+            collection = self.collections[name] = FakeCollection()
+            collection.metadata = None
+            collection.count = lambda: len(collection.records)
+            collection.modify = lambda metadata: setattr(collection, "metadata", metadata)
+        return self.collections[name]
+
+
+class CrashingEmbeddingFunction:
+    """Dies on the nth call, like a kernel or network failure mid-run."""
+
+    def __init__(self, embedding_function, crash_on_call=None):
+        self.embedding_function = embedding_function
+        self.crash_on_call = crash_on_call
+        self.calls = 0
+        self.texts = 0
+
+    def __call__(self, input):
+        self.calls += 1
+        if self.calls == self.crash_on_call:
+            raise RuntimeError("connection reset")
+        self.texts += len(input)
+        return self.embedding_function(input)
+
+
+def make_sections(n):
+    return [{"title": "TITLE 1 - ACTS", "section": f"1:1-{i}", "heading": f"Heading {i}",
+             "text": f"First paragraph of {i}.\nSecond paragraph of {i}."} for i in range(n)]
+
+
+def test_index_resumes_from_cursor():
+    embedding_function = GeminiEmbeddingFunction(engine=BatchEmbeddingEngine(FakeEmbeddingBackend(dim=16), max_workers=4))
+    sections = make_sections(100)  # 200 chunks
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = os.path.join(tmp_dir, "processed.json")
+        with open(input_file, "w") as f:
+            f.write("[]")
+        cursor = IndexCursor(os.path.join(tmp_dir, "cursor.json"), input_file)
+        collection = FakeCollection()
+
+        crashing = CrashingEmbeddingFunction(embedding_function, crash_on_call=4)
+        try:
+            index_statutes(collection, sections, crashing, split_text, batch_size=30, cursor=cursor)
+            assert False, "expected the run to crash"
+        except RuntimeError:
+            pass
+        # Three batches were embedded, but only the first two were committed when it died
+        resume_from = cursor.load()
+        assert resume_from == 60
+
+        resumed = CrashingEmbeddingFunction(embedding_function)
+        stats = index_statutes(collection, sections, resumed, split_text, batch_size=30, cursor=cursor)
+        assert stats["skipped"] == resume_from and stats["indexed"] == 200 - resume_from
+        assert resumed.texts == 200 - resume_from
+        assert len(collection.records) == 200
+        assert not os.path.exists(cursor.path)
+
+        embedding, document, metadata = collection.records["statute_1:1-7_1"]
+        assert document == "Second paragraph of 7." and metadata["chunk_id"] == 1
+        assert embedding == embedding_function([document])[0]
+
+        # A different input file invalidates the cursor
+        cursor.save(150)
+        with open(input_file, "w") as f:
+            f.write("[{}]")
+        assert IndexCursor(cursor.path, input_file).load() == 0
+
+
+def test_open_collection_records_embedding_backend():
+    fake_function = GeminiEmbeddingFunction(engine=BatchEmbeddingEngine(FakeEmbeddingBackend(dim=16)))
+    client = FakeClient()
+
+    collection = open_collection(client, "statutes", fake_function)
+    assert collection.metadata == {"embedding_backend": "fake:fake/hashing-embedder", "splitter": "recursive:2000/100"}
+    index_statutes(collection, make_sections(3), fake_function, split_text)
+    assert open_collection(client, "statutes", fake_function) is collection
+
+    # Collections from before backends were recorded count as Gemini-built
+    legacy = client.get_or_create_collection("legacy")
+    legacy.records["statute_1:1-1_0"] = ([0.0] * 16, "text", {})
+    try:
+        open_collection(client, "legacy", fake_function)
+        assert False, "expected the backend mismatch to be rejected"
+    except EmbeddingBackendMismatch as e:
+        assert "gemini:models/embedding-001" in str(e)
+
+
+def test_open_collection_refuses_another_splitter():
+    fake_function = GeminiEmbeddingFunction(engine=BatchEmbeddingEngine(FakeEmbeddingBackend(dim=16)))
+    client = FakeClient()
+
+    collection = open_collection(client, "statutes", fake_function, "structure")
+    assert collection.metadata["splitter"] == "structure:550"
+    index_statutes(collection, make_sections(3), fake_function, split_text)
+    assert open_collection(client, "statutes", fake_function, "structure") is collection
+
+    # Upserting recursive chunks would leave the structure chunks they don't overwrite behind
+    try:
+        open_collection(client, "statutes", fake_function, "recursive")
+        assert False, "expected the splitter mismatch to be rejected"
+    except SplitterMismatch as e:
+        assert "structure:550" in str(e) and "--change_splitter" in str(e)
+    assert open_collection(client, "statutes", fake_function, "recursive", change_splitter=True) is collection
+
+    # Collections from before splitters were recorded count as the notebook's
+    legacy = client.get_or_create_collection("legacy")
+    legacy.metadata = {"embedding_backend": "fake:fake/hashing-embedder"}
+    legacy.records["statute_1:1-1_0"] = ([0.0] * 16, "text", {})
+    assert open_collection(client, "legacy", fake_function) is legacy
+    try:
+        open_collection(client, "legacy", fake_function, "structure")
+        assert False, "expected the splitter mismatch to be rejected"
+    except SplitterMismatch as e:
+        assert "recursive:2000/100" in str(e)
+
+
+if __name__ == "__main__":
+    test_index_resumes_from_cursor()
+    test_open_collection_records_embedding_backend()
+    test_open_collection_refuses_another_splitter()
+    print("✅ All index_statutes tests passed")
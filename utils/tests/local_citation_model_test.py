@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from utils.citations_extractions.citation_grammar import match_citations
+from utils.citations_extractions.local_citation_model import (LocalCitationModel, adapter_fingerprint,
+                                                              latest_checkpoint, length_buckets, parse_completion)
+
+
+class GrammarCitationModel(LocalCitationModel):
+    """Decodes with the grammar instead of the model, recording the batches it was given."""
+
+    def __init__(self, **kwargs):
+        super().__init__(adapter_path="unused", **kwargs)
+        self.batches = []
+
+    def extract_citations_batch(self, texts):
+        self.batches.append(len(texts))
+        return [match_citations(text)[0] for text in texts]
+
+
+def test_checkpoints_and_fingerprint():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for step in (2, 10, 13):
+            os.makedirs(os.path.join(tmp_dir, f"checkpoint-{step}"))
+        os.makedirs(os.path.join(tmp_dir, "merged"))
+        adapter = latest_checkpoint(tmp_dir)
+        assert adapter == os.path.join(tmp_dir, "checkpoint-13")
+
+        with open(os.path.join(adapter, "adapter_config.json"), "w") as f:
+            f.write('{"base_model_name_or_path": "Qwen/Qwen2.5-1.5B"}')
+        # A checkpoint without weights can't be merged, and says so
+        try:
+            adapter_fingerprint(adapter)
+            assert False, "expected the missing weights to be reported"
+        except FileNotFoundError as e:
+            assert "adapter_model.safetensors" in str(e)
+
+        with open(os.path.join(adapter, "adapter_model.safetensors"), "wb") as f:
+            f.write(b"weights")
+        fingerprint = adapter_fingerprint(adapter)
+        with open(os.path.join(adapter, "adapter_model.safetensors"), "wb") as f:
+            f.write(b"retrained weights")
+        assert adapter_fingerprint(adapter) != fingerprint
+
+
+def test_completion_parsing_and_buckets():
+    assert parse_completion(" L.1997,c.278,s.2.\nExtract citations from: ...") == "L.1997,c.278,s.2."
+    assert parse_completion("  \n") == "None" and parse_completion("None") == "None"
+    assert length_buckets([30, 5, 12, 40, 7], 2) == [[1, 4], [2, 0], [3]]
+
+
+def test_concurrent_calls_share_a_batch():
+    model = GrammarCitationModel(batch_size=8, max_wait=0.5)
+    texts = [f"Text of section 1:1-{i} shall apply. L.{1950 + i}, c.{i}, s.1." for i in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        citations = list(pool.map(lambda text: model.extract_citations(text, None, None), texts))
+    assert citations == [f"L.{1950 + i}, c.{i}, s.1." for i in range(8)]
+    assert model.batches == [8]
+
+
+if __name__ == "__main__":
+    test_checkpoints_and_fingerprint()
+    test_completion_parsing_and_buckets()
+    test_concurrent_calls_share_a_batch()
+    print("✅ All local citation model tests passed")
@@ -0,0 +1,96 @@
+import os
+import sys
+import tempfile
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from utils.organize_statutes import (iter_processed_sections, iter_statute_sections, iter_statute_sections_parallel,
+                                     parse_statutes, parse_statutes_stream, shard_ranges)
+
+# Covers the awkward cases from STATUTES.txt: repeated section headers (consecutive
+# and not), blank lines, text before the first section of a title, empty sections
+SAMPLE = """TITLE 1  ACTS, LAWS AND STATUTES
+Preamble text that belongs to no section.
+1:1-1.     General rules of construction
+    In the construction of the laws and statutes of this state, both civil and criminal,
+    words and phrases shall be read and construed with their context.
+
+1:1-1.     In the construction of the laws, repeated header line.
+    L.1997,c.278,s.2.
+1:1-2.     Words and phrases defined
+1:1-2.1.     Empty section right after
+TITLE 2A  ADMINISTRATION OF CIVIL AND CRIMINAL JUSTICE
+2A:52-1.     Action for change of name
+    2A:52-1.     Any person may institute an action in Superior Court, for authority to assume another name.
+    Amended by L.1948, c. 329, p. 1312, s. 1;  L.1953, c. 4, p. 24, s. 4, eff. March 19, 1953.
+1:1-1.     Non-consecutive duplicate of an earlier section
+    This line is appended to 2A:52-1 in the original parser.
+2A:52-2.     Notice
+    Notice shall be published.
+"""
+
+
+def flatten(parsed_data):
+    return [{"title": title["title"], **section} for title in parsed_data for section in title["sections"]]
+
+
+def test_stream_matches_parse_statutes():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = os.path.join(tmp_dir, "STATUTES.txt")
+        with open(input_file, "w", encoding="utf-8") as f:
+            f.write(SAMPLE * 3)
+
+        expected = flatten(parse_statutes(input_file, os.path.join(tmp_dir, "out.json")))
+        count = parse_statutes_stream(input_file, os.path.join(tmp_dir, "out.jsonl"))
+        streamed = list(iter_processed_sections(os.path.join(tmp_dir, "out.jsonl")))
+
+        assert count == len(expected) == 5
+        assert streamed == expected
+        assert list(iter_processed_sections(os.path.join(tmp_dir, "out.json"))) == expected
+
+
+def test_parallel_matches_stream():
+    # Duplicates of sections from earlier titles land in later shards, and a
+    # Windows line ending checks that shard boundaries follow text-mode lines
+    text = "Text before any title.\n" + SAMPLE * 3 + SAMPLE.replace("1:1-2.1.", "3:1-1.").replace("\n", "\r\n", 4)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = os.path.join(tmp_dir, "STATUTES.txt")
+        with open(input_file, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+
+        with open(input_file, "r", encoding="utf-8", errors="replace") as f:
+            expected = list(iter_statute_sections(f))
+
+        ranges = shard_ranges(input_file, 100)
+        assert len(ranges) == 8
+        assert ranges[0][0] == 0 and ranges[-1][1] == os.path.getsize(input_file)
+
+        assert list(iter_statute_sections_parallel(input_file, workers=2, shards_per_worker=50)) == expected
+        assert list(iter_statute_sections_parallel(input_file, workers=1, shards_per_worker=1)) == expected
+
+    # In the second title, 4:1-1 was seen in the first title's shard, so it is no new
+    # section: 5:1-1 stays open and its repeated header is kept in its text
+    text = ("TITLE 4  AGRICULTURE\n4:1-1.     Definitions\n    Body of 4:1-1.\n"
+            "TITLE 5  AMUSEMENTS\n5:1-1.     Open section\n    body text 31\n"
+            "4:1-1.     Duplicate of an earlier shard's section\n    body text 32\n"
+            "5:1-1.     Repeated header of the open section\n    body text 33\n")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = os.path.join(tmp_dir, "STATUTES.txt")
+        with open(input_file, "w", encoding="utf-8") as f:
+            f.write(text)
+
+        with open(input_file, "r", encoding="utf-8", errors="replace") as f:
+            expected = list(iter_statute_sections(f))
+        assert "5:1-1.     Repeated header" in expected[-1][1]["text"]
+
+        assert len(shard_ranges(input_file, 100)) == 2
+        assert list(iter_statute_sections_parallel(input_file, workers=1, shards_per_worker=100)) == expected
+
+
+if __name__ == "__main__":
+    test_stream_matches_parse_statutes()
+    test_parallel_matches_stream()
+    print("✅ All organize_statutes tests passed")
@@ -0,0 +1,168 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from embedding_engine import BatchEmbeddingEngine, FakeEmbeddingBackend
+from gemini_embed_function import GeminiEmbeddingFunction
+from answer_cache import bump_index_version
+from rag_pipeline import RagPipeline
+from citation_index import CitationIndex, find_citations
+
+CHUNKS = [
+    ("statute_2A:52-1_0", "Any person may institute an action in Superior Court for authority to assume another name.",
+     {"title": "TITLE 2A - ADMINISTRATION OF CIVIL AND CRIMINAL JUSTICE", "section": "2A:52-1",
+      "heading": "Action for change of name", "chunk_id": 0}),
+    ("statute_46:8-19_0", "The landlord shall return the security deposit within 30 days after the termination of the lease.",
+     {"title": "TITLE 46 - PROPERTY", "section": "46:8-19", "heading": "Security deposits", "chunk_id": 0}),
+]
+
+
+class FakeCollection:
+    """Brute-force stand-in for a Chroma collection over CHUNKS."""
+
+    def __init__(self, embedding_function):
+        self.embedding_function = embedding_function
+        self.vectors = embedding_function([text for _, text, _ in CHUNKS])
+        self.queries = 0
+
+    def count(self):
+        return len(CHUNKS)
+
+    def query(self, query_embeddings, n_results=3, **kwargs):
+        self.queries += 1
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for query in query_embeddings:
+            scores = [sum(a * b for a, b in zip(query, vector)) for vector in self.vectors]
+            order = sorted(range(len(CHUNKS)), key=lambda i: -scores[i])[:n_results]
+            results["ids"].append([CHUNKS[i][0] for i in order])
+            results["documents"].append([CHUNKS[i][1] for i in order])
+            results["metadatas"].append([CHUNKS[i][2] for i in order])
+            results["distances"].append([1 - scores[i] for i in order])
+        return results
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        answer = ["You may ", "petition the ", "Superior Court."]
+        if stream:
+            return iter(FakeResponse(text) for text in answer)
+        return FakeResponse("".join(answer))
+
+
+def make_pipeline(tmp_dir):
+    embedding_function = GeminiEmbeddingFunction(engine=BatchEmbeddingEngine(FakeEmbeddingBackend(dim=64)))
+    citation_index = CitationIndex()
+    for chunk_id, document, metadata in CHUNKS:
+        citation_index.add(chunk_id, document, metadata)
+    return RagPipeline(chroma_path=tmp_dir, collection=FakeCollection(embedding_function),
+                       embedding_function=embedding_function, model=FakeModel(), citation_index=citation_index)
+
+
+def test_get_answer_and_answer_cache():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pipeline = make_pipeline(tmp_dir)
+
+        answer, metadatas = pipeline.get_answer("How do I change my name?")
+        assert answer == "You may petition the Superior Court."
+        assert metadatas[0]["section"] == "2A:52-1"
+
+        # Same question again is served from the answer cache
+        assert pipeline.get_answer("How do I change my name?") == (answer, metadatas)
+        assert pipeline.model.calls == 1
+
+
+def test_stream_answer_events():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pipeline = make_pipeline(tmp_dir)
+
+        events = list(pipeline.stream_answer("Can my landlord keep my security deposit?"))
+        kinds = [kind for kind, _ in events]
+        assert kinds == ["sources", "token", "token", "token", "done"]
+        assert events[0][1][0]["section"] == "46:8-19"
+        assert events[-1][1]["time_to_first_token"] <= events[-1][1]["total_time"]
+
+
+def test_citation_fast_path():
+    assert find_citations("What does N.J.S.A. 2C:35-5 say? See also R.S.40:62-15 and 2c:35-5.") == \
+        ["2C:35-5", "40:62-15", "2c:35-5"]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pipeline = make_pipeline(tmp_dir)
+        backend = pipeline.embedding_function.engine.backend
+        calls_before = backend.calls
+
+        answer, metadatas = pipeline.get_answer("what does n.j.s.a. 46:8-19 require?")
+        assert [meta["section"] for meta in metadatas] == ["46:8-19"]
+        assert backend.calls == calls_before
+        assert pipeline.collection.queries == 0
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            pipeline.get_cited_context("Explain N.J.S.A. 2A:52-1 please")
+        assert (time.perf_counter() - start) / 1000 < 0.001
+
+
+def test_citation_index_follows_reindex():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "citation_index.json")
+        CitationIndex({"2A:52-1": [CHUNKS[0]]}, bump_index_version(tmp_dir)).save(path)
+        pipeline = RagPipeline(chroma_path=tmp_dir, model=FakeModel(), citation_index_path=path)
+        assert pipeline.citation_index.lookup("2A:52-1")[0][2] == CHUNKS[0][2]
+
+        # Re-indexing the collection turns the fast path off until publish_index saves a new index
+        version = bump_index_version(tmp_dir)
+        assert pipeline.citation_index is None
+        CitationIndex({"46:8-19": [CHUNKS[1]]}, version).save(path)
+        assert pipeline.citation_index.match("see 46:8-19 and 2A:52-1") == ["46:8-19"]
+
+        # An index saved before versions were recorded loads, and counts as predating any re-index
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"2A:52-1": [list(CHUNKS[0])]}, f)
+        legacy = CitationIndex.load(path)
+        assert legacy.lookup("2A:52-1") == [CHUNKS[0]] and legacy.index_version == ""
+        assert pipeline.citation_index is None
+
+
+def test_get_answers_batches_retrieval():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pipeline = make_pipeline(tmp_dir)
+        backend = pipeline.embedding_function.engine.backend
+        calls_before = backend.calls
+
+        questions = ["How do I change my name?", "what does n.j.s.a. 46:8-19 require?",
+                     "Can my landlord keep my security deposit?"]
+        results = pipeline.get_answers(questions)
+
+        # One embedding request and one search for the two uncited questions
+        assert backend.calls == calls_before + 1
+        assert pipeline.collection.queries == 1
+        assert [metadatas[0]["section"] for _, metadatas in results] == ["2A:52-1", "46:8-19", "46:8-19"]
+        assert pipeline.model.calls == 3
+
+        timings = {i: stage_times for i, _, stage_times in pipeline.answer_batch(questions[:1])}
+        assert timings[0]["cached"] and "embed" in timings[0] and "retrieve" in timings[0]
+
+
+if __name__ == "__main__":
+    test_get_answer_and_answer_cache()
+    test_stream_answer_events()
+    test_citation_fast_path()
+    test_citation_index_follows_reindex()
+    test_get_answers_batches_retrieval()
+    print("✅ All rag pipeline tests passed")
@@ -0,0 +1,98 @@
+import os
+import sys
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from utils.reindex_statutes import reindex
+from utils.statute_documents import iter_statute_chunks
+
+
+def split_text(text):
+    # Stand-in for RecursiveCharacterTextSplitter: one chunk per paragraph
+    return text.split("\n")
+
+
+class FakeCollection:
+    """In-memory stand-in for the parts of a Chroma collection the indexer uses."""
+
+    def __init__(self):
+        self.records = {}
+        self.embedded = 0
+
+    def get(self, ids=None, include=(), limit=None, offset=0):
+        keys = list(ids) if ids is not None else sorted(self.records)[offset:offset + limit]
+        return {
+            "ids": keys,
+            "documents": [self.records[key][0] for key in keys],
+            "metadatas": [dict(self.records[key][1]) for key in keys],
+        }
+
+    def upsert(self, ids, documents, metadatas):
+        self.embedded += len(documents)
+        self.records.update((key, (document, dict(metadata))) for key, document, metadata in zip(ids, documents, metadatas))
+
+    def update(self, ids, metadatas):
+        for key, metadata in zip(ids, metadatas):
+            self.records[key] = (self.records[key][0], dict(metadata))
+
+    def delete(self, ids):
+        for key in ids:
+            del self.records[key]
+
+
+def section(number, text, heading="Heading"):
+    return {"title": "TITLE 1 - ACTS", "section": number, "heading": heading, "text": text}
+
+
+def test_reindex_only_touches_changed_chunks():
+    collection = FakeCollection()
+    sections = [section(f"1:1-{i}", f"Paragraph one of {i}.\nParagraph two of {i}.") for i in range(50)]
+    plan = reindex(collection, sections, split_text, batch_size=16)
+    assert len(plan.added) == 100 and collection.embedded == 100
+
+    # Running again over the same parse embeds nothing
+    collection.embedded = 0
+    plan = reindex(collection, sections, split_text)
+    assert plan.unchanged == 100 and collection.embedded == 0
+
+    # One paragraph edited, one section renamed, one repealed, one new
+    sections[3] = section("1:1-3", "Paragraph one of 3.\nParagraph two, amended.")
+    sections[4] = section("1:1-4", sections[4]["text"], heading="New heading")
+    del sections[5]
+    sections.append(section("1:1-50", "A brand new section."))
+
+    plan = reindex(collection, sections, split_text)
+    assert [chunk[0] for chunk in plan.changed] == ["statute_1:1-3_1"]
+    assert [chunk[0] for chunk in plan.added] == ["statute_1:1-50_0"]
+    assert sorted(chunk[0] for chunk in plan.metadata_only) == ["statute_1:1-4_0", "statute_1:1-4_1"]
+    assert sorted(plan.removed) == ["statute_1:1-5_0", "statute_1:1-5_1"]
+    assert plan.unchanged == 95
+    assert collection.embedded == 2
+    assert collection.records["statute_1:1-4_0"][1]["heading"] == "New heading"
+    assert collection.records["statute_1:1-3_1"][0] == "Paragraph two, amended."
+
+    expected = {chunk_id: (text, metadata) for chunk_id, text, metadata in iter_statute_chunks(sections, split_text)}
+    assert collection.records == expected
+
+
+def test_chunks_without_hashes_are_not_reembedded():
+    # A collection built by the notebook has no content_hash in its metadata
+    collection = FakeCollection()
+    sections = [section("1:1-1", "Only paragraph.")]
+    for chunk_id, text, metadata in iter_statute_chunks(sections, split_text):
+        metadata.pop("content_hash")
+        collection.records[chunk_id] = (text, metadata)
+
+    plan = reindex(collection, sections, split_text)
+    assert [chunk[0] for chunk in plan.metadata_only] == ["statute_1:1-1_0"]
+    assert collection.embedded == 0
+    assert "content_hash" in collection.records["statute_1:1-1_0"][1]
+
+
+if __name__ == "__main__":
+    test_reindex_only_touches_changed_chunks()
+    test_chunks_without_hashes_are_not_reembedded()
+    print("✅ All reindex tests passed")
@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from reranker import CrossEncoderReranker, OverlapScorer
+from rag_pipeline import RagPipeline
+from utils.tests.rag_pipeline_test import CHUNKS, FakeModel, make_pipeline
+
+CANDIDATES = [
+    ("Names may be changed by the Superior Court.", {"section": "2A:52-1", "chunk_id": 0}),
+    ("A landlord shall return the security deposit within 30 days.", {"section": "46:8-19", "chunk_id": 0}),
+    ("Interest on the security deposit is paid to the tenant yearly.", {"section": "46:8-19", "chunk_id": 1}),
+]
+
+
+def test_rerank_keeps_best_k_and_caches_scores():
+    scorer = OverlapScorer()
+    reranker = CrossEncoderReranker(scorer=scorer)
+    chunks, metadatas = [list(column) for column in zip(*CANDIDATES)]
+
+    best_chunks, best_metadatas = reranker.rerank("When is my security deposit returned by the landlord?",
+                                                  chunks, metadatas, k=2)
+    assert best_chunks == [CANDIDATES[1][0], CANDIDATES[2][0]]
+    assert [m["chunk_id"] for m in best_metadatas] == [0, 1]
+
+    # Two questions, one of them already scored: one predict call for the other's candidates
+    contexts = reranker.rerank_batch(["When is my security deposit returned by the landlord?", "How do I change my name?"],
+                                     [(chunks, metadatas), (chunks, metadatas)], k=1)
+    assert contexts[1][0] == [CANDIDATES[0][0]]
+    assert scorer.calls == 2 and reranker.stats()["hits"] == 3 and reranker.stats()["misses"] == 6
+
+    # Re-indexing drops the scores
+    reranker.check_version("1")
+    reranker.check_version("2")
+    reranker.rerank("How do I change my name?", chunks, metadatas, k=1)
+    assert scorer.calls == 3
+
+    # A BM25-only hit's stand-in chunk_id 0 holds other text than the real chunk 0: scored separately
+    section_text = "Names may be changed by the Superior Court. Notice of the action shall be published."
+    reranker.rerank("How do I change my name?", [section_text], [{"section": "2A:52-1", "chunk_id": 0}], k=1)
+    assert scorer.calls == 4 and reranker.stats()["entries"] == 4
+
+
+def test_pipeline_reranks_wider_candidate_pool():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        collection = make_pipeline(tmp_dir).collection
+        reranker = CrossEncoderReranker(scorer=OverlapScorer())
+        pipeline = RagPipeline(chroma_path=tmp_dir, collection=collection, embedding_function=collection.embedding_function,
+                               model=FakeModel(), bm25_index_path=tmp_dir, citation_index_path=os.path.join(tmp_dir, "none"),
+                               flat_index_path=os.path.join(tmp_dir, "none"), reranker=reranker, rerank_candidates=5)
+
+        chunks, metadatas = pipeline.get_statute_context("Superior Court action to change a name", n_results=1)
+        assert chunks == [CHUNKS[0][1]] and metadatas[0]["section"] == "2A:52-1"
+        # Every indexed chunk was a candidate, scored in one batch
+        assert reranker.stats()["misses"] == len(CHUNKS) and reranker._scorer.calls == 1
+
+
+if __name__ == "__main__":
+    test_rerank_keeps_best_k_and_caches_scores()
+    test_pipeline_reranks_wider_candidate_pool()
+    print("✅ All reranker tests passed")
@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+import tempfile
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from utils.benchmarks.retrieval_benchmark import (QUESTIONS_FILE, load_labeled_questions, recall_at_k,
+                                                  reciprocal_rank, run_benchmark, synthetic_corpus, whole_section)
+
+
+def test_metrics():
+    assert recall_at_k(["1:1-1", "2:1-1", "3:1-1"], ["2:1-1", "9:9-9"], k=1) == 0.0
+    assert recall_at_k(["1:1-1", "2:1-1", "3:1-1"], ["2:1-1", "9:9-9"], k=3) == 0.5
+    assert reciprocal_rank(["1:1-1", "2:1-1"], ["2:1-1"]) == 0.5
+    assert reciprocal_rank(["1:1-1"], ["2:1-1"]) == 0.0
+
+    questions = load_labeled_questions(QUESTIONS_FILE)
+    assert len(questions) >= 30 and all(sections for _, sections in questions)
+    # Questions whose sections aren't in the corpus are dropped
+    assert load_labeled_questions(QUESTIONS_FILE, {"2A:52-1"}) == [
+        ("How do I legally change my name in New Jersey?", ["2A:52-1"])]
+
+
+def test_benchmark_is_reproducible():
+    sections, questions = synthetic_corpus(300, 30)
+    reports = []
+    for _ in range(2):
+        with tempfile.TemporaryDirectory() as work_dir:
+            reports.append(run_benchmark(["flat", "bm25", "hybrid"], sections, questions, whole_section, work_dir))
+
+    report = reports[0]
+    assert report["corpus"]["chunks"] == 300 and report["corpus"]["questions"] == 30
+    assert report["results"]["bm25"]["recall@10"] > 0.8
+    for name, result in report["results"].items():
+        assert 0.0 <= result["recall@1"] <= result["recall@10"] <= 1.0
+        assert result["p50_ms"] <= result["p95_ms"] and result["peak_rss_mb"] > 0
+        # Same corpus, same deterministic embedder: same quality numbers on every run
+        assert {k: v for k, v in result.items() if k.startswith("recall") or k == "mrr"} == \
+            {k: v for k, v in reports[1]["results"][name].items() if k.startswith("recall") or k == "mrr"}
+    json.dumps(report)
+
+
+if __name__ == "__main__":
+    test_metrics()
+    test_benchmark_is_reproducible()
+    print("✅ All retrieval benchmark tests passed")
@@ -0,0 +1,71 @@
+import json
+import os
+import sys
+import tempfile
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from utils.run_regression import load_questions, run_regression
+from utils.tests.rag_pipeline_test import FakeModel, make_pipeline
+
+QUESTIONS = [
+    {"question": "How do I change my name?", "answer": "Petition the Superior Court."},
+    {"question": "Can my landlord keep my security deposit?", "answer": "Not after 30 days."},
+    {"question": "What does N.J.S.A. 2A:52-1 say?", "answer": "Name changes."},
+]
+
+
+class FlakyModel(FakeModel):
+    """Fails for one question, like a rate-limited generation request."""
+
+    def generate_content(self, prompt, stream=False):
+        if "security deposit" in prompt.split("Question:")[-1]:
+            raise RuntimeError("429 Resource exhausted")
+        return super().generate_content(prompt, stream)
+
+
+def test_regression_run_resumes_failed_questions():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = os.path.join(tmp_dir, "questions.jsonl")
+        with open(input_file, "w") as f:
+            f.writelines(json.dumps(row) + "\n" for row in QUESTIONS)
+        questions = list(load_questions(input_file))
+        assert questions[0] == {"id": "0", "question": QUESTIONS[0]["question"], "reference": QUESTIONS[0]["answer"]}
+
+        output_file = os.path.join(tmp_dir, "out", "answers.jsonl")
+        pipeline = make_pipeline(tmp_dir)
+        pipeline._model = FlakyModel()
+        report = run_regression(pipeline, questions, output_file, batch_size=2, workers=2)
+        assert (report["answered"], report["errors"]) == (2, 1)
+        assert set(report["stages"]) >= {"embed", "retrieve", "generate", "total"}
+
+        with open(output_file) as f:
+            records = [json.loads(line) for line in f]
+        # The failed question is left out of the output, so its retry doesn't duplicate its id
+        answered = {record["id"]: record for record in records}
+        assert sorted(answered) == ["0", "2"]
+        assert answered["2"]["sources"] == ["2A:52-1"] and answered["2"]["answer"]
+        # total is the question's own stages, not time spent queued behind the batch
+        timings = answered["0"]["timings"]
+        assert abs(timings["total"] - sum(timings[stage] for stage in
+                                          ("citation_lookup", "embed", "retrieve", "generate"))) < 1e-9
+
+        # The rerun only retries the failed question
+        pipeline._model = FakeModel()
+        report = run_regression(pipeline, questions, output_file, batch_size=2)
+        assert (report["answered"], report["skipped"], report["errors"]) == (1, 2, 0)
+        assert pipeline.model.calls == 1
+        with open(output_file) as f:
+            assert sorted(json.loads(line)["id"] for line in f) == ["0", "1", "2"]
+
+        # A run over fewer questions (e.g. --limit) skips only those it was given
+        report = run_regression(pipeline, questions[:1], output_file)
+        assert (report["answered"], report["skipped"]) == (0, 1)
+
+
+if __name__ == "__main__":
+    test_regression_run_resumes_failed_questions()
+    print("✅ All regression runner tests passed")
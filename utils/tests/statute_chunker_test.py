@@ -0,0 +1,94 @@
+import os
+import sys
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from telemetry import estimate_tokens
+from utils.organize_statutes import iter_statute_sections
+from utils.statute_chunker import StatuteChunker, parse_enumerators
+from utils.statute_documents import iter_statute_chunks
+
+TEXT = """Manufacturing, distributing or dispensing.
+1. a. Except as authorized by P.L.1970, c.226, it shall be unlawful for any person knowingly or purposely:
+(1) To manufacture, distribute or dispense a controlled dangerous substance;
+(2) To create, distribute, or possess with intent to distribute, a counterfeit controlled dangerous substance.
+b. Any person who violates subsection a. with respect to:
+(1) Heroin, or its analog, in a quantity of five ounces or more is guilty of a crime of the first degree. Notwithstanding the provisions of subsection a. of N.J.S.2C:43-3, a fine of up to $500,000 may be imposed;
+(2) A substance referred to in paragraph (1) of this subsection, in a quantity of one-half ounce or more:
+(a) if heroin, or its analog, is a crime of the second degree;
+(b) otherwise a crime of the third degree.
+c. Where the degree of the offense depends on the quantity, the quantity involved shall be determined by the trier of fact.
+L.1987, c.106, s.1."""
+
+
+def test_enumerators():
+    assert parse_enumerators("1. a. Except as authorized") == [(0, "1"), (1, "a")]
+    assert parse_enumerators("b. (1) In the case of") == [(1, "b"), (2, "1")]
+    assert parse_enumerators("(ii) the second") == [(3, "ii")]
+    # Citations and ordinary sentences are not enumerators
+    assert parse_enumerators("N.J.S.2C:43-3 provides") == []
+    assert parse_enumerators("2C:35-5 Manufacturing") == []
+    assert parse_enumerators("a person who") == []
+
+
+def test_chunks_follow_structure_within_budget():
+    chunker = StatuteChunker(max_tokens=80)
+    chunks = chunker.split_with_metadata(TEXT)
+    for text, metadata in chunks:
+        assert estimate_tokens(text) <= 80 and metadata["tokens"] == estimate_tokens(text)
+        assert TEXT[metadata["start_offset"]:metadata["end_offset"]] == text
+
+    # Chunks start at enumerated lines
+    assert [(metadata["first_path"], metadata["last_path"]) for _, metadata in chunks] == [
+        ("", "1.a.(1)"), ("1.a.(2)", "1.b."), ("1.b.(1)", "1.b.(1)"), ("1.b.(2)", "1.b.(2)(b)"), ("1.c.", "1.c.")]
+    # Nothing is duplicated or lost
+    assert "".join(text for text, _ in chunks).replace("\n", "") == TEXT.replace("\n", "")
+
+    # A unit over the budget is cut at sentence ends
+    pieces = StatuteChunker(max_tokens=30)(TEXT)
+    assert any(piece.startswith("Notwithstanding") for piece in pieces)
+    assert all(estimate_tokens(piece) <= 30 for piece in pieces)
+
+    # Under a large budget the whole section is one chunk
+    assert StatuteChunker(max_tokens=1000)(TEXT) == [TEXT]
+
+
+def test_structure_of_parsed_sections():
+    # The parser joins a section's lines with spaces, so every unit after the first starts inline
+    raw = "TITLE 2C  THE NEW JERSEY CODE OF CRIMINAL JUSTICE\n2C:35-5.  Manufacturing, distributing or dispensing\n"
+    (_, section), = iter_statute_sections((raw + TEXT + "\n").splitlines(keepends=True))
+    text = section["text"]
+    assert "\n" not in text and "with respect to: (1) Heroin" in text
+
+    chunks = StatuteChunker(max_tokens=80).split_with_metadata(text)
+    assert [(metadata["first_path"], metadata["last_path"]) for _, metadata in chunks] == [
+        ("", "1.a.(1)"), ("1.a.(2)", "1.b."), ("1.b.(1)", "1.b.(1)"), ("1.b.(2)", "1.b.(2)(b)"), ("1.c.", "1.c.")]
+    assert chunks[2][0].startswith("(1) Heroin") and chunks[4][0].startswith("c. Where")
+    for chunk, metadata in chunks:
+        assert text[metadata["start_offset"]:metadata["end_offset"]] == chunk
+
+    # Mentions of subsections and chapters inside a sentence are not units
+    units = StatuteChunker().units(text)
+    assert [unit["path"] for unit in units] == ["", "1.a.", "1.a.(1)", "1.a.(2)", "1.b.", "1.b.(1)", "1.b.(2)",
+                                                "1.b.(2)(a)", "1.b.(2)(b)", "1.c."]
+
+
+def test_drop_in_for_iter_statute_chunks():
+    sections = [{"title": "TITLE 2C - THE NEW JERSEY CODE OF CRIMINAL JUSTICE", "section": "2C:35-5",
+                 "heading": "Manufacturing, distributing or dispensing", "text": TEXT}]
+    chunks = list(iter_statute_chunks(sections, StatuteChunker(max_tokens=80)))
+    assert [chunk_id for chunk_id, _, _ in chunks][:2] == ["statute_2C:35-5_0", "statute_2C:35-5_1"]
+    metadata = chunks[1][2]
+    assert metadata["section"] == "2C:35-5" and metadata["chunk_id"] == 1 and metadata["content_hash"]
+    assert metadata["first_path"] == "1.a.(2)" and metadata["start_offset"] > 0
+
+
+if __name__ == "__main__":
+    test_enumerators()
+    test_chunks_follow_structure_within_budget()
+    test_structure_of_parsed_sections()
+    test_drop_in_for_iter_statute_chunks()
+    print("✅ All statute chunker tests passed")
@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+from streaming import TimedTokenStream, iter_response_text
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self._text = text
+
+    @property
+    def text(self):
+        if self._text is None:
+            raise ValueError("chunk has no text parts")
+        return self._text
+
+
+class FakeStreamingModel:
+    """Mimics GenerativeModel.generate_content(prompt, stream=True) with a fixed pace."""
+
+    def __init__(self, chunks, first_delay=0.05, delay=0.02):
+        self.chunks = chunks
+        self.first_delay = first_delay
+        self.delay = delay
+
+    def generate_content(self, prompt, stream=False):
+        def generate():
+            for i, text in enumerate(self.chunks):
+                time.sleep(self.first_delay if i == 0 else self.delay)
+                yield FakeChunk(text)
+        return generate() if stream else None
+
+
+def test_time_to_first_token():
+    chunks = ["Under ", "N.J.S.A. 2A:52-1, ", "any person may ", "change their name.", None]
+    model = FakeStreamingModel(chunks)
+
+    started_at = time.perf_counter()
+    stream = TimedTokenStream(iter_response_text(model.generate_content("prompt", stream=True)), started_at)
+    answer = "".join(stream)
+    stats = stream.stats()
+
+    assert answer == "Under N.J.S.A. 2A:52-1, any person may change their name."
+    assert stats["chunks"] == 4
+    assert 0.05 <= stats["time_to_first_token"] < stats["total_time"]
+    # Blocking generation would only show text after every chunk arrived
+    assert stats["time_to_first_token"] < stats["total_time"] / 2
+    print(f"Time to first token: {stats['time_to_first_token']:.3f}s, total: {stats['total_time']:.3f}s")
+
+
+if __name__ == "__main__":
+    test_time_to_first_token()
+    print("✅ All streaming tests passed")
@@ -0,0 +1,63 @@
+import os
+import sys
+import tempfile
+
+# Add the project root to the Python path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(project_root)
+
+import telemetry
+from telemetry import METRICS, StageMetrics
+from utils.tests.rag_pipeline_test import make_pipeline
+
+
+def test_stage_metrics_percentiles_and_prometheus_text():
+    metrics = StageMetrics(window=100)
+    for ms in range(1, 201):
+        metrics.observe("retrieve", ms / 1000)
+    metrics.add_tokens(120, 30)
+    metrics.add_context_tokens(900, 600)
+
+    stats = metrics.summary()["stages"]["retrieve"]
+    # Percentiles cover the last 100 durations, count and sum cover all of them
+    assert stats["count"] == 200 and abs(stats["sum"] - 20.1) < 1e-9
+    assert (stats["p50"], stats["p95"], stats["p99"]) == (0.15, 0.195, 0.199)
+
+    text = metrics.render_prometheus()
+    assert 'rag_stage_seconds{stage="retrieve",quantile="0.95"} 0.195000' in text
+    assert 'rag_stage_seconds_count{stage="retrieve"} 200' in text
+    assert 'rag_generation_tokens_total{kind="prompt"} 120' in text
+    assert 'rag_context_tokens_total{kind="context"} 600' in text
+
+
+def test_pipeline_records_each_stage():
+    METRICS.reset()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pipeline = make_pipeline(tmp_dir)
+        pipeline.get_answer("Can my landlord keep my security deposit?")
+        pipeline.get_answer("Can my landlord keep my security deposit?")
+        list(pipeline.stream_answer("How do I change my name?"))
+
+        try:
+            with telemetry.span("generate"):
+                raise RuntimeError("429")
+        except RuntimeError:
+            pass
+
+    summary = METRICS.summary()
+    stages = summary["stages"]
+    assert stages["get_answer"]["count"] == 2
+    assert stages["embed"]["count"] == 3 and stages["retrieve"]["count"] == 3
+    # The second question was answered from the answer cache
+    assert stages["generate"]["count"] == 2 and stages["generate"]["errors"] == 1
+    assert stages["answer_cache"]["count"] == 3
+    assert stages["generate_stream"]["count"] == 1 and "time_to_first_token" in stages
+    # FakeResponse has no usage_metadata, so tokens are estimated from the text
+    assert summary["tokens"]["prompt"] > 0 and summary["tokens"]["completion"] > 0
+
+
+if __name__ == "__main__":
+    test_stage_metrics_percentiles_and_prometheus_text()
+    test_pipeline_records_each_stage()
+    print("✅ All telemetry tests passed")